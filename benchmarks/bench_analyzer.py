@@ -0,0 +1,108 @@
+"""Benchmark: análise em blocos (core/analysis) sobre um store sintético, por tamanho de bloco.
+
+Mede linhas/s e o pico de memória alocada pela análise (tracemalloc, que
+enxerga os arrays do NumPy); as colunas do store são mapeadas, então o pico
+acompanha o bloco e não o tamanho do arquivo.
+
+Também lê um CSV legado pelo caminho do analyzer (csv_chunks), inclusive com
+blocos minúsculos, e retoma pelo offset depois de o arquivo crescer: em todos
+os casos as linhas analisadas têm de bater com as do arquivo.
+
+Uso: python benchmarks/bench_analyzer.py [linhas]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_startup import make_samples  # noqa: E402
+from analyzer import csv_chunks  # noqa: E402
+from core.analysis import FlightAnalysis  # noqa: E402
+from core.fast_parser import ParseStats  # noqa: E402
+from core.store import TelemetryStore, TelemetryStoreWriter, CSV_COLUMNS  # noqa: E402
+from core.tail import CSVTailer, CSV_HEADER  # noqa: E402
+
+WRITE_ROWS = 1 << 20
+# O CSV é texto: limitado para o caso legado não dominar o tempo do benchmark
+CSV_ROWS = 200_000
+
+
+def analyze(store, chunk_rows):
+    analysis = FlightAnalysis()
+    columns = CSV_COLUMNS + ["t_rx_ns"]
+    tracemalloc.start()
+    start = time.perf_counter()
+    for begin in range(0, store.rows, chunk_rows):
+        cols = store.read(begin, min(begin + chunk_rows, store.rows), columns)
+        analysis.update(cols["lat"], cols["lon"], cols["alt"], cols["vel"], cols["t_rx_ns"])
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, analysis
+
+
+def csv_lines(begin, n):
+    samples = make_samples(begin, n)
+    return "".join(f"{la:.7f},{lo:.7f},{a:.3f},{v:.3f}\n" for la, lo, a, v in
+                   zip(samples["lat"], samples["lon"], samples["alt"], samples["vel"])).encode()
+
+
+def analyze_csv(path, chunk_rows, tailer, analysis):
+    start = time.perf_counter()
+    for cols in csv_chunks(path, chunk_rows, ParseStats(), tailer):
+        analysis.update(cols["lat"], cols["lon"], cols["alt"], cols["vel"])
+    return time.perf_counter() - start
+
+
+def bench_csv(tmp, rows):
+    """Leitura inteira e retomada (metade, arquivo cresce, resto pelo offset) por tamanho de bloco"""
+    path = os.path.join(tmp, "dados.csv")
+    half = rows // 2
+    head, tail = CSV_HEADER + b"\n" + csv_lines(0, half), csv_lines(half, rows - half)
+    print(f"CSV: {rows} linhas ({(len(head) + len(tail)) / 1e6:.0f} MB)")
+    print(f"{'bloco':>10} {'tempo':>8} {'linhas/s':>12} {'inteiro':>9} {'retomado':>9}")
+    for chunk_rows in (1 << 20, 1 << 10, 1):
+        with open(path, "wb") as f:
+            f.write(head + tail)
+        whole = FlightAnalysis()
+        elapsed = analyze_csv(path, chunk_rows, CSVTailer(path), whole)
+        with open(path, "wb") as f:
+            f.write(head)
+        resumed, tailer = FlightAnalysis(), CSVTailer(path)
+        analyze_csv(path, chunk_rows, tailer, resumed)
+        with open(path, "ab") as f:
+            f.write(tail)
+        analyze_csv(path, chunk_rows, tailer, resumed)
+        flag = "" if whole.rows == resumed.rows == rows else "  <- linhas faltando"
+        print(f"{chunk_rows:>10} {elapsed:>7.2f}s {rows / elapsed:>12,.0f} {whole.rows:>9} {resumed.rows:>9}{flag}")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    tmp = tempfile.mkdtemp()
+    try:
+        writer = TelemetryStoreWriter(os.path.join(tmp, "telemetria"), truncate=True)
+        for begin in range(0, rows, WRITE_ROWS):
+            writer.write_samples(make_samples(begin, min(WRITE_ROWS, rows - begin)))
+        writer.close()
+        store = TelemetryStore(os.path.join(tmp, "telemetria"))
+
+        print(f"Store: {rows} linhas ({rows * 48 / 1e6:.0f} MB de colunas)")
+        print(f"{'bloco':>10} {'tempo':>8} {'linhas/s':>12} {'pico mem.':>10} {'apogeu':>9}")
+        for chunk_rows in (rows, 1 << 20, 1 << 16):
+            elapsed, peak, analysis = analyze(store, chunk_rows)
+            label = "inteiro" if chunk_rows == rows else str(chunk_rows)
+            print(f"{label:>10} {elapsed:>7.2f}s {rows / elapsed:>12,.0f} {peak / 1e6:>8.1f}MB {analysis.max_alt:>8.1f}m")
+        store.close()
+        print()
+        bench_csv(tmp, min(rows, CSV_ROWS))
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark: Monte Carlo de dispersão em lote (BatchPhysicsEngine) vs PhysicsEngine voo a voo.
+
+O laço sequencial roda só uma amostra dos voos (é lento) e o tempo é
+extrapolado para N; os mesmos parâmetros sorteados alimentam os dois lados,
+e as quedas são comparadas membro a membro.
+
+Uso: python benchmarks/bench_dispersion.py [voos] [amostra_sequencial]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from simulador import (RocketParameters, MissionParameters, PhysicsEngine,  # noqa: E402
+                       BatchPhysicsEngine, MonteCarloDispersion)
+
+
+def nominal():
+    """O lançamento padrão do simulador"""
+    rocket = RocketParameters()
+    rocket.set_thrust(80)
+    rocket.set_burn_time(1.5)
+    rocket.set_launch_angle(45)
+    mission = MissionParameters()
+    mission.set_heading(90)
+    mission.set_wind(2.0, 0.0)
+    return rocket, mission
+
+
+def sequential(params, heading, count):
+    """Um PhysicsEngine por voo, como numa sequência de RocketSimulator (sem UDP nem sleep)"""
+    landings = []
+    for i in range(count):
+        rocket = RocketParameters()
+        rocket.set_thrust(params['thrust'][i])
+        rocket.set_burn_time(params['burn_time'][i])
+        rocket.set_launch_angle(params['angle'][i])
+        rocket.MASS = params['mass'][i]
+        rocket.DRAG_COEF = params['drag_coef'][i]
+        mission = MissionParameters()
+        mission.set_heading(heading)
+        mission.set_wind(params['wind_x'][i], params['wind_y'][i])
+        engine = PhysicsEngine(rocket, mission)
+        while engine.state['altitude'] >= 0:
+            engine.update_position()
+        landings.append((engine.state['x'], engine.state['y']))
+    return np.array(landings)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    sample = min(n, int(sys.argv[2]) if len(sys.argv) > 2 else 500)
+    rocket, mission = nominal()
+    dispersion = MonteCarloDispersion(rocket, mission)
+    params = dispersion.sample(n, seed=0)
+    print(f"Voos: {n} (sequencial medido em {sample} e extrapolado)")
+
+    start = time.perf_counter()
+    batch = BatchPhysicsEngine(heading=mission.heading, cross_area=rocket.CROSS_AREA, **params).run()
+    batch_s = time.perf_counter() - start
+    print(f"Lote (NumPy):         {batch_s:>9.3f} s  ({n / batch_s:,.0f} voos/s)")
+
+    start = time.perf_counter()
+    landings = sequential(params, mission.heading, sample)
+    seq_s = (time.perf_counter() - start) * n / sample
+    print(f"PhysicsEngine em laço: {seq_s:>9.3f} s  ({n / seq_s:,.0f} voos/s)  -> {seq_s / batch_s:.0f}x")
+
+    diff = np.hypot(landings[:, 0] - batch['x'][:sample], landings[:, 1] - batch['y'][:sample]).max()
+    print(f"Maior diferença na queda: {diff:.2e} m")
+
+    start = time.perf_counter()
+    result = dispersion.run(n, seed=0)
+    print(f"Monte Carlo completo (sorteio + elipse): {time.perf_counter() - start:.3f} s | "
+          f"raio de segurança {result['summary']['raio_seguranca_m']:.1f} m")
+
+
+if __name__ == "__main__":
+    main()
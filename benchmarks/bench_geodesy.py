@@ -0,0 +1,58 @@
+"""Benchmark: trajeto no solo vetorizado (core/geodesy) vs laço de geopy ponto a ponto.
+
+O geopy é opcional (saiu das dependências); sem ele só o lado vetorizado roda.
+
+Uso: python benchmarks/bench_geodesy.py [pontos]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from core.geodesy import ground_track, vincenty, downrange_crossrange  # noqa: E402
+
+
+def make_track(n):
+    """Trajeto de um voo: deriva para leste a partir da base, com ruído de GPS"""
+    rng = np.random.default_rng(0)
+    lat = -24.046746 + np.cumsum(rng.normal(0, 1e-6, n))
+    lon = -52.378203 + np.cumsum(rng.normal(2e-6, 1e-6, n))
+    return lat, lon
+
+
+def best_of(func, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    lat, lon = make_track(n)
+    print(f"Trajeto: {n} pontos")
+
+    elapsed, track = best_of(lambda: ground_track(lat, lon))
+    print(f"ground_track (NumPy):        {elapsed * 1e6:>10.0f} us  -> {track[-1]:.3f} m")
+    elapsed, dist = best_of(lambda: vincenty(lat[:-1], lon[:-1], lat[1:], lon[1:]).sum())
+    print(f"vincenty por passo (NumPy):  {elapsed * 1e6:>10.0f} us  -> {dist:.3f} m")
+    elapsed, (down, cross) = best_of(lambda: downrange_crossrange(lat, lon, lat[0], lon[0]))
+    print(f"alcance/desvio (NumPy):      {elapsed * 1e6:>10.0f} us  -> {down[-1]:.3f} m / {np.abs(cross).max():.3f} m")
+
+    try:
+        from geopy.distance import geodesic
+    except ImportError:
+        print("geopy não instalado: comparação pulada")
+        return
+    elapsed, reference = best_of(lambda: sum(geodesic((lat[i], lon[i]), (lat[i + 1], lon[i + 1])).meters
+                                             for i in range(n - 1)), repeat=1)
+    print(f"geopy em laço:               {elapsed * 1e6:>10.0f} us  -> {reference:.3f} m")
+    print(f"Diferença: {abs(track[-1] - reference) * 1e3:.4f} mm")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Benchmark: tempo de desenho de um gráfico de série com o nível de detalhe (core/downsample).
+
+Uso: python benchmarks/bench_lod.py
+"""
+import io
+import os
+import sys
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from core.downsample import MinMaxLOD  # noqa: E402
+
+
+def render(t, y):
+    fig, ax = plt.subplots(figsize=(10, 5))
+    ax.plot(t, y, color='#4cc9f0')
+    ax.fill_between(t, y, alpha=0.3, color='#4cc9f0')
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=200, bbox_inches='tight')
+    plt.close(fig)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'amostras':>10} {'carga LOD':>10} {'+1 lote':>9} {'pontos':>7} {'desenho':>9} {'sem LOD':>9}")
+    for n in (1_000, 100_000, 1_000_000, 10_000_000):
+        y = np.cumsum(rng.normal(size=n))
+        t = np.arange(n)
+
+        start = time.perf_counter()
+        lod = MinMaxLOD()
+        lod.extend(y[:-20])
+        load = time.perf_counter() - start
+
+        # Atualização típica ao vivo: só um lote novo de amostras
+        start = time.perf_counter()
+        lod.extend(y[-20:])
+        idx = lod.indices()
+        update = time.perf_counter() - start
+        assert y[idx].max() == y.max() and y[idx].min() == y.min()
+
+        start = time.perf_counter()
+        render(t[idx], y[idx])
+        drawn = time.perf_counter() - start
+
+        full = float("nan")
+        if n <= 1_000_000:
+            start = time.perf_counter()
+            render(t, y)
+            full = time.perf_counter() - start
+
+        print(f"{n:>10} {load:>9.3f}s {update * 1e3:>7.2f}ms {len(idx):>7} {drawn:>8.3f}s {full:>8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Benchmark: partida a frio e custo por atualização do dashboard, com e sem o modo preguiçoso de abas.
+
+Cada modo roda num processo novo (importações a frio) com o AppTest do
+Streamlit sobre um store sintético em diretório temporário. Mede a CPU das
+reexecuções com um lote novo no store e das reexecuções sem dados novos.
+
+Uso: python benchmarks/bench_startup.py [linhas] [atualizações]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SRC = os.path.join(ROOT, "src")
+
+
+def make_samples(start, n):
+    import numpy as np
+    from core.packets import SAMPLE_DTYPE
+    i = np.arange(start, start + n)
+    samples = np.zeros(n, dtype=SAMPLE_DTYPE)
+    samples["lat"] = -24.046746 + i * 1e-7
+    samples["lon"] = -52.378203 - i * 1e-7
+    samples["alt"] = 1000 * np.sin(i / 5000)
+    samples["vel"] = np.cos(i / 5000) * 50
+    samples["seq"] = i
+    samples["t_tx_ns"] = samples["t_rx_ns"] = i * 100_000_000
+    return samples
+
+
+def worker(rows, updates):
+    started = time.perf_counter()
+    sys.path.insert(0, SRC)
+    from streamlit.testing.v1 import AppTest
+    from core.store import TelemetryStoreWriter
+    import components.data_loader as data_loader
+
+    tmp = tempfile.mkdtemp()
+    data_loader.store_path = os.path.join(tmp, "telemetria")
+    data_loader.csv_path = os.path.join(tmp, "dados.csv")
+    writer = TelemetryStoreWriter(data_loader.store_path, truncate=True)
+    writer.write_samples(make_samples(0, rows))
+    writer.flush()
+    setup = time.perf_counter() - started
+
+    at = AppTest.from_file(os.path.join(SRC, "app.py"), default_timeout=300)
+    start = time.perf_counter()
+    at.run()
+    first = time.perf_counter() - start
+    assert not at.exception, at.exception
+
+    # Atualizações ao vivo: um lote novo no store a cada execução
+    cpu = []
+    for k in range(updates):
+        writer.write_samples(make_samples(rows + k * 100, 100))
+        writer.flush()
+        time.sleep(0.06)  # intervalo mínimo do feed
+        start = time.process_time()
+        at.run()
+        cpu.append(time.process_time() - start)
+
+    # Sem dados novos: os gráficos saem do cache
+    idle = []
+    for _ in range(max(updates, 1)):
+        start = time.process_time()
+        at.run()
+        idle.append(time.process_time() - start)
+    writer.close()
+
+    print(json.dumps({
+        "cold": setup + first,
+        "first_run": first,
+        "rerun_cpu": sorted(cpu)[len(cpu) // 2] if cpu else float("nan"),
+        "idle_cpu": sorted(idle)[len(idle) // 2],
+    }))
+
+
+def run_mode(lazy, rows, updates):
+    env = dict(os.environ, TELEMETRIA_LAZY_TABS="1" if lazy else "0")
+    out = subprocess.run([sys.executable, __file__, "--worker", str(rows), str(updates)],
+                         env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    updates = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    print(f"Store: {rows} linhas, {updates} atualizações")
+    print(f"{'modo':<12} {'partida':>9} {'1ª exec.':>9} {'CPU/atual.':>11} {'CPU ociosa':>11}")
+    for lazy in (False, True):
+        r = run_mode(lazy, rows, updates)
+        name = "preguiçoso" if lazy else "completo"
+        print(f"{name:<12} {r['cold']:>8.2f}s {r['first_run']:>8.2f}s {r['rerun_cpu'] * 1e3:>9.0f}ms "
+              f"{r['idle_cpu'] * 1e3:>9.0f}ms")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        worker(int(sys.argv[2]), int(sys.argv[3]))
+    else:
+        main()
@@ -6,6 +6,7 @@ import threading
 import psutil
 import signal
 import socket
+import shutil
 from datetime import datetime
 
 # ======== Configurações Globais ========
@@ -13,6 +14,7 @@ PORT_UDP = 5555
 DASHBOARD_PORT = 8501
 DATA_DIR = "data"
 CSV_PATH = os.path.join(DATA_DIR, "dados.csv")
+STORE_PATH = os.path.join(DATA_DIR, "telemetria")
 STATUS_UPDATE_INTERVAL = 30  # segundos entre atualizações de status
 
 # ======== Funções Utilitárias ========
@@ -37,7 +39,7 @@ def wait_for_port(port: int, timeout: int = 10):
     return False
 
 def clean_data_directory():
-    """Remove o CSV anterior e garante diretório de dados"""
+    """Remove o CSV e o store anteriores e garante diretório de dados"""
     print(f"[{timestamp()}] [SISTEMA] Preparando ambiente para novo lançamento...")
     if os.path.exists(CSV_PATH):
         try:
@@ -45,6 +47,12 @@ def clean_data_directory():
             print(f"[{timestamp()}] [SISTEMA] Arquivo anterior removido: {CSV_PATH}")
         except Exception as e:
             print(f"[{timestamp()}] [ERRO] Falha ao remover arquivo: {str(e)}")
+    if os.path.exists(STORE_PATH):
+        try:
+            shutil.rmtree(STORE_PATH)
+            print(f"[{timestamp()}] [SISTEMA] Store anterior removido: {STORE_PATH}")
+        except Exception as e:
+            print(f"[{timestamp()}] [ERRO] Falha ao remover store: {str(e)}")
     os.makedirs(DATA_DIR, exist_ok=True)
 
 def print_status(processes):
@@ -1,65 +1,313 @@
-import pandas as pd
-import numpy as np
+import argparse
+import contextlib
+import json
 import os
-import matplotlib.pyplot as plt
-from geopy.distance import geodesic
+import sys
+import time
 
-# Caminho do CSV
+from core.store import TelemetryStore, store_exists, CSV_COLUMNS
+from core.fast_parser import parse_csv_chunk, ParseStats
+from core.query import TelemetryQuery, UnsortedTimeError
+from core.flights import END_REASONS
+from core.tail import CSVTailer, tail_fingerprint
+from core.analysis import (FlightAnalysis, save_plot, load_state, save_state, json_safe,
+                           ANALYSIS_VERSION, CHUNK_ROWS, CSV_CHUNK_BYTES, CSV_MAX_LINE_BYTES)
+
+# Caminhos do store colunar (principal) e do CSV (legado)
 dir_path = os.path.dirname(os.path.abspath(__file__))
+store_path = os.path.join(dir_path, "..", "data", "telemetria")
 csv_path = os.path.join(dir_path, "..", "data", "dados.csv")
+flights_dir = os.path.join(dir_path, "..", "data", "voos")
+state_path = os.path.join(dir_path, "..", "data", "analise_estado.npz")
+
+
+# Subcomandos (com os nomes em inglês como apelidos); sem subcomando = resumo + gráfico
+COMMANDS = {"resumo": ["summary"], "grafico": ["plot"], "exportar": ["export"]}
+
+
+def add_selection_args(parser, defaults=True):
+    """Opções de seleção/análise; nos subcomandos sem padrão, para não sobrescrever as globais"""
+    default = (lambda value: value) if defaults else (lambda value: argparse.SUPPRESS)
+    parser.add_argument("--voo", type=int, default=default(None), help="Analisa só o voo K (0 = primeiro, -1 = último; padrão: último)")
+    parser.add_argument("--todos", action="store_true", default=default(False), help="Analisa o arquivo inteiro, sem separar voos")
+    parser.add_argument("--desde", type=float, default=default(None), help="Início da janela (s desde a primeira amostra)")
+    parser.add_argument("--ate", type=float, default=default(None), help="Fim da janela (s desde a primeira amostra)")
+    parser.add_argument("--bloco", type=int, default=default(CHUNK_ROWS), help="Linhas por bloco (memória limitada, independente do tamanho do arquivo)")
+    parser.add_argument("--sem-estado", action="store_true", default=default(False), help="Recalcula do zero, sem retomar data/analise_estado.npz")
+
+
+def add_batch_args(parser, defaults=True):
+    default = (lambda value: value) if defaults else (lambda value: argparse.SUPPRESS)
+    parser.add_argument("--lote", action="store_true", default=default(False), help="Analisa todos os voos em paralelo (resumo e gráficos em data/voos)")
+    parser.add_argument("--processos", type=int, default=default(None), help="Processos do modo lote (padrão: núcleos da máquina)")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Análise do voo a partir do store (ou do CSV legado)")
+    add_selection_args(parser)
+    add_batch_args(parser)
+    parser.add_argument("--json", action="store_true", help="Resultado em JSON na saída padrão (mensagens vão para stderr)")
+    parser.add_argument("--saida", default=None, help="Arquivo gerado por grafico/exportar")
+    commands = parser.add_subparsers(dest="comando", metavar="{" + ",".join(COMMANDS) + "}")
+
+    summary = commands.add_parser("resumo", aliases=COMMANDS["resumo"], help="Métricas do voo (sem gráfico)")
+    plot = commands.add_parser("grafico", aliases=COMMANDS["grafico"], help="Gráfico de altitude e velocidade (PNG)")
+    export = commands.add_parser("exportar", aliases=COMMANDS["exportar"], help="Métricas e séries reduzidas em JSON")
+    for sub in (summary, plot, export):
+        add_selection_args(sub, defaults=False)
+        sub.add_argument("--json", action="store_true", default=argparse.SUPPRESS, help="Resultado em JSON na saída padrão")
+    add_batch_args(summary, defaults=False)
+    plot.add_argument("--saida", default=argparse.SUPPRESS, help="PNG de saída (padrão: data/analise_voo.png)")
+    export.add_argument("--saida", default=argparse.SUPPRESS, help="JSON de saída (padrão: data/analise_voo.json; '-' = saída padrão)")
+
+    args = parser.parse_args(argv)
+    # Apelido em inglês -> nome do subcomando
+    args.comando = next((name for name, aliases in COMMANDS.items() if args.comando in [name] + aliases), None)
+    return args
+
+
+def store_chunks(store, start, stop, rows):
+    """Blocos de colunas do store (views mapeadas, sem cópia)"""
+    columns = CSV_COLUMNS + [c for c in ['t_rx_ns'] if c in store.names]
+    for begin in range(start, stop, rows):
+        yield store.read(begin, min(begin + rows, stop), columns)
+
+
+def csv_chunks(path, rows, stats, tailer=None):
+    """Blocos do CSV legado, só com linhas completas (a partir do offset do `tailer`).
+
+    Só termina quando a leitura alcança o fim do arquivo (sobra no máximo uma
+    linha parcial); um bloco sem linha completa no meio é relido com o dobro de bytes.
+    """
+    tailer = tailer or CSVTailer(path)
+    max_bytes = max(CSV_CHUNK_BYTES * rows // CHUNK_ROWS, CSV_MAX_LINE_BYTES)
+    while True:
+        before = tailer.offset
+        chunk, _ = tailer.read_new(max_bytes=max_bytes)
+        if chunk:
+            data = parse_csv_chunk(chunk, stats=stats)
+            yield dict(zip(CSV_COLUMNS, data.T))
+        elif tailer.offset == before:
+            if os.path.getsize(path) - tailer.offset <= max_bytes:
+                return
+            max_bytes *= 2
+
+
+def select_rows(args, store):
+    """Linhas [início, fim) pedidas: voo (padrão: o último), janela de tempo ou tudo"""
+    # Só as linhas da janela pedida são lidas (índice de tempo do store)
+    query = TelemetryQuery(store)
+    start, stop = 0, store.rows
+    windowed = args.desde is not None or args.ate is not None
+    flights = query.flight_table() if not args.todos and not windowed else []
+    if len(flights) > 1:
+        # Voos do índice gravado na ingestão: sem --voo, o último
+        print(f"Voos no store: {len(flights)}")
+        for k, f in enumerate(flights):
+            print(f"  [{k}] linhas {f['start_row']}-{f['stop_row']} | "
+                  f"{(f['t_end_ns'] - f['t_start_ns']) / 1e9:.1f} s | apogeu {f['max_alt']:.1f} m | "
+                  f"fim: {END_REASONS[int(f['end_reason'])]}")
+    if args.voo is not None or len(flights) > 1:
+        k = -1 if args.voo is None else args.voo
+        if not -len(flights) <= k < len(flights):
+            print(f"Voo {k} não existe ({len(flights)} voos no store).")
+            return None
+        print(f"Analisando o voo {k % len(flights)} (--todos para o arquivo inteiro)")
+        return int(flights[k]['start_row']), int(flights[k]['stop_row'])
+    if windowed:
+        try:
+            bounds = query.bounds()
+        except UnsortedTimeError as e:
+            print(f"{e}.")
+            return None
+        if bounds is None:
+            print("Amostras sem carimbo de tempo: --desde/--ate indisponíveis (use --voo ou --todos).")
+            return None
+        t0 = bounds[0]
+        return query.rows_between(
+            None if args.desde is None else t0 + int(args.desde * 1e9),
+            None if args.ate is None else t0 + int(args.ate * 1e9),
+        )
+    return start, stop
+
+
+def run_batch(args):
+    """Modo lote: um processo por voo, resumo em tabela e cache dos voos inalterados"""
+    from core.batch import analyze_all, SUMMARY_FILE
+
+    if not store_exists(store_path):
+        print("Modo lote precisa do store (data/telemetria).")
+        return 1
+    started = time.perf_counter()
+    rows, computed = analyze_all(store_path, flights_dir, args.processos, max(1, args.bloco))
+    elapsed = time.perf_counter() - started
+    if args.json:
+        emit_json({"voos": rows, "recalculados": computed, "segundos": elapsed}, args.stdout)
+        return 0
+
+    print(f"\n=== Análise de {len(rows)} voos ===")
+    print(f"{'voo':>4} {'início':<20} {'linhas':>9} {'duração':>9} {'apogeu':>9} {'t apogeu':>9} "
+          f"{'vel máx':>9} {'acc máx':>9} {'alcance':>10} {'trajeto':>10} {'fim':<12}")
+    for r in rows:
+        print(f"{r['voo']:>4} {r['inicio']:<20} {r['linhas']:>9} {r['duracao_s']:>8.1f}s {r['apogeu_m']:>8.1f}m "
+              f"{r['t_apogeu_s']:>8.1f}s {r['vel_max_ms']:>7.1f}m/s {r['acc_max_ms2']:>6.1f}m/s² "
+              f"{r['alcance_m']:>9.1f}m {r['trajeto_m']:>9.1f}m {r['fim']:<12}")
+    print(f"\n{computed} voos analisados, {len(rows) - computed} do cache, em {elapsed:.2f} s")
+    print(f"Resumo salvo em data/voos/{SUMMARY_FILE} (gráficos em data/voos/voo_NNN.png)")
+    return 0
+
+
+def resume(args, key, offset_ok):
+    """Análise salva para `key` se ainda vale para o arquivo atual: (análise, offset) ou (nova, None)"""
+    saved = None if args.sem_estado else load_state(state_path, key)
+    if saved is not None and offset_ok(*saved[1:]):
+        return saved[:2]
+    return FlightAnalysis(), None
+
+
+def analyze(args):
+    """Analisa a seleção pedida em blocos, retomando o estado salvo: (análise, linhas novas, s) ou None"""
+    # Estado incremental: só vale para seleções que crescem pelo fim (não para janelas)
+    incremental = args.desde is None and args.ate is None
+    stats = None
+    if store_exists(store_path):
+        store = TelemetryStore(store_path)
+        selection = select_rows(args, store)
+        if selection is None:
+            return None
+        start, stop = selection
+        # Store recriado (modo teste) muda created_ns; linhas a menos = truncado
+        key = {"origem": "store", "criado_ns": store.created_ns, "inicio": start}
+        analysis, offset = FlightAnalysis(), None
+        if incremental:
+            analysis, offset = resume(args, key, lambda offset, _: start <= offset <= stop)
+        chunks = store_chunks(store, start if offset is None else offset, stop, max(1, args.bloco))
+        position = lambda: stop
+        check = lambda: None
+    elif os.path.exists(csv_path):
+        stats = ParseStats()
+        stat = os.stat(csv_path)
+        # Arquivo trocado muda o inode; reescrito no lugar (run--teste) muda o trecho antes do offset
+        key = {"origem": "csv", "arquivo": [stat.st_dev, stat.st_ino]}
+        analysis, offset = resume(args, key, lambda offset, fingerprint: offset <= stat.st_size
+                                  and tail_fingerprint(csv_path, offset) == fingerprint)
+        tailer = CSVTailer(csv_path)
+        tailer.offset = offset or 0
+        chunks = csv_chunks(csv_path, max(1, args.bloco), stats, tailer)
+        position = lambda: tailer.offset
+        check = lambda: tail_fingerprint(csv_path, tailer.offset)
+    else:
+        print("Arquivo de dados não encontrado.")
+        return None
+    if offset is not None:
+        print(f"Estado anterior retomado: {analysis.rows} linhas já analisadas (--sem-estado recalcula tudo)")
+
+    # Análise em blocos: memória limitada pelo bloco, estado carregado entre eles
+    rows_before = analysis.rows
+    started = time.perf_counter()
+    for cols in chunks:
+        analysis.update(cols['lat'], cols['lon'], cols['alt'], cols['vel'], cols.get('t_rx_ns'))
+    elapsed = time.perf_counter() - started
+    if incremental and analysis.rows:
+        save_state(analysis, state_path, key, position(), check())
+    if stats is not None and stats.malformed:
+        print(f"Linhas malformadas descartadas: {stats.malformed}")
+
+    if not analysis.rows:
+        print("Nenhum dado para analisar.")
+        return None
+    return analysis, analysis.rows - rows_before, elapsed
+
+
+# ======== Saídas ========
+
+def emit_json(payload, out):
+    """JSON estrito: NaN/inf viram null"""
+    json.dump(json_safe(payload), out, ensure_ascii=False, indent=2)
+    out.write("\n")
+
+
+def shown(path):
+    """Caminho curto para as mensagens (relativo à pasta atual quando está dentro dela)"""
+    relative = os.path.relpath(path)
+    return os.path.normpath(path) if relative.startswith("..") else relative
+
+
+def print_summary(analysis, new_rows, elapsed):
+    summary = analysis.summary()
+    print("\n=== Análise do Voo ===")
+    print(f"Altitude Máxima: {summary['apogeu_m']:.2f} m")
+    print(f"Velocidade Máxima: {summary['vel_max_ms']:.2f} m/s")
+    print(f"Aceleração Máxima: {summary['acc_max_ms2']:.2f} m/s²")
+    print(f"Duração do voo: {summary['duracao_s']:.1f} s")
+    print(f"Distância horizontal: {summary['alcance_m']:.2f} m")
+    print(f"Trajeto no solo: {summary['trajeto_m']:.2f} m")
+    print(f"Pico de velocidade em t={summary['t_vel_max_s']:.1f}s")
+    print(f"Processadas {new_rows} linhas novas em {elapsed:.2f} s ({new_rows / max(elapsed, 1e-9):,.0f} linhas/s)")
+
+
+def report(analysis, new_rows, elapsed, **extra):
+    return dict({"resumo": analysis.summary(), "linhas_novas": new_rows, "segundos": elapsed}, **extra)
+
+
+def plot(args, analysis):
+    """Gráficos de análise (séries reduzidas por mín/máx: apogeu e picos preservados)"""
+    path = args.saida or os.path.join(dir_path, "..", "data", "analise_voo.png")
+    save_plot(analysis, path)
+    return path
+
+
+def export(args, analysis, new_rows, elapsed):
+    """Métricas e séries reduzidas (tempo em s desde a primeira amostra) num JSON"""
+    path = args.saida or os.path.join(dir_path, "..", "data", "analise_voo.json")
+    payload = report(analysis, new_rows, elapsed, versao=ANALYSIS_VERSION, series={
+        "altitude": {"t_s": analysis.alt_plot.x.tolist(), "m": analysis.alt_plot.y.tolist()},
+        "velocidade": {"t_s": analysis.vel_plot.x.tolist(), "ms": analysis.vel_plot.y.tolist()},
+    })
+    if path == "-":
+        emit_json(payload, args.stdout)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            emit_json(payload, f)
+    return path
+
+
+# ======== Subcomandos ========
+
+def run(args):
+    """Executa o subcomando; retorna o código de saída (1 = nada analisado)"""
+    if args.lote and args.comando in (None, "resumo"):
+        return run_batch(args)
+    result = analyze(args)
+    if result is None:
+        return 1
+    analysis, new_rows, elapsed = result
+
+    if args.comando == "exportar":
+        path = export(args, analysis, new_rows, elapsed)
+        if path != "-":
+            print(f"Análise exportada para {shown(path)}")
+        return 0
+    path = plot(args, analysis) if args.comando in (None, "grafico") else None
+    if args.json:
+        emit_json(report(analysis, new_rows, elapsed, grafico=path and shown(path)), args.stdout)
+        return 0
+    if args.comando != "grafico":
+        print_summary(analysis, new_rows, elapsed)
+    if path:
+        print(f"\nGráfico de análise salvo em {shown(path)}")
+    return 0
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    args.stdout = sys.stdout
+    if args.json or args.saida == "-":
+        # Saída padrão só com o JSON; mensagens de progresso vão para stderr
+        with contextlib.redirect_stdout(sys.stderr):
+            return run(args)
+    return run(args)
+
 
-if not os.path.exists(csv_path):
-    print("Arquivo de dados não encontrado.")
-    exit()
-
-df = pd.read_csv(csv_path)
-
-if df.empty:
-    print("Nenhum dado para analisar.")
-    exit()
-
-# Métricas básicas
-alt_max = df['alt'].max()
-vel_max = df['vel'].max()
-duracao = len(df) * 0.1  # supondo 0.1s por amostra
-
-# Encontra o pico de velocidade
-pico_velocidade = df['vel'].idxmax()
-
-# Calcula aceleração
-df['acc'] = df['vel'].diff() / 0.1  # derivada da velocidade
-acc_max = df['acc'].max()
-
-# Distância percorrida (horizontal)
-pos_inicial = (df.iloc[0]['lat'], df.iloc[0]['lon'])
-pos_final = (df.iloc[-1]['lat'], df.iloc[-1]['lon'])
-distancia = geodesic(pos_inicial, pos_final).meters
-
-print("\n=== Análise do Voo ===")
-print(f"Altitude Máxima: {alt_max:.2f} m")
-print(f"Velocidade Máxima: {vel_max:.2f} m/s")
-print(f"Aceleração Máxima: {acc_max:.2f} m/s²")
-print(f"Duração do voo: {duracao:.1f} s")
-print(f"Distância horizontal: {distancia:.2f} m")
-print(f"Pico de velocidade em t={pico_velocidade*0.1:.1f}s")
-
-# Gera gráficos de análise
-plt.figure(figsize=(12, 8))
-
-plt.subplot(2, 1, 1)
-plt.plot(df.index*0.1, df['alt'], 'g-')
-plt.title('Altitude vs Tempo')
-plt.xlabel('Tempo (s)')
-plt.ylabel('Altitude (m)')
-plt.grid(True)
-
-plt.subplot(2, 1, 2)
-plt.plot(df.index*0.1, df['vel'], 'b-')
-plt.title('Velocidade vs Tempo')
-plt.xlabel('Tempo (s)')
-plt.ylabel('Velocidade (m/s)')
-plt.grid(True)
-
-plt.tight_layout()
-plt.savefig(os.path.join(dir_path, "..", "data", "analise_voo.png"))
-print("\nGráfico de análise salvo em data/analise_voo.png")
\ No newline at end of file
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,18 +2,15 @@
 import streamlit as st
 import pandas as pd
 import os
-import time
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import plotly.graph_objs as go
-import numpy as np
 from datetime import datetime, timedelta
 
 # Importações de módulos locais
 from styles import load_css
 from components.sidebar import render_sidebar
-from components.charts import plot_altitude, plot_velocity, plot_acceleration, plot_3d_trajectory, plot_2d_trajectory
-from components.data_loader import load_data_incremental, process_data
+from components.charts import plot_altitude, plot_velocity, plot_acceleration, plot_3d_trajectory, plot_2d_trajectory, render_times
+from components.data_loader import load_data_incremental, init_session_data, get_dataframe, get_metrics, per_version, REFRESH_INTERVAL
+from components.data_loader import EXPORT_MIME, EXPORT_LABELS, MAX_EXPORT_MB, export_time_bounds, export_sizes, export_allowed, build_export
+from components.data_loader import LAST_WINDOWS, time_span, time_order_error, flight_table, window_frame
 
 # ==============
 # CONFIGURAÇÕES
@@ -25,35 +22,36 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Modo preguiçoso: só a aba selecionada é calculada (TELEMETRIA_LAZY_TABS=0 desliga)
+LAZY_TABS = os.environ.get("TELEMETRIA_LAZY_TABS", "1") != "0"
+
 # Carregar estilos CSS
 load_css()
 
+def window_label(option, flights=()):
+    """Rótulo de uma opção do seletor de janela de tempo (voos com apogeu e duração do índice)"""
+    kind, _, value = option.partition(":")
+    if kind == "last":
+        return f"Últimos {value} s"
+    if kind == "flight":
+        k = int(value)
+        label = f"Voo {k + 1}"
+        if k < len(flights) and pd.notna(flights[k]['max_alt']):
+            duration = (flights[k]['t_end_ns'] - flights[k]['t_start_ns']) / 1e9
+            label += f" · apogeu {flights[k]['max_alt']:.0f} m · {duration:.0f} s"
+        return label
+    return {"all": "Todo o histórico", "range": "Intervalo..."}[kind]
+
 # ==============================
 # ESTADO PARA LEITURA INCREMENTAL
 # ==============================
-if 'df' not in st.session_state:
-    st.session_state.df = pd.DataFrame(columns=['lat','lon','alt','vel','timestamp'])
-    st.session_state.last_size = 0
-    st.session_state.last_update = time.time()
-
-# ======================
-# ATUALIZAÇÃO DE DADOS
-# ======================
-load_data_incremental()
-df = st.session_state.df
-processed_df = process_data(df) if not df.empty else df
+if 'data_version' not in st.session_state:
+    init_session_data()
 
 # ======================
 # BARRA LATERAL
 # ======================
-render_sidebar()
-
-# Contador de atualização
-st.markdown(f"""
-<div class="update-counter">
-    <span>⏱️</span> Última atualização: {datetime.now().strftime('%H:%M:%S.%f')[:-3]} | Dados: {len(df)} pontos
-</div>
-""", unsafe_allow_html=True)
+render_sidebar(REFRESH_INTERVAL)
 
 # ======================
 # CONTEÚDO PRINCIPAL
@@ -62,135 +60,221 @@ st.title("🚀 Telemetria Foguete PET")
 st.caption("Monitoramento em tempo real do voo do foguete PET-01")
 
 # ======================
-# SEÇÃO DE STATUS
+# REGIÕES AO VIVO
 # ======================
-if not df.empty:
-    st.markdown('<div class="section-header">Status do Voo</div>', unsafe_allow_html=True)
+# Só este fragmento é reexecutado a cada REFRESH_INTERVAL; o trabalho pesado
+# (consultas ao store, gráficos, exportação) só é refeito quando o feed publica
+# uma versão nova: sem dados novos, o tique só reemite os elementos em cache.
+@st.fragment(run_every=REFRESH_INTERVAL)
+def live_dashboard():
+    # ======================
+    # ATUALIZAÇÃO DE DADOS
+    # ======================
+    load_data_incremental()
+    df = per_version('frame', get_dataframe)
+    metrics = get_metrics()
+
+    # Contador de atualização
+    st.markdown(f"""
+    <div class="update-counter">
+        <span>⏱️</span> Última atualização: {datetime.now().strftime('%H:%M:%S.%f')[:-3]} | Dados: {len(df)} pontos{f" | Descartadas: {st.session_state.malformed_rows}" if st.session_state.get('malformed_rows') else ""} | Render: {sum(render_times().values()):.0f} ms
+    </div>
+    """, unsafe_allow_html=True)
+
+    # ======================
+    # SEÇÃO DE STATUS
+    # ======================
+    if not df.empty:
+        st.markdown('<div class="section-header">Status do Voo</div>', unsafe_allow_html=True)
     
-    max_alt = df.alt.max()
-    max_vel = df.vel.max()
-    duration = len(df) * 0.1
-    current_alt = df.alt.iloc[-1]
-    current_vel = df.vel.iloc[-1]
+        # Valores mantidos em streaming pelo feed: nenhuma passada sobre o histórico
+        max_alt = metrics['max_alt']
+        max_vel = metrics['max_vel']
+        duration = metrics['duration']
+        current_alt = metrics['alt']
+        current_vel = metrics['vel']
     
-    col1, col2, col3, col4 = st.columns(4)
+        col1, col2, col3, col4 = st.columns(4)
     
-    with col1:
-        st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-title">ALTITUDE ATUAL</div>
-            <div class="metric-value">{current_alt:.1f} <span class="metric-unit">m</span></div>
-            <div class="metric-detail">Máx: {max_alt:.1f} m</div>
-        </div>
-        """, unsafe_allow_html=True)
+        with col1:
+            st.markdown(f"""
+            <div class="metric-card">
+                <div class="metric-title">ALTITUDE ATUAL</div>
+                <div class="metric-value">{current_alt:.1f} <span class="metric-unit">m</span></div>
+                <div class="metric-detail">Máx: {max_alt:.1f} m | Suavizada: {metrics['alt_ewma']:.1f} m</div>
+            </div>
+            """, unsafe_allow_html=True)
     
-    with col2:
-        st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-title">VELOCIDADE ATUAL</div>
-            <div class="metric-value">{abs(current_vel):.1f} <span class="metric-unit">m/s</span></div>
-            <div class="metric-detail">Máx: {max_vel:.1f} m/s</div>
-        </div>
-        """, unsafe_allow_html=True)
+        with col2:
+            st.markdown(f"""
+            <div class="metric-card">
+                <div class="metric-title">VELOCIDADE ATUAL</div>
+                <div class="metric-value">{abs(current_vel):.1f} <span class="metric-unit">m/s</span></div>
+                <div class="metric-detail">Máx: {max_vel:.1f} m/s</div>
+            </div>
+            """, unsafe_allow_html=True)
     
-    with col3:
-        st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-title">DURAÇÃO DO VOO</div>
-            <div class="metric-value">{duration:.1f} <span class="metric-unit">s</span></div>
-            <div class="metric-detail">Fase: {'DESCIDA' if current_vel < 0 else 'SUBIDA'}</div>
-        </div>
-        """, unsafe_allow_html=True)
+        with col3:
+            st.markdown(f"""
+            <div class="metric-card">
+                <div class="metric-title">DURAÇÃO DO VOO</div>
+                <div class="metric-value">{duration:.1f} <span class="metric-unit">s</span></div>
+                <div class="metric-detail">Fase: {metrics['phase']}</div>
+            </div>
+            """, unsafe_allow_html=True)
     
-    with col4:
-        last_time = df.timestamp.iloc[-1].strftime('%H:%M:%S') if not df.empty else '--:--:--'
-        st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-title">DADOS RECEBIDOS</div>
-            <div class="metric-value">{len(df)} <span class="metric-unit">pontos</span></div>
-            <div class="metric-detail">Último: {last_time}</div>
-        </div>
-        """, unsafe_allow_html=True)
-else:
-    st.warning("Aguardando dados do foguete...", icon="⏳")
-
-st.markdown('<div style="height: 20px;"></div>', unsafe_allow_html=True)
+        with col4:
+            last_time = df.timestamp.iloc[-1].strftime('%H:%M:%S') if not df.empty else '--:--:--'
+            st.markdown(f"""
+            <div class="metric-card">
+                <div class="metric-title">DADOS RECEBIDOS</div>
+                <div class="metric-value">{metrics['count']} <span class="metric-unit">pontos</span></div>
+                <div class="metric-detail">Último: {last_time}</div>
+            </div>
+            """, unsafe_allow_html=True)
+    else:
+        st.warning("Aguardando dados do foguete...", icon="⏳")
 
-# ======================
-# SEÇÕES EM ABAS
-# ======================
-tab1, tab2, tab3, tab4 = st.tabs([
-    "📊 GRÁFICOS PRINCIPAIS", 
-    "🌌 TRAJETÓRIA 3D", 
-    "🗺️ TRAJETÓRIA 2D", 
-    "📋 DADOS BRUTOS"
-])
-
-with tab1:
+    st.markdown('<div style="height: 20px;"></div>', unsafe_allow_html=True)
+
+    # ======================
+    # JANELA DE TEMPO
+    # ======================
+    # Janelas consultadas pelo índice de tempo do store: só as linhas da janela são lidas
+    viewport = None
+    view_df = df
     if not df.empty:
-        st.markdown('<div class="tab-section-title">Dados de Voo</div>', unsafe_allow_html=True)
+        options = ["all"] + [f"last:{s}" for s in LAST_WINDOWS] + ["range"]
+        order_error = per_version('order_error', time_order_error)
+        if order_error:
+            # Carimbos fora de ordem: sem janelas por tempo, só o histórico inteiro e os voos
+            st.error(order_error, icon="⚠️")
+            options = ["all"]
+        flights = per_version('flights', flight_table)
+        if len(flights) > 1:
+            options += [f"flight:{k}" for k in range(len(flights))]
+        col1, col2 = st.columns([0.3, 0.7])
+        choice = col1.selectbox("Janela de tempo", options, key="janela",
+                                format_func=lambda option: window_label(option, flights))
+        kind, _, value = choice.partition(":")
+        if kind == "last":
+            window = ("last", int(value))
+        elif kind == "flight":
+            window = ("flight", int(value))
+        elif kind == "range":
+            span = max(per_version('span', time_span), 0.1)
+            selected = col2.slider("Intervalo (s desde o início)", 0.0, span, (0.0, span),
+                                   step=0.1, key="janela_intervalo")
+            window = ("range", *selected)
+        else:
+            window = None
+        if window is not None:
+            view_df, rows = per_version('window', window_frame, window)
+            viewport = (window, rows)
+
+    # ======================
+    # SEÇÕES EM ABAS
+    # ======================
+    tab1, tab2, tab3, tab4 = st.tabs([
+        "📊 GRÁFICOS PRINCIPAIS", 
+        "🌌 TRAJETÓRIA 3D", 
+        "🗺️ TRAJETÓRIA 2D", 
+        "📋 DADOS BRUTOS"
+    ], key="aba_ativa", on_change="rerun" if LAZY_TABS else "ignore")
+
+    with tab1:
+        if tab1.open is not False:  # None = sem rastreio (modo completo)
+            if not view_df.empty:
+                st.markdown('<div class="tab-section-title">Dados de Voo</div>', unsafe_allow_html=True)
         
-        col1, col2 = st.columns(2)
+                col1, col2 = st.columns(2)
         
-        with col1:
-            st.markdown('<div class="chart-title">Altitude vs Tempo</div>', unsafe_allow_html=True)
-            plot_altitude(df)
+                with col1:
+                    st.markdown('<div class="chart-title">Altitude vs Tempo</div>', unsafe_allow_html=True)
+                    plot_altitude(view_df, viewport)
         
-        with col2:
-            st.markdown('<div class="chart-title">Velocidade vs Tempo</div>', unsafe_allow_html=True)
-            plot_velocity(df)
+                with col2:
+                    st.markdown('<div class="chart-title">Velocidade vs Tempo</div>', unsafe_allow_html=True)
+                    plot_velocity(view_df, viewport)
         
-        st.markdown('<div class="tab-section-title">Aceleração vs Tempo</div>', unsafe_allow_html=True)
-        if len(df) > 1:
-            st.markdown('<div class="chart-title">Aceleração (m/s²)</div>', unsafe_allow_html=True)
-            plot_acceleration(df)
-        else:
-            st.info("Aguardando dados suficientes para calcular aceleração", icon="ℹ️")
-    else:
-        st.info("Aguardando dados para exibir gráficos", icon="📊")
+                st.markdown('<div class="tab-section-title">Aceleração vs Tempo</div>', unsafe_allow_html=True)
+                if len(view_df) > 1:
+                    st.markdown('<div class="chart-title">Aceleração (m/s²)</div>', unsafe_allow_html=True)
+                    plot_acceleration(view_df, viewport)
+                else:
+                    st.info("Aguardando dados suficientes para calcular aceleração", icon="ℹ️")
+            else:
+                st.info("Aguardando dados para exibir gráficos", icon="📊")
 
-with tab2:
-    st.markdown('<div class="tab-section-title">TRAJETÓRIA DO FOGUETE PET</div>', unsafe_allow_html=True)
-    if len(df) > 1:
-        plot_3d_trajectory(df)
-    else:
-        st.info("AGUARDANDO DADOS PARA VISUALIZAÇÃO DA TRAJETÓRIA", icon="📡")
+    with tab2:
+        if tab2.open is not False:
+            st.markdown('<div class="tab-section-title">TRAJETÓRIA DO FOGUETE PET</div>', unsafe_allow_html=True)
+            if len(view_df) > 1:
+                plot_3d_trajectory(view_df, viewport)
+            else:
+                st.info("AGUARDANDO DADOS PARA VISUALIZAÇÃO DA TRAJETÓRIA", icon="📡")
         
-with tab3:
-    st.markdown('<div class="tab-section-title">Trajetória com Gradiente de Altitude</div>', unsafe_allow_html=True)
-    if len(df) > 1:
-        plot_2d_trajectory(df)
-    else:
-        st.info("Aguardando dados suficientes para renderizar trajetória", icon="🗺️")
+    with tab3:
+        if tab3.open is not False:
+            st.markdown('<div class="tab-section-title">Trajetória com Gradiente de Altitude</div>', unsafe_allow_html=True)
+            if len(view_df) > 1:
+                plot_2d_trajectory(view_df, viewport)
+            else:
+                st.info("Aguardando dados suficientes para renderizar trajetória", icon="🗺️")
 
-with tab4:
-    st.markdown('<div class="tab-section-title">Telemetria Bruta</div>', unsafe_allow_html=True)
-    st.caption("Últimas 10 leituras recebidas")
+    with tab4:
+        if tab4.open is not False:
+            st.markdown('<div class="tab-section-title">Telemetria Bruta</div>', unsafe_allow_html=True)
+            st.caption("Últimas 10 leituras da janela selecionada")
 
-    if not df.empty:
-        df_display = df.tail(10).copy()
-        df_display['timestamp'] = df_display['timestamp'].dt.strftime('%H:%M:%S.%f')[:-3]
-        df_display = df_display[['timestamp', 'lat', 'lon', 'alt', 'vel']]
-        df_display.columns = ['Timestamp', 'Latitude', 'Longitude', 'Altitude (m)', 'Velocidade (m/s)']
+            if not df.empty:
+                if not view_df.empty:
+                    df_display = view_df.tail(10).copy()
+                    df_display['timestamp'] = df_display['timestamp'].dt.strftime('%H:%M:%S.%f')[:-3]
+                    df_display = df_display[['timestamp', 'lat', 'lon', 'alt', 'vel']]
+                    df_display.columns = ['Timestamp', 'Latitude', 'Longitude', 'Altitude (m)', 'Velocidade (m/s)']
+            
+                    st.dataframe(
+                        df_display.style
+                        .background_gradient(subset=['Altitude (m)'], cmap='Blues')
+                        .background_gradient(subset=['Velocidade (m/s)'], cmap='Reds'),
+                        height=300,
+                        use_container_width=True
+                    )
+                else:
+                    st.info("Nenhuma leitura na janela selecionada", icon="📋")
         
-        st.dataframe(
-            df_display.style
-            .background_gradient(subset=['Altitude (m)'], cmap='Blues')
-            .background_gradient(subset=['Velocidade (m/s)'], cmap='Reds'),
-            height=300,
-            use_container_width=True
-        )
-        
-        csv = df.to_csv(index=False).encode('utf-8')
-        st.download_button(
-            label="📥 Exportar dados completos",
-            data=csv,
-            file_name=f"telemetria_pet_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-            mime='text/csv',
-            use_container_width=True
-        )
-    else:
-        st.info("Aguardando dados do foguete...", icon="📋")
+                # Exportação montada só no clique, em blocos a partir do store; o download
+                # passa inteiro pela memória, então formatos acima do teto ficam de fora
+                col1, col2 = st.columns([0.3, 0.7])
+                start_ns = stop_ns = None
+                bounds = per_version('export_bounds', export_time_bounds)
+                if bounds and not col2.toggle("Todo o histórico", value=True, key="export_all"):
+                    duration = max((bounds[1] - bounds[0]) / 1e9, 0.1)
+                    selected = st.slider("Intervalo (s desde o início)", 0.0, duration, (0.0, duration),
+                                         step=0.1, key="export_range")
+                    start_ns = bounds[0] + int(selected[0] * 1e9)
+                    stop_ns = bounds[0] + int(selected[1] * 1e9)
+                sizes = per_version('export_sizes', export_sizes, start_ns, stop_ns)
+                allowed = export_allowed(sizes)
+                if len(allowed) < len(EXPORT_MIME):
+                    st.info(f"Exportações acima de {MAX_EXPORT_MB:g} MB não são geradas pelo dashboard "
+                            f"(o arquivo inteiro ficaria na memória). Para o arquivo completo em disco: "
+                            f"`make export` ou `python src/exportar.py --formato csv.gz`.", icon="💾")
+                if allowed:
+                    fmt = col1.selectbox("Formato", allowed, key="export_format",
+                                         format_func=lambda f: f"{EXPORT_LABELS[f]} (~{sizes[f] / (1 << 20):.1f} MB)")
+                    st.download_button(
+                        label="📥 Exportar dados",
+                        data=lambda: build_export(fmt, start_ns, stop_ns),
+                        file_name=f"telemetria_pet_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}",
+                        mime=EXPORT_MIME[fmt],
+                        use_container_width=True
+                    )
+            else:
+                st.info("Aguardando dados do foguete...", icon="📋")
+
+live_dashboard()
 
 # ======================
 # RODAPÉ
@@ -200,10 +284,4 @@ st.markdown("""
     <strong>Sistema de Telemetria Foguete PET</strong> - Desenvolvido por Gabriel Neves de Almeida Duarte - UTFPR<br>
     Dados atualizados em tempo real - Para uso de cunho científico da equipe de controle de dados da missão
 </div>
-""", unsafe_allow_html=True)
-
-# ======================
-# ATUALIZAÇÃO AUTOMÁTICA
-# ======================
-time.sleep(5)
-st.rerun()
\ No newline at end of file
+""", unsafe_allow_html=True)
\ No newline at end of file
@@ -1,78 +1,218 @@
 # components/charts.py
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import plotly.graph_objs as go
 import numpy as np
+import io
+import time
 
-def plot_altitude(df):
-    fig, ax = plt.subplots(figsize=(10, 5))
-    ax.plot(df['timestamp'], df['alt'], color='#4cc9f0')
-    ax.fill_between(df['timestamp'], df['alt'], alpha=0.3, color='#4cc9f0')
-    ax.set_ylabel('Altitude (m)')
-    ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M:%S'))
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    st.pyplot(fig)
-
-def plot_velocity(df):
-    fig, ax = plt.subplots(figsize=(10, 5))
-    ax.plot(df['timestamp'], df['vel'], color='#f72585')
-    ax.fill_between(df['timestamp'], df['vel'], alpha=0.3, color='#f72585')
-    ax.set_ylabel('Velocidade (m/s)')
-    ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M:%S'))
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    st.pyplot(fig)
-
-def plot_acceleration(df):
-    df['acceleration'] = df['vel'].diff() / 0.05
-    fig, ax = plt.subplots(figsize=(10, 5))
-    ax.plot(df['timestamp'], df['acceleration'], color='#4361ee')
-    ax.set_ylabel('Aceleração (m/s²)')
-    ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M:%S'))
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    st.pyplot(fig)
-
-def plot_3d_trajectory(df):
-    MAX_ALT = df['alt'].max() + 5
-    MIN_ALT = min(df['alt'].min(), 0) - 1
-    
+from components.data_loader import lod_indices
+from core.downsample import minmax_indices
+from core.timebase import derivative_at
+from core.geodesy import LocalTangentPlane, ground_track, downrange_crossrange
+
+# matplotlib e plotly são importados só no primeiro gráfico de cada tipo:
+# a página abre sem pagar a importação de bibliotecas de abas não visitadas
+
+# ======== Cache de renderização ========
+
+class ChartCache:
+    """Estado de um gráfico na sessão: a figura (reaproveitada) e a última saída renderizada.
+
+    A saída vale para uma chave: a versão dos dados ou, numa janela de tempo, o
+    viewport (janela + linhas do store que ela cobre); só quando a chave muda a
+    figura é atualizada e renderizada de novo.
+    """
+
+    def __init__(self):
+        self.figure = None
+        self.key = None
+        self.output = None
+        self.render_ms = 0.0
+        self.renders = 0
+        self.summary = None  # texto que acompanha a saída (ex.: distâncias da trajetória)
+
+def _chart_cache(name):
+    caches = st.session_state.setdefault('chart_cache', {})
+    if name not in caches:
+        caches[name] = ChartCache()
+    return caches[name]
+
+def _render(name, render, viewport=None):
+    """Saída do gráfico para a versão atual; render(cache) só roda quando a chave muda"""
+    cache = _chart_cache(name)
+    # Linhas do store não mudam: uma janela fechada no passado não é redesenhada a cada versão
+    key = st.session_state.data_version if viewport is None else (st.session_state.snapshot.epoch, viewport)
+    if cache.key != key:
+        start = time.perf_counter()
+        cache.output = render(cache)
+        cache.render_ms = (time.perf_counter() - start) * 1000
+        cache.renders += 1
+        cache.key = key
+    return cache
+
+def render_times():
+    """Tempo (ms) da última renderização de cada gráfico da sessão"""
+    return {name: cache.render_ms for name, cache in st.session_state.get('chart_cache', {}).items()}
+
+def _show_render_time(cache):
+    st.caption(f"Render: {cache.render_ms:.0f} ms")
+
+# ======== Séries temporais (matplotlib) ========
+
+# Resolução do PNG: a figura (10 pol.) sai com 1400 px de largura, abaixo do
+# limite de 1460 px do st.image; acima dele o Streamlit decodifica, reduz e
+# recodifica a imagem em toda reexecução, mesmo com o PNG em cache
+PNG_DPI = 140
+
+class TimeSeriesFigure:
+    """Figura matplotlib de uma série, criada uma vez por sessão e atualizada a cada versão.
+
+    Usa matplotlib.figure.Figure direto (fora do registro do pyplot), então
+    nenhuma figura fica acumulada ao longo da sessão.
+    """
+
+    def __init__(self, ylabel, color, fill=False):
+        from matplotlib.figure import Figure
+        self.fig = Figure(figsize=(10, 5))
+        self.ax = self.fig.add_subplot()
+        self.ax.set_ylabel(ylabel)
+        self.ax.tick_params(axis='x', labelrotation=45)
+        self.color = color
+        self.fill = fill
+        self.line = None
+        self.area = None
+
+    def render(self, t, y):
+        if self.line is None:
+            import matplotlib.dates as mdates
+            self.line, = self.ax.plot(t, y, color=self.color)
+            self.ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M:%S'))
+        else:
+            self.line.set_data(t, y)
+        self.ax.relim()
+
+        if self.fill:
+            if self.area is not None:
+                self.area.remove()
+            self.area = self.ax.fill_between(t, y, alpha=0.3, color=self.color)
+            # relim() ignora coleções: inclui a base do preenchimento (y = 0)
+            self.ax.update_datalim([(self.ax.dataLim.x0, 0.0)])
+        self.ax.autoscale_view()
+        self.fig.tight_layout()
+
+        buf = io.BytesIO()
+        # Sem bbox_inches='tight': o tight_layout já ajusta as margens e o corte custaria outro desenho
+        self.fig.savefig(buf, format='png', dpi=PNG_DPI)
+        return buf.getvalue()
+
+def _show_series(name, ylabel, color, fill, series, viewport=None):
+    """Desenha (ou reaproveita) o PNG de uma série; series() devolve (tempo, valores)"""
+    def render(cache):
+        if cache.figure is None:
+            cache.figure = TimeSeriesFigure(ylabel, color, fill)
+        return cache.figure.render(*series())
+
+    cache = _render(name, render, viewport)
+    st.image(cache.output, width="stretch")
+    _show_render_time(cache)
+
+def _lod(key, length, values_from, viewport):
+    """Índices mín/máx: incrementais no histórico do feed, recalculados (sem estado) numa janela"""
+    if viewport is None:
+        return lod_indices(key, length, values_from)
+    return minmax_indices(values_from(0)) if length else np.empty(0, dtype=np.int64)
+
+def _downsampled(key, df, column, viewport=None):
+    """(tempo, valores) da série reduzida ao nível de detalhe: picos preservados"""
+    values = df[column].to_numpy()
+    idx = _lod(key, len(values), lambda start: values[start:], viewport)
+    return df['timestamp'].to_numpy()[idx], values[idx]
+
+def plot_altitude(df, viewport=None):
+    _show_series('altitude', 'Altitude (m)', '#4cc9f0', True,
+                 lambda: _downsampled('altitude', df, 'alt', viewport), viewport)
+
+def plot_velocity(df, viewport=None):
+    _show_series('velocity', 'Velocidade (m/s)', '#f72585', True,
+                 lambda: _downsampled('velocity', df, 'vel', viewport), viewport)
+
+def plot_acceleration(df, viewport=None):
+    _show_series('acceleration', 'Aceleração (m/s²)', '#4361ee', False,
+                 lambda: _acceleration_series(df, viewport), viewport)
+
+def _acceleration_series(df, viewport=None):
+    vel = df['vel'].to_numpy()
+    timestamps = df['timestamp'].to_numpy()
+    t_ns = timestamps.view(np.int64)
+
+    def acceleration_from(start):
+        # Derivada na base de tempo real só do trecho novo (olha no máximo um período para trás)
+        return derivative_at(t_ns, vel, np.arange(start, len(vel)))
+
+    idx = _lod('acceleration', len(vel), acceleration_from, viewport)
+    return timestamps[idx], derivative_at(t_ns, vel, idx)
+
+# ======== Trajetórias (Plotly) ========
+
+# Orçamento de pontos: a linha usa o nível de detalhe da altitude (~2000 pontos,
+# apogeu incluso) e só uma fração deles leva marcador com hover
+MARKER_POINTS = 300
+
+def _trajectory_indices(df, viewport=None):
+    """Índices da linha (nível de detalhe da altitude) e dos marcadores (subconjunto dela)"""
+    alt = df['alt'].to_numpy()
+    line = _lod('altitude', len(alt), lambda start: alt[start:], viewport)
+    step = max(1, len(line) // MARKER_POINTS)
+    apogee = line[np.argmax(alt[line])]
+    markers = np.union1d(line[::step], [apogee, line[-1]])
+    return line, markers
+
+def plot_3d_trajectory(df, viewport=None):
+    def render(cache):
+        if cache.figure is None:
+            cache.figure = _trajectory_3d_figure()
+        _update_3d_trajectory(cache.figure, df, viewport)
+        return cache.figure
+
+    cache = _render('trajectory_3d', render, viewport)
+    st.plotly_chart(cache.output, use_container_width=True)
+    _show_render_time(cache)
+
+def _trajectory_3d_figure():
+    import plotly.graph_objs as go
     fig_3d = go.Figure()
 
-    # Trajetória principal
+    # Trajetória principal: linha com o orçamento de pontos
     fig_3d.add_trace(go.Scatter3d(
-        x=df['lon'],
-        y=df['lat'],
-        z=df['alt'],
-        mode='lines+markers',
+        mode='lines',
+        line=dict(width=8, colorscale='Jet', cmin=0),
+        name='Trajetória',
+        hoverinfo='skip'
+    ))
+
+    # Marcadores dizimados, com o hover de cada ponto
+    fig_3d.add_trace(go.Scatter3d(
+        mode='markers',
         marker=dict(
             size=4,
-            color=df['alt'],
             colorscale='Jet',
             cmin=0,
-            cmax=MAX_ALT,
             showscale=True,
             colorbar=dict(title='Altitude (m)', thickness=15, x=0.82, y=0.3)
         ),
-        line=dict(width=8, color=df['alt'], colorscale='Jet'),
-        name='Trajetória',
-        hoverinfo='text',
-        hovertext=[f"Alt: {alt:.1f}m<br>Lat: {lat:.6f}°<br>Lon: {lon:.6f}°" 
-                  for alt, lat, lon in zip(df['alt'], df['lat'], df['lon'])]
+        name='Leituras',
+        showlegend=False,
+        hovertemplate='Alt: %{z:.1f}m<br>Leste: %{x:.1f}m<br>Norte: %{y:.1f}m<br>Vel: %{customdata:.1f} m/s<extra></extra>'
     ))
 
     # Pontos importantes
     # (Ponto de lançamento, pico e aterrissagem)
-    
+
     # Layout
     fig_3d.update_layout(
         scene=dict(
-            xaxis=dict(title='Longitude (°)', gridcolor='rgba(100, 100, 100, 0.2)'),
-            yaxis=dict(title='Latitude (°)', gridcolor='rgba(100, 100, 100, 0.2)'),
-            zaxis=dict(title='Altitude (m)', gridcolor='rgba(100, 100, 100, 0.2)', range=[MIN_ALT, MAX_ALT * 1.1]),
+            xaxis=dict(title='Leste (m)', gridcolor='rgba(100, 100, 100, 0.2)'),
+            yaxis=dict(title='Norte (m)', gridcolor='rgba(100, 100, 100, 0.2)'),
+            zaxis=dict(title='Altitude (m)', gridcolor='rgba(100, 100, 100, 0.2)'),
             bgcolor='#0a1020',
             aspectmode='manual',
             aspectratio=dict(x=2, y=1, z=0.8),
@@ -85,36 +225,103 @@ def plot_3d_trajectory(df):
         paper_bgcolor='#0a1020',
         hoverlabel=dict(bgcolor='rgba(10, 15, 30, 0.9)', font_size=12)
     )
+    return fig_3d
+
+def _update_3d_trajectory(fig_3d, df, viewport=None):
+    """Troca só os dados dos traços e a escala de altitude; o layout continua o mesmo"""
+    line, markers = _trajectory_indices(df, viewport)
+    lat, lon, alt, vel = (df[c].to_numpy() for c in ('lat', 'lon', 'alt', 'vel'))
+    # Metros no plano local com origem no primeiro ponto (a base, no voo inteiro);
+    # só os pontos da linha são convertidos e os marcadores são um subconjunto deles
+    east, north, _ = LocalTangentPlane(lat[0], lon[0]).from_geodetic(lat[line], lon[line])
+    in_line = np.searchsorted(line, markers)
+    MAX_ALT = alt[line].max() + 5
+    MIN_ALT = min(alt[line].min(), 0) - 1
 
-    st.plotly_chart(fig_3d, use_container_width=True)
+    with fig_3d.batch_update():
+        path, points = fig_3d.data
+        path.x, path.y, path.z = east, north, alt[line]
+        path.line.color = alt[line]
+        path.line.cmax = MAX_ALT
+        points.x, points.y, points.z = east[in_line], north[in_line], alt[markers]
+        points.customdata = vel[markers]
+        points.marker.color = alt[markers]
+        points.marker.cmax = MAX_ALT
+        fig_3d.layout.scene.zaxis.range = [MIN_ALT, MAX_ALT * 1.1]
 
-def plot_2d_trajectory(df):
+def plot_2d_trajectory(df, viewport=None):
+    def render(cache):
+        if cache.figure is None:
+            cache.figure = _trajectory_2d_figure()
+        _update_2d_trajectory(cache.figure, df, viewport)
+        cache.summary = _ground_track_summary(df, viewport)
+        return cache.figure
+
+    cache = _render('trajectory_2d', render, viewport)
+    st.plotly_chart(cache.output, use_container_width=True)
+    st.caption(cache.summary)
+    _show_render_time(cache)
+
+def _ground_track_summary(df, viewport=None):
+    """Trajeto no solo, alcance e desvio lateral máximo.
+
+    No histórico inteiro vêm das métricas do feed, mantidas só com as amostras
+    novas; numa janela de tempo são calculados (vetorizado) sobre as linhas dela.
+    """
+    metrics = st.session_state.snapshot.metrics
+    if viewport is None and metrics.get('ground_track') is not None:
+        track, downrange, crossrange = metrics['ground_track'], metrics['downrange'], metrics['max_crossrange']
+    else:
+        lat, lon = df['lat'].to_numpy(), df['lon'].to_numpy()
+        track = ground_track(lat, lon)[-1]
+        downrange, cross = downrange_crossrange(lat, lon, lat[0], lon[0])
+        downrange, crossrange = downrange[-1], np.abs(cross).max()
+    return (f"Trajeto no solo: {track:.1f} m | Alcance: {downrange:.1f} m | "
+            f"Desvio lateral máx.: {crossrange:.1f} m")
+
+def _trajectory_2d_figure():
+    import plotly.graph_objs as go
     fig_map = go.Figure()
-    
+
     fig_map.add_trace(go.Scattermapbox(
-        lon=df['lon'], lat=df['lat'],
-        mode='lines+markers',
+        mode='lines',
+        line=dict(width=5, color='#4361ee'),
+        name='Trajetória',
+        hoverinfo='skip'
+    ))
+
+    fig_map.add_trace(go.Scattermapbox(
+        mode='markers',
         marker=dict(
             size=10,
-            color=df['alt'],
             colorscale='Viridis',
             showscale=True,
             colorbar=dict(title='Altitude (m)', title_side='right', thickness=15),
             opacity=0.9
         ),
-        line=dict(width=5, color='#4361ee'),
-        name='Trajetória',
-        hoverinfo='text',
-        hovertext='Altitude: ' + df['alt'].astype(str) + 'm<br>Velocidade: ' + df['vel'].astype(str) + 'm/s'
+        name='Leituras',
+        showlegend=False,
+        hovertemplate='Altitude: %{customdata[0]}m<br>Velocidade: %{customdata[1]}m/s<extra></extra>'
     ))
 
     fig_map.update_layout(
         mapbox_style="open-street-map",
-        mapbox=dict(center=dict(lat=df['lat'].mean(), lon=df['lon'].mean()), zoom=14),
+        mapbox=dict(zoom=14),
         margin=dict(l=0, r=0, t=10, b=0),
         height=600,
         legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
         hoverlabel=dict(bgcolor='white', font_size=14, font_family='Arial')
     )
+    return fig_map
+
+def _update_2d_trajectory(fig_map, df, viewport=None):
+    line, markers = _trajectory_indices(df, viewport)
+    lat, lon, alt, vel = (df[c].to_numpy() for c in ('lat', 'lon', 'alt', 'vel'))
 
-    st.plotly_chart(fig_map, use_container_width=True)
\ No newline at end of file
+    with fig_map.batch_update():
+        path, points = fig_map.data
+        path.lon, path.lat = lon[line], lat[line]
+        points.lon, points.lat = lon[markers], lat[markers]
+        points.marker.color = alt[markers]
+        points.customdata = np.column_stack([alt[markers], vel[markers]])
+        fig_map.layout.mapbox.center = dict(lat=lat[line].mean(), lon=lon[line].mean())
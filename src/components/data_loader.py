@@ -1,80 +1,230 @@
 # components/data_loader.py
 import os
+import gzip
+import shutil
+import tempfile
+import numpy as np
 import pandas as pd
 import streamlit as st
-from datetime import datetime, timedelta
 import time
 
-# Caminho do CSV
+from core.feed import TelemetryFeed
+from core.timebase import fill_missing
+from core.store import TelemetryStore, store_exists, EXPORT_FORMATS, CSV_COLUMNS
+from core.query import TelemetryQuery, UnsortedTimeError
+from core.flights import FLIGHT_DTYPE
+from core.downsample import MinMaxLOD
+
+# Caminhos do store colunar (principal) e do CSV (legado/exportação)
 dir_path = os.path.dirname(os.path.abspath(__file__))
+store_path = os.path.join(dir_path, "..", "..", "data", "telemetria")
 csv_path = os.path.join(dir_path, "..", "..", "data", "dados.csv")
 
+# Limite de memória do buffer compartilhado (MB, variável de ambiente)
+MAX_BUFFER_MB = float(os.environ.get("TELEMETRIA_MAX_MB", "256"))
+
+# Teto do download pelo dashboard (MB, variável de ambiente): o arquivo inteiro
+# passa pela memória do processo; acima dele, só pelo exportar.py / make export
+MAX_EXPORT_MB = float(os.environ.get("TELEMETRIA_MAX_EXPORT_MB", "64"))
+
+# Intervalo mínimo entre atualizações das regiões ao vivo (ms, variável de ambiente)
+REFRESH_INTERVAL = float(os.environ.get("TELEMETRIA_REFRESH_MS", "100")) / 1000
+
+@st.cache_resource
+def get_feed() -> TelemetryFeed:
+    """Um único feed por processo, compartilhado por todas as abas/sessões"""
+    return TelemetryFeed(store_path, csv_path, max_bytes=int(MAX_BUFFER_MB * 2**20))
+
+def init_session_data():
+    st.session_state.data_version = -1
+    st.session_state.last_update = time.time()
+
 def load_data_incremental():
-    try:
-        if not os.path.exists(csv_path):
-            st.warning(f"Arquivo não encontrado: {csv_path}")
-            return
-        
-        current_size = os.path.getsize(csv_path)
-        
-        if current_size < st.session_state.last_size:
-            st.session_state.df = pd.DataFrame(columns=['lat','lon','alt','vel','timestamp'])
-            st.session_state.last_size = 0
-            st.session_state.header_skipped = False
-            st.session_state.line_count = 0
-        
-        if current_size == st.session_state.last_size:
-            return
-        
-        if 'line_count' not in st.session_state:
-            st.session_state.line_count = 0
-        
-        with open(csv_path, 'r') as f:
-            if 'header_skipped' not in st.session_state or not st.session_state.header_skipped:
-                header = f.readline().strip()
-                if header == "lat,lon,alt,vel":
-                    st.session_state.header_skipped = True
-                st.session_state.line_count += 1
-            
-            for _ in range(st.session_state.line_count):
-                f.readline()
-            
-            new_lines = []
-            line_count = 0
-            for line in f:
-                parts = line.strip().split(',')
-                if len(parts) == 4:
-                    try:
-                        lat = float(parts[0])
-                        lon = float(parts[1])
-                        alt = float(parts[2])
-                        vel = float(parts[3])
-                        new_lines.append([lat, lon, alt, vel])
-                        line_count += 1
-                    except ValueError:
-                        continue
-            
-            if new_lines:
-                new_df = pd.DataFrame(new_lines, columns=['lat','lon','alt','vel'])
-                st.session_state.line_count += line_count
-                
-                start_time = datetime.now()
-                new_df['timestamp'] = pd.date_range(
-                    start=start_time - timedelta(seconds=len(new_df)*0.05), 
-                    end=start_time, 
-                    periods=len(new_df)
-                )
-                
-                st.session_state.df = pd.concat([st.session_state.df, new_df], ignore_index=True)
-                st.session_state.last_size = current_size
-                st.session_state.last_update = time.time()
+    """Atualiza o feed compartilhado e guarda na sessão o snapshot (versionado) em uso"""
+    feed = get_feed()
+    snapshot = feed.poll()
+    
+    if feed.error:
+        st.error(f"Erro na leitura de dados: {feed.error}")
+    elif snapshot.source is None:
+        st.warning(f"Arquivo não encontrado: {csv_path}")
     
-    except Exception as e:
-        st.error(f"Erro na leitura de dados: {str(e)}")
-
-def process_data(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    if not df.empty:
-        df['alt_suavizada'] = df['alt'].ewm(span=5, adjust=False).mean()
-        df['vel_ms'] = df['vel'] / 3.6
-    return df
\ No newline at end of file
+    st.session_state.snapshot = snapshot
+    st.session_state.data_version = snapshot.version
+    st.session_state.last_update = feed.last_update
+    st.session_state.malformed_rows = feed.parse_stats.malformed
+
+def per_version(name, compute, *args):
+    """compute(*args) uma vez por versão dos dados (e por argumentos), guardado na sessão.
+
+    O fragmento ao vivo reexecuta a cada REFRESH_INTERVAL mesmo sem dados novos;
+    com a mesma versão, consultas ao store e DataFrames da execução anterior são
+    reaproveitados sem tocar no disco.
+    """
+    cache = st.session_state.setdefault('version_cache', {})
+    key = (st.session_state.data_version, st.session_state.snapshot.epoch, args)
+    entry = cache.get(name)
+    if entry is None or entry[0] != key:
+        entry = cache[name] = (key, compute(*args))
+    return entry[1]
+
+def lod_indices(key, length, values_from):
+    """Índices (mín/máx por balde) para desenhar uma série da sessão.
+
+    O nível de detalhe fica na sessão e é estendido só com as amostras novas:
+    `values_from(start)` devolve os valores da série de `start` até `length`.
+    """
+    caches = st.session_state.setdefault('lod_cache', {})
+    epoch = st.session_state.snapshot.epoch
+    lod = caches.get(key)
+    if lod is None or lod.epoch != epoch or lod.n > length:
+        lod = MinMaxLOD()
+        lod.epoch = epoch
+        caches[key] = lod
+    if lod.n < length:
+        lod.extend(values_from(lod.n))
+    return lod.indices()
+
+def get_dataframe() -> pd.DataFrame:
+    """DataFrame da sessão: views sobre o buffer compartilhado, sem cópia"""
+    return st.session_state.snapshot.frame()
+
+def get_metrics() -> dict:
+    """Métricas do voo (máx/mín, EWMA, aceleração, fase, duração) da versão em uso"""
+    return st.session_state.snapshot.metrics
+
+# ======== Janelas de tempo ========
+
+# Janelas móveis oferecidas no seletor (segundos)
+LAST_WINDOWS = (10, 30, 60, 300)
+
+def _store_query():
+    feed = get_feed()
+    return feed.query if feed.source == 'store' and feed.query is not None else None
+
+def time_order_error():
+    """Mensagem se o store tem carimbos fora de ordem (janelas por tempo indisponíveis), ou None"""
+    query = _store_query()
+    try:
+        if query is not None:
+            query.check_sorted()
+    except UnsortedTimeError as e:
+        return str(e)
+    return None
+
+def time_span() -> float:
+    """Segundos entre a primeira e a última amostra disponíveis para as janelas"""
+    query = _store_query()
+    if query is not None:
+        try:
+            bounds = query.bounds()
+        except UnsortedTimeError:
+            return 0.0
+        return (bounds[1] - bounds[0]) / 1e9 if bounds else 0.0
+    t = st.session_state.snapshot.arrays['timestamp']
+    return (t[-1] - t[0]) / np.timedelta64(1, 's') if len(t) else 0.0
+
+def flight_table() -> np.ndarray:
+    """Registros dos voos do store (índice gravado na ingestão); vazio sem store"""
+    query = _store_query()
+    return query.flight_table() if query is not None else np.empty(0, dtype=FLIGHT_DTYPE)
+
+def window_frame(viewport):
+    """(DataFrame, (início, fim)) de uma janela de tempo, pelo índice de tempo do store.
+
+    viewport: ('last', s) = últimos s segundos; ('range', s0, s1) = segundos desde
+    a primeira amostra; ('flight', k) = voo k. As colunas são views do store; sem
+    store (CSV legado) a janela é recortada do buffer do feed por bisect. Store
+    com carimbos fora de ordem levanta UnsortedTimeError nas janelas por tempo.
+    """
+    kind = viewport[0]
+    query = _store_query()
+    bounds = query.bounds() if query is not None and kind != 'flight' else None
+    if query is not None and (bounds is not None or kind == 'flight'):
+        if kind == 'flight':
+            start, stop = query.flights()[viewport[1]]
+        elif kind == 'last':
+            start, stop = query.rows_between(bounds[1] - int(viewport[1] * 1e9), None)
+        else:
+            start, stop = query.rows_between(bounds[0] + int(viewport[1] * 1e9), bounds[0] + int(viewport[2] * 1e9))
+        cols = query.store.read(start, stop, CSV_COLUMNS + ['t_rx_ns'])
+        t_ns = fill_missing(cols.pop('t_rx_ns'))
+        cols['timestamp'] = (t_ns + query.store.anchor_ns).view('datetime64[ns]')
+        return pd.DataFrame(cols, copy=False), (start, stop)
+
+    df = get_dataframe()
+    t = df['timestamp'].to_numpy().view(np.int64)
+    start, stop = 0, len(t)
+    if len(t) and kind == 'last':
+        start = int(np.searchsorted(t, t[-1] - int(viewport[1] * 1e9)))
+    elif len(t) and kind == 'range':
+        start = int(np.searchsorted(t, t[0] + int(viewport[1] * 1e9)))
+        stop = int(np.searchsorted(t, t[0] + int(viewport[2] * 1e9), side='right'))
+    return df.iloc[start:stop], (start, stop)
+
+# ======== Exportação sob demanda ========
+
+EXPORT_MIME = {"csv": "text/csv", "csv.gz": "application/gzip", "npz": "application/octet-stream"}
+EXPORT_LABELS = {"csv": "CSV", "csv.gz": "CSV (gzip)", "npz": "Binário colunar (.npz)"}
+# Bytes por linha estimados (CSV com %.15g; gzip com folga; npz = 8 bytes por coluna)
+EXPORT_ROW_BYTES = {"csv": 72, "csv.gz": 32}
+
+def export_time_bounds():
+    """(primeiro, último) carimbo de recepção t_rx_ns do store, ou None sem store ou sem carimbos"""
+    query = get_feed().query
+    try:
+        return query.bounds() if query is not None else None
+    except UnsortedTimeError:
+        return None  # fora de ordem: só o histórico inteiro
+
+def export_sizes(start_ns=None, stop_ns=None):
+    """Tamanho estimado (bytes) da exportação em cada formato, para o teto do dashboard"""
+    feed = get_feed()
+    if feed.source == 'store' and feed.query is not None:
+        query = feed.query
+        start, stop = 0, query.store.rows
+        if start_ns is not None or stop_ns is not None:
+            start, stop = query.rows_between(start_ns, stop_ns)
+        sizes = {fmt: (stop - start) * per_row for fmt, per_row in EXPORT_ROW_BYTES.items()}
+        sizes["npz"] = (stop - start) * len(query.store.names) * 8
+        return sizes
+    # CSV legado: o próprio arquivo (e o gzip dele) ou as colunas do buffer em memória
+    size = os.path.getsize(csv_path) if os.path.exists(csv_path) else 0
+    arrays = feed.snapshot().arrays
+    return {"csv": size, "csv.gz": size * EXPORT_ROW_BYTES["csv.gz"] // EXPORT_ROW_BYTES["csv"],
+            "npz": sum(a.nbytes for a in arrays.values())}
+
+def export_allowed(sizes):
+    """Formatos cuja exportação cabe no teto do download pelo dashboard"""
+    return [fmt for fmt in EXPORT_MIME if sizes[fmt] <= MAX_EXPORT_MB * (1 << 20)]
+
+def build_export(fmt, start_ns=None, stop_ns=None):
+    """Gera a exportação em blocos, direto do store (chamado só no clique do botão de download).
+
+    O arquivo é montado em blocos num temporário em disco, mas o resultado
+    inteiro é lido para a memória (o Streamlit o guarda para servir o
+    download): por isso o dashboard só oferece formatos dentro de MAX_EXPORT_MB
+    (export_allowed); exportações maiores vão em disco pelo exportar.py.
+    """
+    with tempfile.TemporaryFile() as out:
+        if store_exists(store_path):
+            store = TelemetryStore(store_path)
+            try:
+                start, stop = 0, store.rows
+                if start_ns is not None or stop_ns is not None:
+                    start, stop = TelemetryQuery(store).rows_between(start_ns, stop_ns)
+                EXPORT_FORMATS[fmt](store, out, start=start, stop=stop)
+            finally:
+                store.close()
+        elif fmt == "npz":
+            # CSV legado: o binário sai do buffer em memória (sem cópia das colunas)
+            np.savez(out, **get_feed().snapshot().arrays)
+        else:
+            with open(csv_path, "rb") as src:
+                if fmt == "csv.gz":
+                    with gzip.GzipFile(fileobj=out, mode="wb", compresslevel=6, mtime=0) as gz:
+                        shutil.copyfileobj(src, gz)
+                else:
+                    shutil.copyfileobj(src, out)
+        out.seek(0)
+        return out.read()
@@ -1,7 +1,7 @@
 # components/sidebar.py
 import streamlit as st
 
-def render_sidebar():
+def render_sidebar(refresh_interval=0.1):
     with st.sidebar:
         st.markdown(
             """
@@ -78,7 +78,7 @@ def render_sidebar():
         col1, col2 = st.columns([0.7, 0.3])
         col1.write("Atualização Automática")
         col2.markdown('<div style="font-weight: 500; color: #4cc9f0;">ON</div>', unsafe_allow_html=True)
-        st.caption("Intervalo: 100ms")
+        st.caption(f"Intervalo: {refresh_interval * 1000:.0f}ms")
         
         if st.button("🛑 ABORTAR MISSÃO", key="abort_button", use_container_width=True):
             st.warning("Comando de aborto enviado!")
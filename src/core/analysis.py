@@ -0,0 +1,240 @@
+# core/analysis.py
+import json
+import math
+import os
+
+import numpy as np
+
+from core.downsample import minmax_indices
+from core.timebase import fill_missing, interp_at, NOMINAL_PERIOD_NS
+from core.geodesy import ground_track, vincenty
+
+# Muda quando as métricas mudam: invalida estados e caches salvos
+ANALYSIS_VERSION = 2
+# Linhas por bloco na análise fora da memória (~40 MB de colunas float64)
+CHUNK_ROWS = 1 << 20
+# Pontos guardados por série para os gráficos
+PLOT_POINTS = 4000
+# Bytes de CSV por bloco (~linhas * tamanho típico de uma linha)
+CSV_CHUNK_BYTES = CHUNK_ROWS * 48
+# Piso do bloco de CSV: cabe com folga a linha mais longa esperada
+CSV_MAX_LINE_BYTES = 4096
+
+
+class SeriesDecimator:
+    """Série reduzida para gráfico com memória limitada: mín/máx por balde, bloco a bloco.
+
+    Cada bloco é reduzido a ~points pontos; quando o acumulado passa de 2x,
+    ele mesmo é reduzido de novo, então picos como o apogeu nunca somem.
+    """
+
+    def __init__(self, points=PLOT_POINTS):
+        self.points = points
+        self.x = np.empty(0)
+        self.y = np.empty(0)
+
+    def extend(self, x, y):
+        keep = minmax_indices(y, self.points)
+        self.x = np.concatenate([self.x, np.asarray(x)[keep]])
+        self.y = np.concatenate([self.y, np.asarray(y, dtype=np.float64)[keep]])
+        if len(self.y) > 2 * self.points:
+            keep = minmax_indices(self.y, self.points)
+            self.x, self.y = self.x[keep], self.y[keep]
+
+
+class FlightAnalysis:
+    """Análise do voo em blocos: cada bloco custa O(bloco) e o estado carregado é O(1).
+
+    Entre blocos ficam só máximos e onde ocorreram, primeira/última amostra e
+    a última amostra e o último ponto da grade uniforme da aceleração; o
+    resultado é o mesmo de analisar o arquivo inteiro de uma vez. O mesmo
+    estado pode ser salvo em disco (save_state) e retomado noutra execução.
+    """
+
+    _STATE_FIELDS = ("rows", "first_t_ns", "last_t_ns", "first_pos", "last_pos", "track_m",
+                     "max_alt", "max_vel", "max_acc", "apogee_row", "peak_vel_row",
+                     "apogee_t_ns", "peak_vel_t_ns", "_last_vel", "_grid_next", "_grid_vel")
+
+    def __init__(self, period_ns=NOMINAL_PERIOD_NS, plot_points=PLOT_POINTS):
+        self.period_ns = period_ns
+        self.rows = 0
+        self.first_t_ns = self.last_t_ns = None
+        self.first_pos = self.last_pos = None
+        self.track_m = 0.0
+        self.max_alt = self.max_vel = self.max_acc = -np.inf
+        self.apogee_row = self.peak_vel_row = None
+        self.apogee_t_ns = self.peak_vel_t_ns = None
+        # Aceleração: derivada da velocidade reamostrada na grade t0, t0 + período, ...
+        self._last_vel = None
+        self._grid_next = None
+        self._grid_vel = None
+        self.alt_plot = SeriesDecimator(plot_points)
+        self.vel_plot = SeriesDecimator(plot_points)
+
+    def update(self, lat, lon, alt, vel, t_ns=None):
+        alt = np.asarray(alt, dtype=np.float64)
+        vel = np.asarray(vel, dtype=np.float64)
+        n = len(alt)
+        if not n:
+            return
+        t = fill_missing(np.full(n, -1) if t_ns is None else t_ns, self.last_t_ns, self.period_ns)
+
+        peak = int(np.argmax(alt))
+        if alt[peak] > self.max_alt:
+            self.max_alt, self.apogee_row, self.apogee_t_ns = float(alt[peak]), self.rows + peak, int(t[peak])
+        peak = int(np.argmax(vel))
+        if vel[peak] > self.max_vel:
+            self.max_vel, self.peak_vel_row, self.peak_vel_t_ns = float(vel[peak]), self.rows + peak, int(t[peak])
+        self._update_acc(t, vel)
+
+        # Trajeto no solo emendado com a última posição do bloco anterior
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        if self.last_pos is not None:
+            lat = np.concatenate([[self.last_pos[0]], lat])
+            lon = np.concatenate([[self.last_pos[1]], lon])
+        self.track_m += float(ground_track(lat, lon)[-1])
+
+        if self.first_t_ns is None:
+            self.first_t_ns = int(t[0])
+            self.first_pos = (float(lat[0]), float(lon[0]))
+        self.last_t_ns = int(t[-1])
+        self.last_pos = (float(lat[-1]), float(lon[-1]))
+
+        seconds = (t - self.first_t_ns) / 1e9
+        self.alt_plot.extend(seconds, alt)
+        self.vel_plot.extend(seconds, vel)
+        self.rows += n
+
+    def _update_acc(self, t, vel):
+        """Grade uniforme emendada com a última amostra do bloco anterior"""
+        if self._last_vel is not None:
+            t = np.concatenate([[self.last_t_ns], t])
+            vel = np.concatenate([[self._last_vel], vel])
+        start = t[0] if self._grid_next is None else self._grid_next
+        grid = np.arange(start, t[-1] + 1, self.period_ns, dtype=np.int64)
+        self._last_vel = float(vel[-1])
+        if not len(grid):
+            return
+        values = interp_at(t, vel, grid)
+        if self._grid_vel is not None:
+            values = np.concatenate([[self._grid_vel], values])
+        acc = np.diff(values) / (self.period_ns / 1e9)
+        if len(acc):
+            self.max_acc = max(self.max_acc, float(acc.max()))
+        self._grid_next = int(grid[-1]) + self.period_ns
+        self._grid_vel = float(values[-1])
+
+    # ======== Resultado ========
+
+    @property
+    def duration(self):
+        """Segundos entre a primeira e a última amostra"""
+        return 0.0 if self.first_t_ns is None else (self.last_t_ns - self.first_t_ns) / 1e9
+
+    def state(self):
+        """Agregados carregados entre blocos (tipos simples, para JSON)"""
+        return {name: getattr(self, name) for name in self._STATE_FIELDS}
+
+    def restore(self, state):
+        for name in self._STATE_FIELDS:
+            value = state[name]
+            setattr(self, name, tuple(value) if isinstance(value, list) else value)
+
+    def seconds_at(self, t_ns):
+        return (t_ns - self.first_t_ns) / 1e9
+
+    def summary(self):
+        """Métricas do relatório em tipos simples (serializáveis em JSON)"""
+        return {
+            "linhas": self.rows,
+            "apogeu_m": self.max_alt,
+            "t_apogeu_s": self.seconds_at(self.apogee_t_ns),
+            "vel_max_ms": self.max_vel,
+            "t_vel_max_s": self.seconds_at(self.peak_vel_t_ns),
+            "acc_max_ms2": self.max_acc if np.isfinite(self.max_acc) else float("nan"),
+            "duracao_s": self.duration,
+            "alcance_m": horizontal_range(self),
+            "trajeto_m": self.track_m,
+        }
+
+
+# ======== Estado persistente ========
+# Um .npz com os agregados (JSON em 'meta') e as séries reduzidas dos gráficos.
+# `key` identifica o que foi analisado (origem, identidade do arquivo, início da
+# seleção); `offset` é até onde (linha do store ou byte do CSV) e `check`, uma
+# conferência opcional do conteúdo antes do offset.
+
+def save_state(analysis, path, key, offset, check=None):
+    meta = {"versao": ANALYSIS_VERSION, "chave": key, "offset": offset,
+            "conferencia": check, "estado": analysis.state()}
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, meta=np.array(json.dumps(meta)),
+                 alt_x=analysis.alt_plot.x, alt_y=analysis.alt_plot.y,
+                 vel_x=analysis.vel_plot.x, vel_y=analysis.vel_plot.y)
+    os.replace(tmp, path)
+
+
+def load_state(path, key):
+    """(análise, offset, conferência) salvos para `key` nesta versão, ou None"""
+    try:
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            series = {name: data[name] for name in ("alt_x", "alt_y", "vel_x", "vel_y")}
+    except (OSError, ValueError, KeyError):
+        return None
+    if meta.get("versao") != ANALYSIS_VERSION or meta.get("chave") != key:
+        return None
+    analysis = FlightAnalysis()
+    analysis.restore(meta["estado"])
+    analysis.alt_plot.x, analysis.alt_plot.y = series["alt_x"], series["alt_y"]
+    analysis.vel_plot.x, analysis.vel_plot.y = series["vel_x"], series["vel_y"]
+    return analysis, meta["offset"], meta["conferencia"]
+
+
+# ======== Relatório ========
+
+def horizontal_range(analysis):
+    """Distância horizontal (m) da primeira à última posição, no elipsoide"""
+    return float(vincenty(*analysis.first_pos, *analysis.last_pos))
+
+
+def json_safe(value):
+    """Cópia para JSON estrito: NaN/inf viram null (também dentro de dicts e listas)"""
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {k: json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_safe(v) for v in value]
+    return value
+
+
+def save_plot(analysis, path, title=None):
+    """Altitude e velocidade vs tempo (séries reduzidas) num PNG; backend sem janela"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(12, 8))
+    if title:
+        fig.suptitle(title)
+
+    plt.subplot(2, 1, 1)
+    plt.plot(analysis.alt_plot.x, analysis.alt_plot.y, 'g-')
+    plt.title('Altitude vs Tempo')
+    plt.xlabel('Tempo (s)')
+    plt.ylabel('Altitude (m)')
+    plt.grid(True)
+
+    plt.subplot(2, 1, 2)
+    plt.plot(analysis.vel_plot.x, analysis.vel_plot.y, 'b-')
+    plt.title('Velocidade vs Tempo')
+    plt.xlabel('Tempo (s)')
+    plt.ylabel('Velocidade (m/s)')
+    plt.grid(True)
+
+    plt.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
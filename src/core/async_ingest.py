@@ -0,0 +1,199 @@
+# core/async_ingest.py
+import asyncio
+import signal
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.packets import decode_batch, csv_rows
+from core.counters import udp_kernel_drops
+
+# Marca na fila de escrita: o sinal END segue a ordem das amostras até o destino
+_END_OF_FLIGHT = object()
+
+
+class _TelemetryProtocol(asyncio.DatagramProtocol):
+    def __init__(self, engine):
+        self.engine = engine
+
+    def datagram_received(self, data, addr):
+        self.engine._on_datagram(data)
+
+    def error_received(self, exc):
+        print(f"[ERRO UDP] {exc}")
+
+
+class AsyncIngestEngine:
+    """Ingestão em laço de eventos: leitura do socket separada da escrita em disco.
+
+    O primeiro datagrama de uma rajada dispara a drenagem do socket em lote; o
+    lote é decodificado de uma vez e entregue por uma fila limitada à tarefa de
+    escrita, que roda os destinos de escrita numa thread dedicada. Uma escrita lenta nunca
+    segura a leitura do socket: se a fila encher, o lote é descartado e contado;
+    só o sinal de fim de voo nunca é descartado (espera vaga, na ordem do lote).
+    As amostras aceitas também vão para o ring buffer ao vivo, se houver.
+    """
+
+    def __init__(self, sock, sink, stop_on_end=False, queue_size=64, max_batch=4096,
+                 quiet=False, counter=None, publisher=None, rebase=None):
+        self.sock = sock
+        self.sink = sink
+        self.stop_on_end = stop_on_end
+        self.queue_size = queue_size
+        self.max_batch = max_batch
+        self.quiet = quiet
+        self.counter = counter
+        self.publisher = publisher
+        self.rebase = rebase
+
+        self.received = 0
+        self.batches = 0
+        self.invalid = 0
+        self.queue_dropped = 0
+        self._ends_waiting = 0
+        self._end_task = None
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="udp-writer")
+
+    # ======== Leitura ========
+
+    def _on_datagram(self, data):
+        batch = [data]
+        rx_ns = [time.monotonic_ns()]
+        # Drena o que já está no buffer do kernel sem voltar ao laço de eventos
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self.sock.recv(2048))
+            except (BlockingIOError, InterruptedError):
+                break
+            rx_ns.append(time.monotonic_ns())
+        self._dispatch(batch, rx_ns)
+
+    def _dispatch(self, batch, rx_ns=None):
+        samples, ends, invalid = decode_batch(batch, rx_ns)
+        if self.rebase:
+            self.rebase(samples)  # base de tempo do store, antes de publicar e gravar
+        self.received += len(batch)
+        self.batches += 1
+        self.invalid += invalid
+
+        # Cada END entra na fila entre as amostras que o cercam no lote: as que
+        # vieram depois dele já são do voo seguinte
+        bounds = [0] + ends + [len(samples)]
+        for k in range(len(bounds) - 1):
+            if k:
+                self._put_end()
+                if self.stop_on_end:
+                    print("[UDP] Recebido sinal de fim. Encerrando no modo teste.")
+                    self._done.set()
+                    return
+            if bounds[k + 1] > bounds[k]:
+                self._put_samples(samples[bounds[k]:bounds[k + 1]])
+
+    def _put_samples(self, samples):
+        # Com um END esperando vaga, estas amostras passariam na frente dele
+        if self._ends_waiting or self.queue.full():
+            self.queue_dropped += len(samples)
+        else:
+            self.queue.put_nowait(samples)
+            # Publica já no laço de eventos (sem esperar o disco), mas só o
+            # que vai para o store: a sequência do ring segue as linhas do store
+            if self.publisher:
+                self.publisher.publish(samples)
+        if self.counter:
+            self.counter.add(len(samples))
+        if not self.quiet:
+            for row in csv_rows(samples):
+                print(f"[UDP] Dados recebidos: {','.join(map(str, row))}")
+
+    def _put_end(self):
+        """O END nunca é descartado: sem vaga na fila, uma tarefa espera por ela (em ordem)"""
+        if not self._ends_waiting:
+            try:
+                self.queue.put_nowait(_END_OF_FLIGHT)
+                return
+            except asyncio.QueueFull:
+                print("[UDP] Fila cheia: fim de voo aguardando vaga.")
+                self._end_task = asyncio.get_running_loop().create_task(self._put_waiting_ends())
+        self._ends_waiting += 1
+
+    async def _put_waiting_ends(self):
+        while self._ends_waiting:
+            await self.queue.put(_END_OF_FLIGHT)
+            self._ends_waiting -= 1
+
+    # ======== Escrita ========
+
+    async def _writer_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                samples = await asyncio.wait_for(self.queue.get(), timeout=self.sink.time_to_flush())
+            except asyncio.TimeoutError:
+                await loop.run_in_executor(self._executor, self.sink.maybe_flush)
+                continue
+            if samples is None:
+                break
+            if samples is _END_OF_FLIGHT:
+                await loop.run_in_executor(self._executor, self.sink.mark_end)
+                continue
+            await loop.run_in_executor(self._executor, self._write, samples)
+
+    def _write(self, samples):
+        self.sink.write_samples(samples)
+        self.sink.maybe_flush()
+
+    async def _report_loop(self):
+        while True:
+            await asyncio.sleep(self.counter.interval)
+            self.counter.maybe_report(self.stats_line())
+
+    def stats_line(self):
+        drops = self.kernel_drops()
+        return (f" | Lotes: {self.batches} | Gravadas: {self.sink.rows_written}"
+                f" | Descartes fila: {self.queue_dropped}"
+                f" | Descartes kernel: {drops if drops is not None else 'n/d'}")
+
+    def kernel_drops(self):
+        return udp_kernel_drops(self.sock)
+
+    # ======== Execução ========
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._done = asyncio.Event()
+        self.sock.setblocking(False)
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows: KeyboardInterrupt segue o caminho padrão
+
+        transport, _ = await loop.create_datagram_endpoint(lambda: _TelemetryProtocol(self), sock=self.sock)
+        writer_task = asyncio.create_task(self._writer_loop())
+        report_task = asyncio.create_task(self._report_loop()) if self.quiet and self.counter else None
+        try:
+            await self._done.wait()
+        finally:
+            transport.pause_reading()
+            if report_task:
+                report_task.cancel()
+            if self._end_task:
+                await self._end_task  # ENDs pendentes entram antes do fim da fila
+            await self.queue.put(None)
+            await writer_task
+            await loop.run_in_executor(self._executor, self.sink.flush)
+            self._executor.shutdown()
+            print(f"[UDP] Recebidos: {self.received}{self.stats_line()}")
+            transport.close()
+
+    def stop(self):
+        self._done.set()
+
+
+def set_receive_buffer(sock, size):
+    """Configura SO_RCVBUF e retorna o tamanho efetivo concedido pelo kernel"""
+    if size:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, size)
+    return sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
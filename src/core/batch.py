@@ -0,0 +1,110 @@
+# core/batch.py
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from core.analysis import FlightAnalysis, save_plot, ANALYSIS_VERSION, CHUNK_ROWS
+from core.flights import END_REASONS
+from core.query import TelemetryQuery
+from core.store import TelemetryStore, CSV_COLUMNS
+
+CACHE_FILE = "cache.json"
+SUMMARY_FILE = "resumo.csv"
+SUMMARY_COLUMNS = ["voo", "inicio", "linhas", "duracao_s", "apogeu_m", "t_apogeu_s",
+                   "vel_max_ms", "acc_max_ms2", "alcance_m", "trajeto_m", "fim", "grafico"]
+
+
+# ======== Trabalho por voo ========
+
+def analyze_flight(store_path, start, stop, chunk_rows=CHUNK_ROWS, plot_path=None, title=None):
+    """Analisa as linhas [start, stop) do store em blocos; roda no processo de trabalho"""
+    store = TelemetryStore(store_path)
+    try:
+        columns = CSV_COLUMNS + [c for c in ["t_rx_ns"] if c in store.names]
+        analysis = FlightAnalysis()
+        for begin in range(start, stop, chunk_rows):
+            cols = store.read(begin, min(begin + chunk_rows, stop), columns)
+            analysis.update(cols["lat"], cols["lon"], cols["alt"], cols["vel"], cols.get("t_rx_ns"))
+    finally:
+        store.close()
+    if plot_path:
+        save_plot(analysis, plot_path, title)
+    return analysis.summary()
+
+
+def flight_key(record, created_ns):
+    """Identidade de um voo: mesmas linhas e carimbos no mesmo store = mesmo resultado"""
+    return (f"{created_ns}:{record['start_row']}:{record['stop_row']}:"
+            f"{record['t_start_ns']}:{record['t_end_ns']}")
+
+
+# ======== Cache ========
+
+def _load_cache(path):
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache.get("voos", {}) if cache.get("versao") == ANALYSIS_VERSION else {}
+
+
+def _save_cache(path, entries):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"versao": ANALYSIS_VERSION, "voos": entries}, f)
+    os.replace(tmp, path)
+
+
+# ======== Lote ========
+
+def analyze_all(store_path, out_dir, workers=None, chunk_rows=CHUNK_ROWS):
+    """Analisa todos os voos do store num pool de processos; voos inalterados vêm do cache.
+
+    Retorna (linhas do resumo, voos recalculados). Grava o resumo em CSV e um
+    PNG por voo em `out_dir`.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    store = TelemetryStore(store_path)
+    try:
+        table = TelemetryQuery(store).flight_table()
+        created_ns, anchor_ns = store.created_ns, store.anchor_ns
+    finally:
+        store.close()
+
+    cache_path = os.path.join(out_dir, CACHE_FILE)
+    cached = _load_cache(cache_path)
+    entries, pending = {}, {}
+    for k, record in enumerate(table):
+        key = flight_key(record, created_ns)
+        plot = f"voo_{k + 1:03d}.png"
+        entry = cached.get(key)
+        if entry and entry.get("grafico") == plot and os.path.exists(os.path.join(out_dir, plot)):
+            entries[key] = entry
+        else:
+            pending[key] = (k, record, plot)
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                key: pool.submit(analyze_flight, store_path, int(record["start_row"]), int(record["stop_row"]),
+                                 chunk_rows, os.path.join(out_dir, plot), f"Voo {k + 1}")
+                for key, (k, record, plot) in pending.items()
+            }
+            for key, future in futures.items():
+                entries[key] = dict(future.result(), grafico=pending[key][2])
+        _save_cache(cache_path, entries)
+
+    rows = []
+    for k, record in enumerate(table):
+        entry = entries[flight_key(record, created_ns)]
+        start = datetime.fromtimestamp((int(record["t_start_ns"]) + anchor_ns) / 1e9)
+        rows.append(dict(entry, voo=k + 1, inicio=start.isoformat(timespec="seconds"),
+                         fim=END_REASONS[int(record["end_reason"])]))
+    with open(os.path.join(out_dir, SUMMARY_FILE), "w", newline="") as f:
+        writer = csv.DictWriter(f, SUMMARY_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows({k: round(v, 3) if isinstance(v, float) else v for k, v in r.items()} for r in rows)
+    return rows, len(pending)
@@ -0,0 +1,113 @@
+# core/column_buffer.py
+import numpy as np
+import pandas as pd
+
+
+class ColumnBuffer:
+    """Colunas NumPy pré-alocadas com crescimento por dobra (append amortizado O(1)).
+
+    view()/frame() expõem as linhas válidas sem cópia. Com `max_bytes`, ao passar
+    do limite o buffer mantém as `recent_rows` mais novas em resolução total e
+    dizima o histórico anterior pela metade (sempre preservando o pico de
+    `peak_column`), então a memória fica limitada em sessões longas.
+    """
+
+    def __init__(self, columns, capacity=1024, max_bytes=None, recent_fraction=0.5, peak_column=None):
+        self.columns = [(name, np.dtype(dtype)) for name, dtype in columns]
+        self.row_bytes = sum(dtype.itemsize for _, dtype in self.columns)
+        self.max_rows = max(16, max_bytes // self.row_bytes) if max_bytes else None
+        self.recent_rows = int(self.max_rows * recent_fraction) if self.max_rows else None
+        self.peak_column = peak_column
+
+        self._initial_capacity = max(16, capacity if self.max_rows is None else min(capacity, self.max_rows))
+        self._data = self._allocate(self._initial_capacity)
+        self.size = 0
+        self.total_rows = 0      # linhas recebidas desde o início (inclui as dizimadas)
+        self.decimated_rows = 0  # linhas no início do buffer que vêm do histórico dizimado
+        self.version = 0
+        self.epoch = 0           # muda quando linhas já entregues são reorganizadas (compactação/limpeza)
+
+    def _allocate(self, capacity):
+        return {name: np.empty(capacity, dtype=dtype) for name, dtype in self.columns}
+
+    @property
+    def capacity(self):
+        return len(next(iter(self._data.values())))
+
+    @property
+    def nbytes(self):
+        return self.capacity * self.row_bytes
+
+    def __len__(self):
+        return self.size
+
+    # ======== Escrita ========
+
+    def append(self, values):
+        """Acrescenta linhas a partir de um dicionário coluna -> array"""
+        n = len(next(iter(values.values())))
+        if not n:
+            return
+        self._reserve(self.size + n)
+        for name, _ in self.columns:
+            self._data[name][self.size:self.size + n] = values[name]
+        self.size += n
+        self.total_rows += n
+        self.version += 1
+
+        if self.max_rows and self.size > self.max_rows:
+            self._compact()
+
+    def _reserve(self, needed):
+        capacity = self.capacity
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        if self.max_rows:
+            capacity = max(needed, min(capacity, self.max_rows + self.max_rows // 2))
+        for name, dtype in self.columns:
+            grown = np.empty(capacity, dtype=dtype)
+            grown[:self.size] = self._data[name][:self.size]
+            self._data[name] = grown
+
+    def _compact(self):
+        # Histórico = tudo antes da janela recente; fica uma linha a cada duas
+        history = self.size - self.recent_rows
+        keep = np.zeros(history, dtype=bool)
+        keep[::2] = True
+        if self.peak_column:
+            keep[int(np.argmax(self._data[self.peak_column][:history]))] = True
+        kept = int(keep.sum())
+
+        for name, dtype in self.columns:
+            column = self._data[name]
+            compacted = np.empty(self.capacity, dtype=dtype)
+            compacted[:kept] = column[:history][keep]
+            compacted[kept:kept + self.recent_rows] = column[history:self.size]
+            self._data[name] = compacted  # views antigas continuam válidas
+        self.decimated_rows = kept
+        self.size = kept + self.recent_rows
+        self.epoch += 1
+
+    def clear(self):
+        # Arrays novos: views já entregues continuam intactas
+        self._data = self._allocate(self._initial_capacity)
+        self.size = 0
+        self.total_rows = 0
+        self.decimated_rows = 0
+        self.version += 1
+        self.epoch += 1
+
+    # ======== Leitura (sem cópia) ========
+
+    def view(self, name):
+        view = self._data[name][:self.size]
+        view.flags.writeable = False
+        return view
+
+    def arrays(self, columns=None):
+        return {name: self.view(name) for name in (columns or [n for n, _ in self.columns])}
+
+    def frame(self, columns=None):
+        return pd.DataFrame(self.arrays(columns), copy=False)
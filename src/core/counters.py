@@ -0,0 +1,52 @@
+# core/counters.py
+import os
+import time
+
+
+class RateCounter:
+    """Contadores de pacotes com relatório periódico de taxa (modo silencioso)"""
+
+    def __init__(self, prefix="[UDP]", interval=5.0):
+        self.prefix = prefix
+        self.interval = interval
+        self.total = 0
+        self.window = 0
+        self.started = time.monotonic()
+        self.last_report = self.started
+
+    def add(self, count=1):
+        self.total += count
+        self.window += count
+
+    def maybe_report(self, extra=""):
+        now = time.monotonic()
+        elapsed = now - self.last_report
+        if elapsed < self.interval:
+            return
+        rate = self.window / elapsed if elapsed > 0 else 0.0
+        print(f"{self.prefix} Taxa: {rate:.0f} pkt/s | Total: {self.total}{extra}", flush=True)
+        self.window = 0
+        self.last_report = now
+
+
+def udp_kernel_drops(sock):
+    """Datagramas descartados pelo kernel para este socket (Linux: /proc/net/udp).
+
+    Retorna None quando a informação não está disponível na plataforma.
+    """
+    try:
+        inode = os.fstat(sock.fileno()).st_ino
+    except OSError:
+        return None
+    for table in ("/proc/net/udp", "/proc/net/udp6"):
+        try:
+            with open(table) as f:
+                next(f)
+                for line in f:
+                    fields = line.split()
+                    # ... uid timeout inode ref pointer drops
+                    if len(fields) >= 13 and fields[9] == str(inode):
+                        return int(fields[12])
+        except OSError:
+            continue
+    return None
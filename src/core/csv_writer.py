@@ -0,0 +1,81 @@
+# core/csv_writer.py
+import csv
+import io
+import os
+
+from core.sinks import BufferedSink
+from core.packets import csv_rows
+
+
+class BufferedCSVWriter(BufferedSink):
+    """Escritor CSV de longa duração com descarga por quantidade de linhas ou por tempo.
+
+    As linhas ficam em memória e são gravadas em um único write() por descarga,
+    então quem lê o arquivo só enxerga linhas completas.
+    """
+
+    def __init__(self, path, header=None, truncate=False, flush_rows=256, flush_ms=100, fsync=False):
+        super().__init__(flush_rows, flush_ms)
+        self.path = path
+        self.fsync = fsync
+
+        flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND
+        if truncate:
+            flags |= os.O_TRUNC
+        self.fd = os.open(path, flags, 0o644)
+        self._size = os.fstat(self.fd).st_size  # bytes já gravados no arquivo
+
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+        if header and os.fstat(self.fd).st_size == 0:
+            self._writer.writerow(header)
+            self._write_pending()
+
+    # ======== Escrita ========
+
+    def write_row(self, row):
+        self._writer.writerow(row)
+        self._note_pending(1)
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.write_row(row)
+
+    def write_samples(self, samples):
+        self.write_rows(csv_rows(samples))
+
+    def tell(self):
+        """Tamanho do arquivo em bytes contando o que ainda está no buffer (linhas são ASCII)"""
+        return self._size + self._buffer.tell()
+
+    @staticmethod
+    def encoded_size(samples):
+        """Bytes que `samples` ocupariam no CSV"""
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(csv_rows(samples))
+        return buffer.tell()
+
+    def _write_pending(self):
+        data = memoryview(self._buffer.getvalue().encode("utf-8"))
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        # Em arquivo regular o write() grava o bloco inteiro de uma vez; o laço
+        # só cobre escritas parciais (ex.: disco cheio)
+        while data:
+            written = os.write(self.fd, data)
+            self._size += written
+            data = data[written:]
+        if self.fsync:
+            os.fsync(self.fd)
+
+    # ======== Encerramento ========
+
+    def close(self):
+        if self.fd is None:
+            return
+        try:
+            self.flush()
+        finally:
+            os.close(self.fd)
+            self.fd = None
@@ -0,0 +1,82 @@
+# core/dispersion.py
+import numpy as np
+
+# Probabilidade padrão da elipse de segurança
+ELLIPSE_PROBABILITY = 0.99
+
+# Pontos de queda em metros no plano local da base (x = leste, y = norte), um
+# por membro do Monte Carlo; tudo vetorizado, sem laço por voo.
+
+
+# ======== Elipse de dispersão ========
+
+def dispersion_ellipse(east, north, probability=ELLIPSE_PROBABILITY):
+    """Elipse (gaussiana 2D) que contém `probability` dos pontos de queda.
+
+    Eixos e orientação vêm dos autovetores da covariância; o fator de escala é
+    o quantil da qui-quadrado com 2 graus de liberdade, sqrt(-2 ln(1 - p)).
+    Azimute do semieixo maior em graus a partir do norte, sentido horário.
+    """
+    east, north = np.asarray(east, dtype=np.float64), np.asarray(north, dtype=np.float64)
+    ok = np.isfinite(east) & np.isfinite(north)
+    east, north = east[ok], north[ok]
+    center = (float(east.mean()), float(north.mean())) if len(east) else (0.0, 0.0)
+    cov = np.cov(east, north) if len(east) > 1 else np.zeros((2, 2))
+    values, vectors = np.linalg.eigh(cov)           # autovalores em ordem crescente
+    scale = np.sqrt(-2 * np.log(1 - probability))
+    major = vectors[:, 1]
+    ellipse = {
+        "centro_leste_m": center[0],
+        "centro_norte_m": center[1],
+        "semi_maior_m": float(scale * np.sqrt(max(values[1], 0.0))),
+        "semi_menor_m": float(scale * np.sqrt(max(values[0], 0.0))),
+        "azimute_graus": float(np.degrees(np.arctan2(major[0], major[1])) % 180),
+        "probabilidade": probability,
+    }
+    ellipse["dentro"] = float(inside_ellipse(east, north, ellipse).mean()) if len(east) else float("nan")
+    return ellipse
+
+
+def _axes(ellipse):
+    heading = np.radians(ellipse["azimute_graus"])
+    return np.array([np.sin(heading), np.cos(heading)]), np.array([np.cos(heading), -np.sin(heading)])
+
+
+def inside_ellipse(east, north, ellipse):
+    """Máscara dos pontos dentro da elipse"""
+    major, minor = _axes(ellipse)
+    de = np.asarray(east) - ellipse["centro_leste_m"]
+    dn = np.asarray(north) - ellipse["centro_norte_m"]
+    a = max(ellipse["semi_maior_m"], 1e-12)
+    b = max(ellipse["semi_menor_m"], 1e-12)
+    return ((de * major[0] + dn * major[1]) / a) ** 2 + ((de * minor[0] + dn * minor[1]) / b) ** 2 <= 1
+
+
+def ellipse_points(ellipse, points=361):
+    """Contorno da elipse (leste, norte), p.ex. para gráficos"""
+    major, minor = _axes(ellipse)
+    angle = np.linspace(0, 2 * np.pi, points)
+    u = ellipse["semi_maior_m"] * np.cos(angle)
+    v = ellipse["semi_menor_m"] * np.sin(angle)
+    return (ellipse["centro_leste_m"] + u * major[0] + v * minor[0],
+            ellipse["centro_norte_m"] + u * major[1] + v * minor[1])
+
+
+def safety_radius(ellipse):
+    """Maior distância (m) da base até o contorno da elipse: raio da zona de exclusão"""
+    east, north = ellipse_points(ellipse, 3601)
+    return float(np.hypot(east, north).max())
+
+
+# ======== Distribuições ========
+
+def distribution(values):
+    """Média, desvio e percentis de uma amostra (NaN ignorado)"""
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    if not len(values):
+        return {"media": float("nan"), "desvio": float("nan"), "min": float("nan"),
+                "p01": float("nan"), "p50": float("nan"), "p99": float("nan"), "max": float("nan")}
+    p01, p50, p99 = np.percentile(values, [1, 50, 99])
+    return {"media": float(values.mean()), "desvio": float(values.std()), "min": float(values.min()),
+            "p01": float(p01), "p50": float(p50), "p99": float(p99), "max": float(values.max())}
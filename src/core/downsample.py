@@ -0,0 +1,141 @@
+# core/downsample.py
+import numpy as np
+
+# Pontos por série entregues aos gráficos (~largura em pixels de um gráfico)
+DEFAULT_POINTS = 2000
+
+
+def _reduce_rows(rows, offset):
+    """Mínimo e máximo de cada linha de `rows` (baldes completos); NaN é ignorado"""
+    lo = np.where(np.isnan(rows), np.inf, rows)
+    hi = np.where(np.isnan(rows), -np.inf, rows)
+    min_arg = lo.argmin(axis=1)
+    max_arg = hi.argmax(axis=1)
+    base = offset + np.arange(len(rows)) * rows.shape[1]
+    r = np.arange(len(rows))
+    return base + min_arg, lo[r, min_arg], base + max_arg, hi[r, max_arg]
+
+
+class MinMaxLOD:
+    """Nível de detalhe incremental por baldes de mínimo/máximo.
+
+    A série é dividida em baldes de `bucket` amostras e de cada um ficam só os
+    índices do mínimo e do máximo, então picos como o apogeu nunca somem.
+    extend() recebe apenas as amostras novas (custo proporcional a elas); quando
+    o número de baldes passa de ~points/2 eles são fundidos aos pares e o
+    tamanho do balde dobra, mantendo o resultado em torno de `points` pontos.
+    """
+
+    def __init__(self, points=DEFAULT_POINTS):
+        self.max_buckets = max(2, points // 2)
+        self.bucket = 1
+        self.n = 0
+        self.epoch = None
+        # Baldes fechados
+        self._min_idx = np.empty(0, dtype=np.int64)
+        self._min_val = np.empty(0)
+        self._max_idx = np.empty(0, dtype=np.int64)
+        self._max_val = np.empty(0)
+        # Balde aberto (resumo das amostras já vistas dele)
+        self._tail = None
+        self._tail_count = 0
+
+    def __len__(self):
+        return len(self._min_idx)
+
+    # ======== Atualização ========
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        k = len(values)
+        if not k:
+            return
+        # Ajusta o balde antes de fechar os novos: nunca materializa mais de ~2x o limite
+        while len(self) + (self._tail_count + k) // self.bucket > self.max_buckets:
+            self._double()
+
+        start = self.n
+        need = self.bucket - self._tail_count
+        head = values[:need]
+        self._merge_tail(head, start)
+        if self._tail_count == self.bucket:
+            self._seal_tail()
+
+        rest = values[len(head):]
+        full = len(rest) // self.bucket * self.bucket
+        if full:
+            rows = rest[:full].reshape(-1, self.bucket)
+            min_idx, min_val, max_idx, max_val = _reduce_rows(rows, start + len(head))
+            self._append(min_idx, min_val, max_idx, max_val)
+        if full < len(rest):
+            self._merge_tail(rest[full:], start + len(head) + full)
+        self.n += k
+
+    def _merge_tail(self, values, offset):
+        if not len(values):
+            return
+        lo = np.where(np.isnan(values), np.inf, values)
+        hi = np.where(np.isnan(values), -np.inf, values)
+        i_min, i_max = int(lo.argmin()), int(hi.argmax())
+        summary = [offset + i_min, lo[i_min], offset + i_max, hi[i_max]]
+        if self._tail is not None:
+            old = self._tail
+            if old[1] <= summary[1]:
+                summary[0:2] = old[0:2]
+            if old[3] >= summary[3]:
+                summary[2:4] = old[2:4]
+        self._tail = summary
+        self._tail_count += len(values)
+
+    def _seal_tail(self):
+        t = self._tail
+        self._append(np.array([t[0]]), np.array([t[1]]), np.array([t[2]]), np.array([t[3]]))
+        self._tail = None
+        self._tail_count = 0
+
+    def _append(self, min_idx, min_val, max_idx, max_val):
+        self._min_idx = np.concatenate([self._min_idx, min_idx])
+        self._min_val = np.concatenate([self._min_val, min_val])
+        self._max_idx = np.concatenate([self._max_idx, max_idx])
+        self._max_val = np.concatenate([self._max_val, max_val])
+
+    def _double(self):
+        """Funde os baldes fechados aos pares; um balde ímpar no fim volta a ser o aberto"""
+        if len(self) % 2:
+            t = [self._min_idx[-1], self._min_val[-1], self._max_idx[-1], self._max_val[-1]]
+            if self._tail is not None:
+                old = self._tail
+                if old[1] < t[1]:
+                    t[0:2] = old[0:2]
+                if old[3] > t[3]:
+                    t[2:4] = old[2:4]
+            self._tail = t
+            self._tail_count += self.bucket
+            self._min_idx, self._min_val = self._min_idx[:-1], self._min_val[:-1]
+            self._max_idx, self._max_val = self._max_idx[:-1], self._max_val[:-1]
+
+        pairs = np.arange(0, len(self), 2)
+        if len(pairs):
+            pick_min = pairs + (self._min_val[pairs + 1] < self._min_val[pairs])
+            pick_max = pairs + (self._max_val[pairs + 1] > self._max_val[pairs])
+            self._min_idx, self._min_val = self._min_idx[pick_min], self._min_val[pick_min]
+            self._max_idx, self._max_val = self._max_idx[pick_max], self._max_val[pick_max]
+        self.bucket *= 2
+
+    # ======== Leitura ========
+
+    def indices(self):
+        """Índices ordenados a desenhar: mín/máx de cada balde, mais a primeira e a última amostra"""
+        if not self.n:
+            return np.empty(0, dtype=np.int64)
+        parts = [self._min_idx, self._max_idx, [0, self.n - 1]]
+        if self._tail is not None:
+            parts.append([self._tail[0], self._tail[2]])
+        return np.unique(np.concatenate(parts).astype(np.int64))
+
+
+def minmax_indices(values, points=DEFAULT_POINTS):
+    """Versão sem estado: índices mín/máx de uma série inteira"""
+    lod = MinMaxLOD(points)
+    lod.extend(values)
+    return lod.indices()
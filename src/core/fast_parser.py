@@ -0,0 +1,136 @@
+# core/fast_parser.py
+import re
+
+import numpy as np
+
+# Bytes aceitos numa linha numérica do CSV: os mesmos campos que float() aceita,
+# incluindo espaços em volta dos números e nan/inf/infinity (qualquer caixa)
+_NUMERIC = np.zeros(256, dtype=bool)
+_NUMERIC[np.frombuffer(b"0123456789+-.eE,\r \tnNaAiIfFtTyY", dtype=np.uint8)] = True
+_NEWLINE = ord("\n")
+_COMMA = ord(",")
+_EMPTY_FIELD = re.compile(rb"(?m)^[ \t]*,|,[ \t]*,|,[ \t]*$")
+
+
+def _has_empty_field(data):
+    if b" " in data or b"\t" in data:
+        return True  # campo só com espaços: decide a regex
+    return b",," in data or b",\n" in data or b"\n," in data or data.startswith(b",")
+
+
+class ParseStats:
+    """Contadores de diagnóstico do parser (acumulam entre chamadas)"""
+
+    def __init__(self):
+        self.rows = 0
+        self.malformed = 0
+        self.fallbacks = 0  # blocos que precisaram do caminho linha a linha
+
+    def as_dict(self):
+        return {"rows": self.rows, "malformed": self.malformed, "fallbacks": self.fallbacks}
+
+
+def _per_line(positions, ends):
+    """Quantas posições (bytes marcados) caem em cada linha"""
+    return np.bincount(np.searchsorted(ends, positions), minlength=len(ends))
+
+
+def _parse_lines(data, ncols):
+    """Caminho lento e exato, só para blocos em que o caminho vetorizado falhou"""
+    rows = []
+    malformed = 0
+    for line in data.split(b"\n"):
+        line = line.strip()
+        if not line:
+            continue
+        parts = line.split(b",")
+        if len(parts) != ncols:
+            malformed += 1
+            continue
+        try:
+            rows.append([float(p.strip()) for p in parts])
+        except ValueError:
+            malformed += 1
+    return np.array(rows, dtype=np.float64).reshape(-1, ncols), malformed
+
+
+def parse_csv_chunk(data, ncols=4, stats=None, header=b"lat,lon,alt,vel"):
+    """Converte um trecho de CSV (linhas completas, em bytes) num array float64 (n, ncols).
+
+    A validação é feita com NumPy sobre os bytes: linhas com número errado de
+    campos, campos vazios ou caracteres não numéricos são descartadas e
+    contadas em `stats.malformed`; um cabeçalho no início do trecho é apenas
+    pulado. Aceita o mesmo que float() campo a campo: espaços em volta dos
+    números ("1.0, 2.0") e nan/inf; tokens estranhos com esses caracteres caem
+    no caminho linha a linha, que decide com float(). As linhas válidas viram
+    floats numa única chamada (np.fromstring).
+    """
+    empty = np.empty((0, ncols), dtype=np.float64)
+    if header and data.startswith(header):
+        data = data[data.find(b"\n") + 1:] if b"\n" in data else b""
+    if not data:
+        return empty
+    if not data.endswith(b"\n"):
+        data += b"\n"
+
+    buf = np.frombuffer(data, dtype=np.uint8)
+    newline = buf == _NEWLINE
+    ends = np.flatnonzero(newline)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+
+    # Contagens por linha a partir das posições marcadas (poucas, exceto vírgulas)
+    commas = _per_line(np.flatnonzero(buf == _COMMA), ends)
+    bad_pos = np.flatnonzero(~(_NUMERIC[buf] | newline))
+    cr_pos = np.flatnonzero(buf == ord("\r"))
+    # Campo vazio: vírgula no início da linha, vírgula dupla ou vírgula antes do fim
+    stripped = data.replace(b"\r", b"") if len(cr_pos) else data
+    empty_pos = [m.start() for m in _EMPTY_FIELD.finditer(stripped)] if _has_empty_field(stripped) else []
+
+    content = ends - starts - _per_line(cr_pos, ends)
+    if b" " in data or b"\t" in data:
+        # Linha só com espaços é linha em branco, como no strip() do laço antigo
+        content -= _per_line(np.flatnonzero((buf == ord(" ")) | (buf == ord("\t"))), ends)
+    bad = _per_line(bad_pos, ends)
+    blank = content == 0
+    valid = ~blank & (commas == ncols - 1) & (bad == 0)
+    malformed = int((~blank & ~valid).sum())
+    if empty_pos:
+        stripped_buf = np.frombuffer(stripped, dtype=np.uint8)
+        stripped_ends = np.flatnonzero(stripped_buf == _NEWLINE)
+        empty_lines = _per_line(np.asarray(empty_pos), stripped_ends) > 0
+        malformed += int((valid & empty_lines).sum())
+        valid &= ~empty_lines
+    n_valid = int(valid.sum())
+
+    if n_valid == 0:
+        result = empty
+    else:
+        if n_valid == len(valid):
+            lines = data
+        else:
+            # Recorta fora só as linhas inválidas (em geral poucas)
+            pieces = []
+            prev = 0
+            for i in np.flatnonzero(~valid):
+                pieces.append(data[prev:starts[i]])
+                prev = ends[i] + 1
+            pieces.append(data[prev:])
+            lines = b"".join(pieces)
+        text = lines.replace(b"\r", b"").replace(b"\n", b",")
+        try:
+            values = np.fromstring(text, dtype=np.float64, sep=",")
+        except ValueError:
+            values = None
+        if values is not None and len(values) == n_valid * ncols:
+            result = values.reshape(n_valid, ncols)
+        else:
+            # Token com caracteres válidos mas número inválido (ex.: "1.2.3")
+            result, extra = _parse_lines(lines, ncols)
+            malformed += extra
+            if stats is not None:
+                stats.fallbacks += 1
+
+    if stats is not None:
+        stats.rows += len(result)
+        stats.malformed += malformed
+    return result
@@ -0,0 +1,189 @@
+# core/feed.py
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.store import TelemetryStore, store_exists, CSV_COLUMNS
+from core.query import TelemetryQuery
+from core.ring_buffer import RingReader
+from core.tail import CSVTailer
+from core.column_buffer import ColumnBuffer
+from core.fast_parser import parse_csv_chunk, ParseStats
+from core.metrics import FlightMetrics
+from core.timebase import fill_missing
+
+FEED_COLUMNS = [('lat', 'f8'), ('lon', 'f8'), ('alt', 'f8'), ('vel', 'f8'), ('timestamp', 'datetime64[ns]')]
+TIME_COLUMN = 't_rx_ns'
+
+
+class FeedSnapshot:
+    """Visão imutável do feed numa versão: as colunas são views somente leitura"""
+
+    def __init__(self, version, arrays, total_rows, source, epoch=0, metrics=None):
+        self.version = version
+        self.epoch = epoch  # igual entre versões => as linhas antigas não mudaram, só vieram novas
+        self.metrics = metrics or {}
+        self.arrays = arrays
+        self.total_rows = total_rows
+        self.source = source
+
+    def __len__(self):
+        return len(self.arrays['alt'])
+
+    def frame(self):
+        return pd.DataFrame(self.arrays, copy=False)
+
+
+class TelemetryFeed:
+    """Ingestão única por processo: acompanha store, ring ou CSV e guarda um buffer compartilhado.
+
+    Todas as sessões do dashboard chamam poll(); só uma faz a leitura por vez e
+    no máximo uma vez a cada `min_interval`, as demais só pegam o snapshot. As
+    versões só aumentam, então cada sessão sabe se há dados novos.
+    """
+
+    def __init__(self, store_path, csv_path, max_bytes=None, min_interval=0.05):
+        self.store_path = store_path
+        self.csv_path = csv_path
+        self.min_interval = min_interval
+        self.buffer = ColumnBuffer(FEED_COLUMNS, max_bytes=max_bytes, peak_column='alt')
+        self.metrics = FlightMetrics()  # atualizadas só com as amostras novas
+
+        self.store = None
+        self.query = None         # consultas por tempo/voo sobre o store (índice de tempo)
+        self.ring = None
+        self.tailer = None
+        self.source = None        # 'store', 'csv' ou None (sem dados)
+        self.rows = 0             # linhas do store (ou bytes do CSV) já consumidas
+        self.anchor_ns = 0        # relógio de parede - monotônico do receptor
+        self.last_t_ns = None     # último carimbo (monotônico) entregue ao buffer
+        self.last_poll = 0.0
+        self.last_update = time.time()
+        self.error = None
+        self.parse_stats = ParseStats()
+
+        self._lock = threading.Lock()
+        self._snapshot = self._make_snapshot()
+
+    # ======== Snapshots ========
+
+    @property
+    def version(self):
+        return self._snapshot.version
+
+    def snapshot(self):
+        return self._snapshot
+
+    def _make_snapshot(self):
+        return FeedSnapshot(self.buffer.version, self.buffer.arrays(), self.buffer.total_rows, self.source,
+                            self.buffer.epoch, self.metrics.as_dict())
+
+    # ======== Atualização ========
+
+    def poll(self):
+        """Lê dados novos da fonte (se o intervalo mínimo passou) e devolve o snapshot atual"""
+        now = time.monotonic()
+        if now - self.last_poll < self.min_interval:
+            return self._snapshot
+        if not self._lock.acquire(blocking=False):
+            return self._snapshot  # outra sessão já está lendo
+        try:
+            self.last_poll = now
+            self.error = None
+            self._poll_source()
+            if self.buffer.version != self._snapshot.version:
+                self._snapshot = self._make_snapshot()
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            self._lock.release()
+        return self._snapshot
+
+    def _switch(self, source):
+        if self.source != source:
+            self.source = source
+            self._reset()
+
+    def _reset(self):
+        self.buffer.clear()
+        self.metrics.reset()
+        self.rows = 0
+        self.last_t_ns = None
+
+    def _append(self, new_cols):
+        """Acrescenta amostras com o carimbo de recepção real (t_rx_ns + âncora = horário de parede).
+
+        Sem carimbo (CSV legado, store antigo) vale a grade nominal a partir do
+        último carimbo: o tempo nunca depende de quando o dashboard leu o lote.
+        """
+        n = len(new_cols['alt'])
+        t_ns = fill_missing(new_cols.get(TIME_COLUMN, np.full(n, -1, dtype=np.int64)), self.last_t_ns)
+        self.last_t_ns = int(t_ns[-1])
+        new_cols = dict(new_cols)
+        new_cols['timestamp'] = (t_ns + self.anchor_ns).view('datetime64[ns]')
+        self.buffer.append(new_cols)
+        self.metrics.update(new_cols['alt'], new_cols['vel'], t_ns, new_cols['lat'], new_cols['lon'])
+        self.last_update = time.time()
+
+    def _poll_source(self):
+        if store_exists(self.store_path):
+            self._switch('store')
+            self._poll_store()
+        elif os.path.exists(self.csv_path):
+            self._switch('csv')
+            self._poll_csv()
+        else:
+            self._switch(None)
+
+    def _poll_store(self):
+        """Histórico pelo store; com o ring ativo, as amostras mais novas vêm da memória compartilhada"""
+        if self.store is None:
+            self.store = TelemetryStore(self.store_path)
+            self.query = TelemetryQuery(self.store)
+        elif self.store.refresh():
+            self._reset()  # store recriado (modo teste)
+            self.query.reset()
+        self.anchor_ns = self.store.anchor_ns
+
+        if self.rows < self.store.rows:
+            columns = CSV_COLUMNS + [TIME_COLUMN] if TIME_COLUMN in self.store.names else CSV_COLUMNS
+            new_cols = self.store.read(start=self.rows, columns=columns)
+            self.rows = self.store.rows
+            self._append(new_cols)
+
+        ring = self._live_ring()
+        if ring is None:
+            return
+        seq = self.rows - ring.base_rows
+        if seq < ring.oldest() or seq > ring.head:
+            return
+        samples, _, lost = ring.read_since(seq)
+        if not lost and len(samples):
+            self.rows += len(samples)
+            self._append({c: samples[c] for c in CSV_COLUMNS + [TIME_COLUMN]})
+
+    def _live_ring(self):
+        if self.ring is not None and self.ring.closed:
+            self.ring.close()
+            self.ring = None
+        if self.ring is None:
+            self.ring = RingReader.try_attach()
+        return self.ring
+
+    def _poll_csv(self):
+        """Só os bytes novos do CSV a partir do último offset consumido"""
+        if self.tailer is None:
+            self.tailer = CSVTailer(self.csv_path)
+            self.anchor_ns = time.time_ns() - time.monotonic_ns()
+
+        chunk, reset = self.tailer.read_new()
+        if reset:
+            self._reset()  # arquivo truncado ou substituído (modo teste)
+
+        new_rows = parse_csv_chunk(chunk, len(CSV_COLUMNS), self.parse_stats)
+        self.rows = self.tailer.offset
+        if len(new_rows):
+            self._append({c: new_rows[:, i] for i, c in enumerate(CSV_COLUMNS)})
@@ -0,0 +1,215 @@
+# core/flights.py
+import os
+import struct
+import sys
+
+import numpy as np
+
+from core.sinks import BufferedSink
+from core.store import _pwrite
+
+# ======== Formato ========
+# flights.bin, no diretório do store: cabeçalho 'TLMF' | versão u16 | reservado u16,
+# seguido de um registro FLIGHT_DTYPE por voo, na ordem das linhas. Voos
+# encerrados não mudam mais; só o registro do voo aberto é regravado no lugar.
+# As linhas são as do store; os bytes, os do CSV espelho (-1 sem CSV).
+FLIGHTS_FILE = "flights.bin"
+FLIGHTS_MAGIC = b"TLMF"
+FLIGHTS_VERSION = 1
+FLIGHTS_HEADER = struct.Struct("<4sHH")
+
+FLIGHT_DTYPE = np.dtype([
+    ("start_row", "<i8"), ("stop_row", "<i8"),
+    ("csv_start", "<i8"), ("csv_stop", "<i8"),
+    ("t_start_ns", "<i8"), ("t_end_ns", "<i8"),
+    ("pad_alt", "<f8"), ("max_alt", "<f8"), ("max_vel", "<f8"),
+    ("apogee_row", "<i8"),
+    ("end_reason", "u1"), ("reserved", "V7"),
+])
+END_OPEN, END_SIGNAL, END_GAP, END_PAD = range(4)
+END_REASONS = {END_OPEN: "em andamento", END_SIGNAL: "END", END_GAP: "lacuna", END_PAD: "pouso"}
+
+# ======== Critérios de segmentação ========
+FLIGHT_GAP_NS = 10_000_000_000   # intervalo sem amostras que separa dois voos
+PAD_MIN_APOGEE_M = 5.0           # subida mínima acima da base para contar como voo
+PAD_TOLERANCE_M = 1.0            # de volta a até 1 m da base depois de subir = pouso
+
+
+def flight_breaks(step, gap_ns=FLIGHT_GAP_NS):
+    """Máscara dos passos de tempo que separam voos: lacuna maior que gap_ns ou relógio voltando.
+
+    Regra única da segmentação na ingestão e da varredura de stores sem índice.
+    """
+    return (step > gap_ns) | (step < 0)
+
+
+def flights_path(store_path):
+    return os.path.join(store_path, FLIGHTS_FILE)
+
+
+def read_flights(store_path):
+    """Registros do índice de voos (FLIGHT_DTYPE), ou None se o store não tem índice"""
+    path = flights_path(store_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        raw = f.read()
+    if len(raw) < FLIGHTS_HEADER.size:
+        return np.empty(0, dtype=FLIGHT_DTYPE)
+    magic, version, _ = FLIGHTS_HEADER.unpack_from(raw)
+    if magic != FLIGHTS_MAGIC or version != FLIGHTS_VERSION:
+        raise ValueError(f"Índice de voos inválido em {path}")
+    count = (len(raw) - FLIGHTS_HEADER.size) // FLIGHT_DTYPE.itemsize
+    return np.frombuffer(raw, dtype=FLIGHT_DTYPE, count=count, offset=FLIGHTS_HEADER.size).copy()
+
+
+class FlightIndexWriter(BufferedSink):
+    """Segmenta as amostras em voos durante a ingestão e mantém o índice flights.bin.
+
+    Um voo termina no sinal END, numa lacuna de FLIGHT_GAP_NS sem amostras (ou
+    relógio voltando) ou quando a altitude volta à base depois de subir
+    PAD_MIN_APOGEE_M; a amostra seguinte abre o próximo voo. Cada registro traz
+    as linhas e os bytes do voo, início/fim e estatísticas (apogeu, velocidade
+    máxima). Deve vir antes do CSV no SinkGroup: o offset em bytes de uma linha
+    é o tamanho do CSV antes de ela ser escrita.
+    """
+
+    def __init__(self, store_path, rows=0, truncate=False, csv_writer=None, flush_ms=100):
+        # Descarga só por tempo, no END ou no fechamento: uma descarga por contagem
+        # no meio de write_samples veria o CSV ainda sem o lote atual
+        super().__init__(sys.maxsize, flush_ms)
+        self.path = flights_path(store_path)
+        self.csv_writer = csv_writer
+        self.rows = rows        # linha do store da próxima amostra
+        self.current = None     # registro do voo aberto
+        self._closed = []       # voos encerrados ainda não gravados
+
+        records = None if truncate else read_flights(store_path)
+        if records is None:
+            records = np.empty(0, dtype=FLIGHT_DTYPE)
+            self._replace(records)
+        else:
+            # Descarta o que passa das linhas confirmadas do store (queda no meio de uma descarga)
+            kept = records[records["start_row"] < rows]
+            kept["stop_row"] = np.minimum(kept["stop_row"], rows)
+            if len(kept) != len(records) or not np.array_equal(kept, records):
+                self._replace(kept)
+            records = kept
+        self.count = len(records)
+        if self.count and records[-1]["end_reason"] == END_OPEN:
+            self.current = records[-1].copy()
+            self.count -= 1
+        self.fd = os.open(self.path, os.O_RDWR)
+
+    def _replace(self, records):
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(FLIGHTS_HEADER.pack(FLIGHTS_MAGIC, FLIGHTS_VERSION, 0) + records.tobytes())
+        os.replace(tmp, self.path)
+
+    # ======== Segmentação ========
+
+    def write_samples(self, samples):
+        n = len(samples)
+        if not n:
+            return
+        t = samples["t_rx_ns"]
+        alt = samples["alt"]
+        csv_base = self.csv_writer.tell() if self.csv_writer else -1
+        i = 0
+        while i < n:
+            if self.current is None:
+                self._open(samples, i, self._csv_offset(samples, i, csv_base))
+            cut, reason = self._boundary(t, alt, i)
+            self._extend(samples, i, cut)
+            if reason != END_OPEN:
+                self._close(reason, self._csv_offset(samples, cut, csv_base))
+            i = cut
+        self.rows += n
+        self._note_pending(n)
+
+    def mark_end(self):
+        """Sinal END: encerra o voo aberto (se houver) e grava o índice na hora"""
+        if self.current is not None:
+            self._close(END_SIGNAL, self.csv_writer.tell() if self.csv_writer else -1)
+        self._note_pending(1)
+        self.flush()
+
+    def _boundary(self, t, alt, i):
+        """(fim exclusivo do voo atual dentro do lote a partir de i, motivo ou END_OPEN)"""
+        cur = self.current
+        n = len(t)
+        # Lacuna: entre a última amostra do voo e a seguinte
+        prev = cur["t_end_ns"] if cur["stop_row"] > cur["start_row"] else t[i]
+        step = np.diff(t[i:], prepend=prev)
+        gaps = np.flatnonzero(flight_breaks(step))
+        gap = i + int(gaps[0]) if len(gaps) else n
+
+        # Pouso: altitude de volta à base depois de passar da subida mínima
+        peak = np.maximum.accumulate(alt[i:gap])
+        if cur["stop_row"] > cur["start_row"]:
+            peak = np.maximum(peak, cur["max_alt"])
+        landed = np.flatnonzero((peak - cur["pad_alt"] >= PAD_MIN_APOGEE_M) &
+                                (alt[i:gap] <= cur["pad_alt"] + PAD_TOLERANCE_M))
+        if len(landed):
+            return i + int(landed[0]) + 1, END_PAD
+        if gap < n:
+            return gap, END_GAP
+        return n, END_OPEN
+
+    def _open(self, samples, i, csv_start):
+        rec = np.zeros((), dtype=FLIGHT_DTYPE)
+        rec["start_row"] = rec["stop_row"] = self.rows + i
+        rec["csv_start"] = rec["csv_stop"] = csv_start
+        rec["t_start_ns"] = rec["t_end_ns"] = samples["t_rx_ns"][i]
+        rec["pad_alt"] = samples["alt"][i]
+        rec["max_alt"] = rec["max_vel"] = -np.inf
+        rec["apogee_row"] = self.rows + i
+        self.current = rec
+
+    def _extend(self, samples, i, cut):
+        if cut <= i:
+            return
+        cur = self.current
+        alt = samples["alt"][i:cut]
+        peak = int(np.argmax(alt))
+        if alt[peak] > cur["max_alt"]:
+            cur["max_alt"] = alt[peak]
+            cur["apogee_row"] = self.rows + i + peak
+        cur["max_vel"] = max(cur["max_vel"], samples["vel"][i:cut].max())
+        cur["stop_row"] = self.rows + cut
+        cur["t_end_ns"] = samples["t_rx_ns"][cut - 1]
+
+    def _close(self, reason, csv_stop):
+        self.current["end_reason"] = reason
+        self.current["csv_stop"] = csv_stop
+        self._closed.append(self.current)
+        self.current = None
+
+    def _csv_offset(self, samples, i, csv_base):
+        """Byte do CSV onde começa a amostra i do lote (o lote ainda não foi escrito nele)"""
+        if csv_base < 0 or i == 0:
+            return csv_base
+        return csv_base + self.csv_writer.encoded_size(samples[:i])
+
+    # ======== Descarga ========
+
+    def _write_pending(self):
+        size = FLIGHT_DTYPE.itemsize
+        for rec in self._closed:
+            _pwrite(self.fd, rec.tobytes(), FLIGHTS_HEADER.size + self.count * size)
+            self.count += 1
+        self._closed = []
+        if self.current is not None:
+            if self.csv_writer:
+                self.current["csv_stop"] = self.csv_writer.tell()
+            _pwrite(self.fd, self.current.tobytes(), FLIGHTS_HEADER.size + self.count * size)
+
+    def close(self):
+        if self.fd is None:
+            return
+        try:
+            self.flush()
+        finally:
+            os.close(self.fd)
+            self.fd = None
@@ -0,0 +1,314 @@
+# core/geodesy.py
+import numpy as np
+
+# ======== Elipsoide WGS84 ========
+WGS84_A = 6378137.0                     # semieixo maior (m)
+WGS84_F = 1 / 298.257223563             # achatamento
+WGS84_B = WGS84_A * (1 - WGS84_F)       # semieixo menor (m)
+WGS84_E2 = WGS84_F * (2 - WGS84_F)      # excentricidade ao quadrado
+WGS84_EP2 = WGS84_E2 / (1 - WGS84_E2)   # segunda excentricidade ao quadrado
+EARTH_RADIUS = 6371008.8                # raio médio (m), para haversine
+
+# Todas as funções aceitam escalares ou arrays (graus e metros) e devolvem arrays
+# do mesmo formato, sem laço em Python.
+
+
+# ======== Geodésicas <-> ECEF ========
+
+def geodetic_to_ecef(lat, lon, alt=0.0):
+    """(x, y, z) em metros no referencial centrado na Terra"""
+    lat, lon = np.radians(lat), np.radians(lon)
+    alt = np.asarray(alt, dtype=np.float64)
+    sin_lat, cos_lat = np.sin(lat), np.cos(lat)
+    n = WGS84_A / np.sqrt(1 - WGS84_E2 * sin_lat ** 2)
+    return ((n + alt) * cos_lat * np.cos(lon),
+            (n + alt) * cos_lat * np.sin(lon),
+            (n * (1 - WGS84_E2) + alt) * sin_lat)
+
+
+def ecef_to_geodetic(x, y, z):
+    """(lat, lon, alt) a partir do ECEF; forma fechada de Heikkinen (sem iteração, erro < 1 mm)"""
+    x, y, z = (np.asarray(v, dtype=np.float64) for v in (x, y, z))
+    a2, b2 = WGS84_A ** 2, WGS84_B ** 2
+    p = np.hypot(x, y)
+    f = 54 * b2 * z ** 2
+    g = p ** 2 + (1 - WGS84_E2) * z ** 2 - WGS84_E2 * (a2 - b2)
+    c = WGS84_E2 ** 2 * f * p ** 2 / g ** 3
+    s = np.cbrt(1 + c + np.sqrt(c ** 2 + 2 * c))
+    k = s + 1 + 1 / s
+    pp = f / (3 * k ** 2 * g ** 2)
+    q = np.sqrt(1 + 2 * WGS84_E2 ** 2 * pp)
+    r0 = (-pp * WGS84_E2 * p / (1 + q)
+          + np.sqrt(a2 / 2 * (1 + 1 / q) - pp * (1 - WGS84_E2) * z ** 2 / (q * (1 + q)) - pp * p ** 2 / 2))
+    u = np.hypot(p - WGS84_E2 * r0, z)
+    v = np.sqrt((p - WGS84_E2 * r0) ** 2 + (1 - WGS84_E2) * z ** 2)
+    z0 = b2 * z / (WGS84_A * v)
+    return (np.degrees(np.arctan2(z + WGS84_EP2 * z0, p)),
+            np.degrees(np.arctan2(y, x)),
+            u * (1 - b2 / (WGS84_A * v)))
+
+
+# ======== Plano local (ENU) ========
+
+class LocalTangentPlane:
+    """Plano local leste-norte-cima (ENU) com origem fixa, p.ex. a base de lançamento.
+
+    Senos/cossenos da origem e sua posição ECEF são calculados uma vez; as
+    conversões depois são só aritmética vetorizada.
+    """
+
+    def __init__(self, lat0, lon0, alt0=0.0):
+        self.lat0, self.lon0, self.alt0 = float(lat0), float(lon0), float(alt0)
+        lat, lon = np.radians(self.lat0), np.radians(self.lon0)
+        self._sin_lat, self._cos_lat = np.sin(lat), np.cos(lat)
+        self._sin_lon, self._cos_lon = np.sin(lon), np.cos(lon)
+        self._origin = np.array(geodetic_to_ecef(self.lat0, self.lon0, self.alt0))
+
+    def from_geodetic(self, lat, lon, alt=None):
+        """(leste, norte, cima) em metros; sem `alt`, os pontos ficam na altitude da origem"""
+        x, y, z = geodetic_to_ecef(lat, lon, self.alt0 if alt is None else alt)
+        dx, dy, dz = x - self._origin[0], y - self._origin[1], z - self._origin[2]
+        east = -self._sin_lon * dx + self._cos_lon * dy
+        t = self._cos_lon * dx + self._sin_lon * dy
+        north = -self._sin_lat * t + self._cos_lat * dz
+        up = self._cos_lat * t + self._sin_lat * dz
+        return east, north, up
+
+    def to_geodetic(self, east, north, up=0.0):
+        """(lat, lon, alt) de pontos dados em metros no plano local"""
+        east, north, up = (np.asarray(v, dtype=np.float64) for v in (east, north, up))
+        t = -self._sin_lat * north + self._cos_lat * up
+        x = self._origin[0] - self._sin_lon * east + self._cos_lon * t
+        y = self._origin[1] + self._cos_lon * east + self._sin_lon * t
+        z = self._origin[2] + self._cos_lat * north + self._sin_lat * up
+        return ecef_to_geodetic(x, y, z)
+
+
+def geodetic_to_enu(lat, lon, alt, lat0, lon0, alt0=0.0):
+    return LocalTangentPlane(lat0, lon0, alt0).from_geodetic(lat, lon, alt)
+
+
+def enu_to_geodetic(east, north, up, lat0, lon0, alt0=0.0):
+    return LocalTangentPlane(lat0, lon0, alt0).to_geodetic(east, north, up)
+
+
+# ======== Distâncias ========
+
+def haversine(lat1, lon1, lat2, lon2, radius=EARTH_RADIUS):
+    """Distância no círculo máximo (m), esfera de raio médio; erro até ~0,5% do elipsoide"""
+    lat1, lon1, lat2, lon2 = (np.radians(v) for v in (lat1, lon1, lat2, lon2))
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * radius * np.arcsin(np.sqrt(np.minimum(h, 1.0)))
+
+
+def vincenty(lat1, lon1, lat2, lon2, tol=1e-12, max_iter=200):
+    """Distância geodésica (m) no elipsoide WGS84, fórmula inversa de Vincenty.
+
+    Itera todos os pares juntos até o maior erro ficar abaixo de `tol`; pares
+    quase antípodas que não convergem viram NaN.
+    """
+    lat1, lon1, lat2, lon2 = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in (lat1, lon1, lat2, lon2)))
+    f = WGS84_F
+    u1 = np.arctan((1 - f) * np.tan(np.radians(lat1)))
+    u2 = np.arctan((1 - f) * np.tan(np.radians(lat2)))
+    sin_u1, cos_u1, sin_u2, cos_u2 = np.sin(u1), np.cos(u1), np.sin(u2), np.cos(u2)
+    big_l = np.radians(lon2 - lon1)
+    lam = big_l.copy()
+    converged = np.zeros(lam.shape, dtype=bool)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for _ in range(max_iter):
+            sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+            sin_sigma = np.hypot(cos_u2 * sin_lam, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam)
+            cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lam
+            sigma = np.arctan2(sin_sigma, cos_sigma)
+            sin_alpha = np.where(sin_sigma == 0, 0.0, cos_u1 * cos_u2 * sin_lam / sin_sigma)
+            cos2_alpha = 1 - sin_alpha ** 2
+            # Linha do equador: cos2_alpha = 0
+            cos_2sm = np.where(cos2_alpha == 0, 0.0, cos_sigma - 2 * sin_u1 * sin_u2 / cos2_alpha)
+            c = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+            prev = lam
+            lam = big_l + (1 - c) * f * sin_alpha * (
+                sigma + c * sin_sigma * (cos_2sm + c * cos_sigma * (-1 + 2 * cos_2sm ** 2)))
+            converged = np.abs(lam - prev) < tol
+            if converged.all():
+                break
+        u_sq = cos2_alpha * (WGS84_A ** 2 - WGS84_B ** 2) / WGS84_B ** 2
+        big_a = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+        big_b = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+        delta_sigma = big_b * sin_sigma * (cos_2sm + big_b / 4 * (
+            cos_sigma * (-1 + 2 * cos_2sm ** 2)
+            - big_b / 6 * cos_2sm * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sm ** 2)))
+        distance = WGS84_B * big_a * (sigma - delta_sigma)
+    return np.where(converged, distance, np.nan)
+
+
+# ======== Trajetória no solo ========
+
+def ground_track(lat, lon):
+    """Comprimento acumulado (m) do trajeto no solo, ponto a ponto; começa em 0.
+
+    Passos medidos no plano local do primeiro ponto (elipsoidal, sem o erro
+    do raio médio do haversine), adequado a trajetos de dezenas de km.
+    """
+    lat, lon = np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64)
+    if not len(lat):
+        return np.empty(0)
+    east, north, _ = LocalTangentPlane(lat[0], lon[0]).from_geodetic(lat, lon)
+    return np.concatenate([[0.0], np.cumsum(np.hypot(np.diff(east), np.diff(north)))])
+
+
+def downrange_crossrange(lat, lon, lat0, lon0, azimuth=None):
+    """(alcance, desvio lateral) em metros de cada ponto em relação à base (lat0, lon0).
+
+    `azimuth` é a direção de referência em graus a partir do norte, sentido
+    horário; sem ela, a direção da base até o último ponto. Desvio positivo =
+    à direita da direção de referência.
+    """
+    east, north, _ = LocalTangentPlane(lat0, lon0).from_geodetic(lat, lon)
+    east, north = np.atleast_1d(east), np.atleast_1d(north)
+    if azimuth is None:
+        heading = np.arctan2(east[-1], north[-1]) if len(east) else 0.0
+    else:
+        heading = np.radians(azimuth)
+    sin_h, cos_h = np.sin(heading), np.cos(heading)
+    return east * sin_h + north * cos_h, east * cos_h - north * sin_h
+
+
+# ======== Trajeto incremental ========
+
+# Quanto (m) o desvio lateral máximo de GroundTrack pode sair abaixo do exato
+TRACK_TOLERANCE = 0.01
+# Faixas de direção em que a folga do fecho simplificado é contabilizada
+_SLACK_BINS = 4096
+# Fecho abaixo disso não é simplificado
+_HULL_MIN = 128
+
+
+def convex_hull(points):
+    """Vértices do fecho convexo de pontos (n, 2), em sentido anti-horário.
+
+    Cadeia monótona de Andrew, vetorizada; antes, o octógono dos pontos extremos
+    em x, y, x+y e x-y descarta os que ficam dentro dele, que numa nuvem ruidosa
+    são quase todos. Pontos colineares na borda não viram vértices.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    points = points[np.isfinite(points).all(axis=1)]
+    if len(points) > 8:
+        x, y = points[:, 0], points[:, 1]
+        ring = points[[np.argmin(x), np.argmin(x - y), np.argmin(y), np.argmax(x + y),
+                       np.argmax(x), np.argmax(x - y), np.argmax(y), np.argmin(x + y)]]
+        edge = np.roll(ring, -1, axis=0) - ring
+        rel = points[:, None, :] - ring[None, :, :]
+        inside = (edge[None, :, 0] * rel[:, :, 1] - edge[None, :, 1] * rel[:, :, 0] > 0).all(axis=1)
+        points = points[~inside]
+    points = points[np.lexsort((points[:, 1], points[:, 0]))]
+    points = points[np.concatenate([[True], (np.diff(points, axis=0) != 0).any(axis=1)])] if len(points) else points
+    if len(points) < 3:
+        return points
+    lower, upper = _chain(points), _chain(points[::-1])
+    return np.vstack([lower[:-1], upper[:-1]])
+
+
+def _chain(points):
+    """Meio fecho de pontos ordenados.
+
+    Um ponto que não faz curva à esquerda com os vizinhos atuais não é vértice,
+    então a cada volta todos esses saem de uma vez, até sobrar só a cadeia.
+    """
+    while len(points) > 2:
+        a, b, c = points[:-2], points[1:-1], points[2:]
+        turn = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+        keep = turn > 0
+        if keep.all():
+            break
+        points = points[np.concatenate([[True], keep, [True]])]
+    return points
+
+
+class GroundTrack:
+    """ground_track e downrange_crossrange do voo todo, mantidos lote a lote.
+
+    O trajeto soma os passos no plano local do primeiro ponto, emendando cada
+    lote no último ponto do anterior. O desvio lateral é medido contra a direção
+    base -> último ponto, que muda a cada lote; o máximo de uma projeção está num
+    vértice do fecho convexo, então só o fecho é guardado. Num trajeto suave sem
+    ruído quase todo ponto é vértice, por isso vértices quase colineares saem
+    enquanto o recuo acumulado do contorno, contado por faixa de direção, fica
+    até `tolerance`: o desvio máximo sai no máximo isso abaixo do exato.
+    """
+
+    def __init__(self, tolerance=TRACK_TOLERANCE):
+        self.tolerance = tolerance
+        self.plane = None
+        self.length = 0.0
+        self.last = None
+        self.hull = np.empty((0, 2))
+        # Recuo máximo do fecho guardado em relação ao exato, por faixa de direção
+        self.slack = np.zeros(_SLACK_BINS)
+        self._kept = _HULL_MIN
+
+    def update(self, lat, lon):
+        lat, lon = np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64)
+        if not len(lat):
+            return
+        if self.plane is None:
+            self.plane = LocalTangentPlane(lat[0], lon[0])
+        east, north, _ = self.plane.from_geodetic(lat, lon)
+        points = np.column_stack([east, north])
+        joined = points if self.last is None else np.vstack([self.last, points])
+        self.length += float(np.hypot(*np.diff(joined, axis=0).T).sum())
+        self.last = points[-1]
+        self.hull = convex_hull(np.vstack([self.hull, points]))
+        # Simplificar a cada lote somaria folga nas mesmas faixas (o trecho novo
+        # cai quase sempre nas direções do anterior) até nada mais sair; só quando
+        # o fecho dobra, cada faixa passa por poucas simplificações
+        if len(self.hull) > 2 * self._kept:
+            self.hull = self._simplify(self.hull)
+            self._kept = max(len(self.hull), _HULL_MIN)
+
+    @property
+    def downrange(self):
+        return None if self.last is None else float(np.hypot(*self.last))
+
+    @property
+    def max_crossrange(self):
+        if self.last is None:
+            return None
+        if not len(self.hull):
+            return float('nan')
+        heading = np.arctan2(self.last[0], self.last[1])
+        cross = self.hull[:, 0] * np.cos(heading) - self.hull[:, 1] * np.sin(heading)
+        return float(np.abs(cross).max())
+
+    def _simplify(self, hull):
+        """Tira vértices cujo recuo, somado à folga das direções que eles cobrem, cabe na tolerância.
+
+        Sem o vértice v, o contorno recua no máximo a distância de v ao segmento
+        dos vizinhos, e só nas direções do cone normal de v (entre as normais das
+        suas arestas). Numa passada nunca saem dois vizinhos.
+        """
+        bins = len(self.slack)
+        while len(hull) > 3:
+            prev, nxt = np.roll(hull, 1, axis=0), np.roll(hull, -1, axis=0)
+            chord, rel = nxt - prev, hull - prev
+            s = np.clip((rel * chord).sum(axis=1) / (chord * chord).sum(axis=1), 0.0, 1.0)
+            dist = np.hypot(*(rel - s[:, None] * chord).T)
+            # Faixas do cone normal (normais para fora das arestas anterior e seguinte)
+            before, after = hull - prev, nxt - hull
+            first = (np.arctan2(-before[:, 0], before[:, 1]) % (2 * np.pi) * (bins / (2 * np.pi))).astype(np.int64)
+            last = (np.arctan2(-after[:, 0], after[:, 1]) % (2 * np.pi) * (bins / (2 * np.pi))).astype(np.int64)
+            width = (last - first) % bins + 1
+            spans = np.repeat(first, width) + np.arange(width.sum()) - np.repeat(np.cumsum(width) - width, width)
+            owner = np.repeat(np.arange(len(hull)), width)
+            worst = np.zeros(len(hull))
+            np.maximum.at(worst, owner, self.slack[spans % bins])
+            drop = worst + dist <= self.tolerance
+            drop[1::2] = False
+            if len(hull) % 2:
+                drop[-1] = False
+            if not drop.any():
+                break
+            taken = drop[owner]
+            np.maximum.at(self.slack, spans[taken] % bins, (worst + dist)[owner[taken]])
+            hull = hull[~drop]
+        return hull
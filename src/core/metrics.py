@@ -0,0 +1,149 @@
+# core/metrics.py
+import numpy as np
+
+from core.geodesy import GroundTrack
+from core.timebase import derivative_at, DERIVATIVE_PERIOD_NS
+
+EWMA_SPAN = 5
+_EWMA_BLOCK = 256
+
+
+def ewma(values, alpha, prev=None):
+    """EWMA (adjust=False) de um lote, continuando a partir do último valor `prev`.
+
+    Forma fechada vetorizada por blocos: dentro de um bloco de B amostras o fator
+    (1 - alpha)^-B ainda cabe folgado em float64. alpha = 1 (span 1) não suaviza:
+    devolve uma cópia dos valores (a forma fechada dividiria por zero).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if alpha >= 1.0:
+        return values.copy()
+    out = np.empty_like(values)
+    decay = 1.0 - alpha
+    for begin in range(0, len(values), _EWMA_BLOCK):
+        x = values[begin:begin + _EWMA_BLOCK]
+        if prev is None:
+            prev, x0 = x[0], x[1:]
+            out[begin] = prev
+            offset = begin + 1
+        else:
+            x0, offset = x, begin
+        if len(x0):
+            powers = decay ** np.arange(1, len(x0) + 1)
+            acc = np.cumsum(alpha * x0 / powers)
+            out[offset:offset + len(x0)] = powers * (prev + acc)
+            prev = out[offset + len(x0) - 1]
+    return out
+
+
+class FlightMetrics:
+    """Métricas do voo mantidas em streaming: cada lote novo custa O(lote), nunca O(histórico).
+
+    Guarda máximos/mínimos, valores atuais, altitude suavizada (EWMA), aceleração
+    (derivada da velocidade na base de tempo real, reamostrada a cada
+    `period_ns`), fase e duração; com lat/lon, também trajeto no solo, alcance e
+    desvio lateral máximo (GroundTrack). `as_dict()` é a foto lida pelo dashboard.
+    """
+
+    def __init__(self, ewma_span=EWMA_SPAN, period_ns=DERIVATIVE_PERIOD_NS):
+        if ewma_span < 1:
+            raise ValueError(f"ewma_span deve ser >= 1 (recebido {ewma_span})")
+        self.alpha = 2.0 / (ewma_span + 1)
+        self.period_ns = period_ns
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.alt = self.vel = None
+        self.max_alt = self.min_alt = None
+        self.max_vel = self.min_vel = None
+        self.apogee_index = None
+        self.alt_ewma = None
+        self.accel = None
+        self.max_accel = self.min_accel = None
+        self.first_t_ns = self.last_t_ns = None
+        self.track = GroundTrack()
+        self._reset_tail()
+
+    def _reset_tail(self):
+        # Amostras do último período: histórico mínimo para derivar o próximo lote
+        self._tail_t = np.empty(0, dtype=np.int64)
+        self._tail_vel = np.empty(0)
+
+    def update(self, alt, vel, t_ns, lat=None, lon=None):
+        alt = np.asarray(alt, dtype=np.float64)
+        vel = np.asarray(vel, dtype=np.float64)
+        t_ns = np.asarray(t_ns, dtype=np.int64)
+        n = len(alt)
+        if not n:
+            return
+
+        peak = int(np.argmax(alt))
+        if self.max_alt is None or alt[peak] > self.max_alt:
+            self.max_alt = float(alt[peak])
+            self.apogee_index = self.count + peak
+        self.min_alt = float(alt.min()) if self.min_alt is None else min(self.min_alt, float(alt.min()))
+        self.max_vel = float(vel.max()) if self.max_vel is None else max(self.max_vel, float(vel.max()))
+        self.min_vel = float(vel.min()) if self.min_vel is None else min(self.min_vel, float(vel.min()))
+
+        self.alt_ewma = float(ewma(alt, self.alpha, self.alt_ewma)[-1])
+
+        # Relógio voltando (store antigo, reinício do receptor): a derivada recomeça em cada trecho
+        if len(self._tail_t) and t_ns[0] < self._tail_t[-1]:
+            self._reset_tail()
+        back = np.flatnonzero(np.diff(t_ns) < 0) + 1
+        for k, (seg_t, seg_vel) in enumerate(zip(np.split(t_ns, back), np.split(vel, back))):
+            if k:
+                self._reset_tail()
+            self._update_acc(seg_t, seg_vel)
+
+        if self.first_t_ns is None:
+            self.first_t_ns = int(t_ns[0])
+        self.last_t_ns = int(t_ns[-1])
+        self.alt = float(alt[-1])
+        self.vel = float(vel[-1])
+        self.count += n
+        if lat is not None:
+            self.track.update(lat, lon)
+
+    def _update_acc(self, t_ns, vel):
+        """Aceleração: derivada emendando com a cauda do lote anterior (carimbos em ordem)"""
+        joined_t = np.concatenate([self._tail_t, t_ns])
+        joined_vel = np.concatenate([self._tail_vel, vel])
+        acc = derivative_at(joined_t, joined_vel, np.arange(len(self._tail_t), len(joined_t)), self.period_ns)
+        acc = acc[~np.isnan(acc)]
+        if len(acc):
+            self.accel = float(acc[-1])
+            self.max_accel = float(acc.max()) if self.max_accel is None else max(self.max_accel, float(acc.max()))
+            self.min_accel = float(acc.min()) if self.min_accel is None else min(self.min_accel, float(acc.min()))
+        keep = max(int(np.searchsorted(joined_t, joined_t[-1] - self.period_ns, side='right')) - 1, 0)
+        self._tail_t, self._tail_vel = joined_t[keep:], joined_vel[keep:]
+
+    @property
+    def phase(self):
+        if self.vel is None:
+            return None
+        return 'DESCIDA' if self.vel < 0 else 'SUBIDA'
+
+    @property
+    def duration(self):
+        """Segundos entre a primeira e a última amostra (carimbos reais)"""
+        if self.first_t_ns is None:
+            return 0.0
+        return (self.last_t_ns - self.first_t_ns) / 1e9
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'alt': self.alt, 'vel': self.vel,
+            'max_alt': self.max_alt, 'min_alt': self.min_alt,
+            'max_vel': self.max_vel, 'min_vel': self.min_vel,
+            'apogee_index': self.apogee_index,
+            'alt_ewma': self.alt_ewma,
+            'accel': self.accel, 'max_accel': self.max_accel, 'min_accel': self.min_accel,
+            'phase': self.phase,
+            'duration': self.duration,
+            'ground_track': self.track.length if self.track.last is not None else None,
+            'downrange': self.track.downrange,
+            'max_crossrange': self.track.max_crossrange,
+        }
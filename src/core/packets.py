@@ -0,0 +1,132 @@
+# core/packets.py
+import struct
+import time
+import zlib
+
+import numpy as np
+
+END_MARKER = b"END"
+N_FIELDS = 4  # lat, lon, alt, vel
+
+# ======== Quadro binário (versão 1) ========
+# Little-endian, tamanho fixo, sem alinhamento:
+#   magic 'TL' | versão u8 | flags u8 | veículo u16 | sequência u32 |
+#   t_tx_ns u64 (monotônico do emissor) | lat i32 (1e-7 grau) | lon i32 (1e-7 grau) |
+#   alt i32 (cm) | vel i32 (cm/s) | crc32 u32
+# Ponto fixo mantém a mesma resolução do texto legado (6 casas em grau, 2 em m)
+FRAME_MAGIC = b"TL"
+FRAME_VERSION = 1
+FLAG_END = 0x01
+
+FRAME_BODY = struct.Struct("<2sBBHIQiiii")
+FRAME_SIZE = FRAME_BODY.size + 4
+FRAME_DTYPE = np.dtype([
+    ("magic", "S2"), ("version", "u1"), ("flags", "u1"), ("vehicle", "<u2"),
+    ("seq", "<u4"), ("t_tx_ns", "<u8"),
+    ("lat_e7", "<i4"), ("lon_e7", "<i4"), ("alt_cm", "<i4"), ("vel_cm", "<i4"),
+    ("crc", "<u4"),
+])
+assert FRAME_DTYPE.itemsize == FRAME_SIZE
+
+# Amostra decodificada; pacotes texto legados não têm veículo/sequência/tempo do
+# emissor (-1). t_rx_ns é o relógio monotônico do receptor na leitura do socket
+# (o getter o leva à base de tempo do store com TelemetryStoreWriter.rebase).
+SAMPLE_DTYPE = np.dtype([
+    ("lat", "f8"), ("lon", "f8"), ("alt", "f8"), ("vel", "f8"),
+    ("vehicle", "i8"), ("seq", "i8"), ("t_tx_ns", "i8"), ("t_rx_ns", "i8"),
+])
+CSV_FIELDS = ["lat", "lon", "alt", "vel"]
+
+
+def encode_frame(vehicle, seq, t_tx_ns, lat, lon, alt, vel, flags=0):
+    body = FRAME_BODY.pack(FRAME_MAGIC, FRAME_VERSION, flags, vehicle & 0xFFFF,
+                           seq & 0xFFFFFFFF, t_tx_ns,
+                           round(lat * 1e7), round(lon * 1e7), round(alt * 100), round(vel * 100))
+    return body + struct.pack("<I", zlib.crc32(body))
+
+
+def encode_end_frame(vehicle, seq, t_tx_ns):
+    return encode_frame(vehicle, seq, t_tx_ns, 0.0, 0.0, 0.0, 0.0, flags=FLAG_END)
+
+
+def is_frame(data):
+    return len(data) == FRAME_SIZE and data[:2] == FRAME_MAGIC
+
+
+# ======== Decodificação em lote ========
+
+def _decode_frames(frames_buf, count):
+    frames = np.frombuffer(frames_buf, dtype=FRAME_DTYPE, count=count)
+    body = FRAME_BODY.size
+    crc = np.fromiter(
+        (zlib.crc32(frames_buf[i:i + body]) for i in range(0, count * FRAME_SIZE, FRAME_SIZE)),
+        dtype=np.uint32, count=count
+    )
+    ok = (crc == frames["crc"]) & (frames["version"] == FRAME_VERSION)
+    end = ok & ((frames["flags"] & FLAG_END) != 0)
+    return frames, ok & ~end, end
+
+
+def _decode_text(msg):
+    parts = msg.split(b",")
+    if len(parts) != N_FIELDS:
+        return None
+    try:
+        return tuple(map(float, parts))
+    except ValueError:
+        return None
+
+
+def decode_batch(datagrams, rx_ns=None):
+    """Decodifica um lote de datagramas, detectando quadro binário ou texto legado.
+
+    `rx_ns` é o carimbo de recepção (time.monotonic_ns) de cada datagrama, ou um
+    único valor para o lote todo; sem ele, vale o instante da decodificação.
+    Retorna (amostras, fins, invalidos): as amostras válidas em ordem de chegada
+    como array estruturado SAMPLE_DTYPE, a posição de cada sinal de fim nas
+    amostras (quantas vieram antes dele no lote; lista, vazia sem fim) e quantos
+    pacotes foram descartados (CRC, versão ou formato).
+    """
+    n = len(datagrams)
+    binary_pos = [i for i, d in enumerate(datagrams) if is_frame(d)]
+    keep = np.zeros(n, dtype=bool)
+    is_end = np.zeros(n, dtype=bool)
+    out = np.empty(n, dtype=SAMPLE_DTYPE)
+    out["t_rx_ns"] = time.monotonic_ns() if rx_ns is None else rx_ns
+
+    if binary_pos:
+        frames, valid, end = _decode_frames(
+            b"".join(datagrams[i] for i in binary_pos), len(binary_pos))
+        pos = np.asarray(binary_pos)
+        out["lat"][pos] = frames["lat_e7"] / 1e7
+        out["lon"][pos] = frames["lon_e7"] / 1e7
+        out["alt"][pos] = frames["alt_cm"] / 100
+        out["vel"][pos] = frames["vel_cm"] / 100
+        for field in ("vehicle", "seq", "t_tx_ns"):
+            out[field][pos] = frames[field]
+        keep[pos] = valid
+        is_end[pos] = end
+
+    if len(binary_pos) < n:
+        is_binary = np.zeros(n, dtype=bool)
+        is_binary[binary_pos] = True
+        for i in np.flatnonzero(~is_binary):
+            msg = datagrams[i].strip()
+            if msg == END_MARKER:
+                is_end[i] = True
+                continue
+            row = _decode_text(msg)
+            if row is not None:
+                out[i] = row + (-1, -1, -1, out["t_rx_ns"][i])
+                keep[i] = True
+
+    samples = out[keep]
+    ends = np.cumsum(keep)[is_end].tolist()
+    invalid = n - len(samples) - len(ends)
+    return samples, ends, invalid
+
+
+def csv_rows(samples):
+    """Linhas (lat, lon, alt, vel) para o CSV"""
+    return samples[CSV_FIELDS].tolist()
+
@@ -0,0 +1,170 @@
+# core/query.py
+import threading
+
+import numpy as np
+
+from core.store import INDEX_BLOCK_ROWS, TIME_INDEX_COLUMN
+from core.flights import FLIGHT_DTYPE, FLIGHT_GAP_NS, END_OPEN, END_GAP, flight_breaks, read_flights
+
+_SCAN_ROWS = 1 << 20
+
+
+class UnsortedTimeError(ValueError):
+    """Carimbos t_rx_ns fora de ordem: consultas por tempo dariam intervalos errados"""
+
+
+class TelemetryQuery:
+    """Consultas por tempo sobre o store: "entre t0 e t1", "últimos N s" e "voo k".
+
+    Cada consulta vira um intervalo de linhas achado por bisect no índice
+    esparso e depois em um único bloco da coluna t_rx_ns; o resultado são views
+    mapeadas das colunas, sem ler o resto do arquivo.
+
+    O bisect exige t_rx_ns em ordem no store inteiro (invariante do escritor,
+    ver core/store.py); stores gravados antes dela podem voltar no tempo após
+    um reinício, e então as consultas por tempo levantam UnsortedTimeError em
+    vez de devolver o arquivo inteiro. Voos e linhas continuam valendo.
+    """
+
+    def __init__(self, store, flight_gap_ns=FLIGHT_GAP_NS):
+        self.store = store
+        self.flight_gap_ns = flight_gap_ns
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Esquece o que já foi varrido (store recriado)"""
+        self._flight_starts = [0]
+        self._scanned = 0
+        self._last_t = None
+        self._order_checked = 0
+        self._order_last = None
+        self._unsorted_row = None
+
+    # ======== Tempo -> linhas ========
+
+    def unsorted_row(self):
+        """Primeira linha com carimbo menor que o da anterior, ou None (varre só as linhas novas)"""
+        if TIME_INDEX_COLUMN not in self.store.names:
+            return None
+        with self._lock:
+            while self._unsorted_row is None and self._order_checked < self.store.rows:
+                stop = min(self._order_checked + _SCAN_ROWS, self.store.rows)
+                t = self.store.column(TIME_INDEX_COLUMN, self._order_checked, stop)
+                prev = t[0] if self._order_last is None else self._order_last
+                back = np.flatnonzero(np.diff(t, prepend=prev) < 0)
+                if len(back):
+                    self._unsorted_row = self._order_checked + int(back[0])
+                self._order_last = int(t[-1])
+                self._order_checked = stop
+            return self._unsorted_row
+
+    def check_sorted(self):
+        """Levanta UnsortedTimeError se t_rx_ns volta no tempo em algum ponto do store"""
+        row = self.unsorted_row()
+        if row is not None:
+            raise UnsortedTimeError(
+                f"Carimbos de tempo fora de ordem a partir da linha {row} (store gravado antes da "
+                f"base de tempo contínua, p.ex. após reinício do receptor): consultas por tempo "
+                f"indisponíveis; use voos ou linhas")
+
+    def row_at(self, t_ns, side="left"):
+        """Primeira linha com carimbo >= t_ns (side='left') ou > t_ns (side='right')"""
+        self.check_sorted()
+        index = self.store.block_index()
+        block = int(np.searchsorted(index, t_ns, side=side)) - 1
+        if block < 0:
+            return 0
+        lo = block * INDEX_BLOCK_ROWS
+        hi = lo + INDEX_BLOCK_ROWS if block + 1 < len(index) else self.store.rows
+        return lo + int(np.searchsorted(self.store.column(TIME_INDEX_COLUMN, lo, hi), t_ns, side=side))
+
+    def rows_between(self, start_ns=None, stop_ns=None):
+        """Linhas [início, fim) com carimbo em [start_ns, stop_ns] (None = sem limite)"""
+        start = 0 if start_ns is None else self.row_at(start_ns, "left")
+        stop = self.store.rows if stop_ns is None else self.row_at(stop_ns, "right")
+        return start, max(start, stop)
+
+    def bounds(self):
+        """(primeiro, último) carimbo, ou None sem linhas ou sem carimbos; UnsortedTimeError fora de ordem"""
+        rows = self.store.rows
+        if not rows or TIME_INDEX_COLUMN not in self.store.names:
+            return None
+        self.check_sorted()
+        first = int(self.store.column(TIME_INDEX_COLUMN, 0, 1)[0])
+        last = int(self.store.column(TIME_INDEX_COLUMN, rows - 1, rows)[0])
+        return (first, last) if 0 <= first <= last else None
+
+    # ======== Consultas ========
+
+    def between(self, start_ns=None, stop_ns=None, columns=None):
+        """Views das colunas nas linhas com carimbo em [start_ns, stop_ns]"""
+        start, stop = self.rows_between(start_ns, stop_ns)
+        return self.store.read(start, stop, columns)
+
+    def last(self, seconds, columns=None):
+        """Views das colunas nos últimos `seconds` segundos (relativos à última amostra)"""
+        bounds = self.bounds()
+        if bounds is None:
+            return self.store.read(0, 0, columns)
+        return self.between(bounds[1] - int(seconds * 1e9), None, columns)
+
+    def flight(self, k, columns=None):
+        """Views das colunas do voo k (negativo conta do fim, como em listas)"""
+        start, stop = self.flights()[k]
+        return self.store.read(start, stop, columns)
+
+    # ======== Voos ========
+
+    def flights(self):
+        """Intervalos de linhas [início, fim) de cada voo"""
+        table = self.flight_table()
+        return list(zip(table["start_row"].tolist(), table["stop_row"].tolist()))
+
+    def flight_table(self):
+        """Registros FLIGHT_DTYPE dos voos, recortados às linhas confirmadas do store.
+
+        Vêm do índice gravado na ingestão (flights.bin); store sem índice cai na
+        varredura com a mesma regra da ingestão (flight_breaks: lacuna de
+        flight_gap_ns ou relógio voltando), sem estatísticas (NaN).
+        """
+        rows = self.store.rows
+        table = read_flights(self.store.path)
+        if table is None:
+            return self._scanned_table(rows)
+        table = table[table["start_row"] < rows]
+        table["stop_row"] = np.minimum(table["stop_row"], rows)
+        if len(table) and table[-1]["end_reason"] == END_OPEN:
+            table[-1]["stop_row"] = rows  # voo aberto: o índice só é regravado na descarga
+        return table
+
+    def _scanned_table(self, rows):
+        with self._lock:
+            self._scan_flights()
+            starts = self._flight_starts if rows else []
+        table = np.zeros(len(starts), dtype=FLIGHT_DTYPE)
+        table["start_row"] = starts
+        table["stop_row"] = starts[1:] + [rows] if rows else []
+        table["csv_start"] = table["csv_stop"] = table["apogee_row"] = -1
+        table["pad_alt"] = table["max_alt"] = table["max_vel"] = np.nan
+        table["end_reason"] = END_GAP
+        if len(table):
+            table[-1]["end_reason"] = END_OPEN
+        if len(table) and TIME_INDEX_COLUMN in self.store.names:
+            t = self.store.column(TIME_INDEX_COLUMN)
+            table["t_start_ns"] = t[table["start_row"]]
+            table["t_end_ns"] = t[table["stop_row"] - 1]
+        return table
+
+    def _scan_flights(self):
+        """Procura lacunas só nas linhas ainda não vistas, em blocos (memória limitada)"""
+        if TIME_INDEX_COLUMN not in self.store.names:
+            return
+        while self._scanned < self.store.rows:
+            stop = min(self._scanned + _SCAN_ROWS, self.store.rows)
+            t = self.store.column(TIME_INDEX_COLUMN, self._scanned, stop)
+            prev = t[0] if self._last_t is None else self._last_t
+            gaps = np.flatnonzero(flight_breaks(np.diff(t, prepend=prev), self.flight_gap_ns))
+            self._flight_starts.extend((self._scanned + gaps).tolist())
+            self._last_t = int(t[-1])
+            self._scanned = stop
@@ -0,0 +1,161 @@
+# core/ring_buffer.py
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from core.packets import SAMPLE_DTYPE
+
+# ======== Layout ========
+# Cabeçalho de 64 bytes (u64 alinhados) seguido de `capacity` amostras SAMPLE_DTYPE:
+#   magic | capacity | itemsize | head | generation | base_rows | closed | reservado
+# `head` é o número de amostras já publicadas (sequência da próxima); a amostra
+# de sequência s fica no slot s % capacity. O publicador grava os slots e só
+# depois avança `head`, então um leitor nunca lê um slot ainda não escrito.
+# `base_rows` é a contagem de linhas do store quando o publicador começou: a
+# sequência s corresponde à linha base_rows + s do store.
+RING_NAME = "telemetria_live"
+RING_MAGIC = 0x474E4952_4D4C4554  # 'TELMRING'
+DEFAULT_CAPACITY = 1 << 16
+HEADER_WORDS = 8
+HEADER_SIZE = HEADER_WORDS * 8
+_MAGIC, _CAPACITY, _ITEMSIZE, _HEAD, _GENERATION, _BASE_ROWS, _CLOSED = range(7)
+
+
+def _views(shm, capacity=None):
+    header = np.ndarray((HEADER_WORDS,), dtype=np.uint64, buffer=shm.buf)
+    capacity = int(header[_CAPACITY]) if capacity is None else capacity
+    slots = np.ndarray((capacity,), dtype=SAMPLE_DTYPE, buffer=shm.buf, offset=HEADER_SIZE)
+    return header, slots
+
+
+def _attach(name):
+    try:
+        # Python 3.13+: o leitor não deve registrar o segmento no resource_tracker
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            # Antes da 3.13 o resource_tracker do leitor apagaria o segmento ao sair
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return shm
+
+
+# ======== Publicação ========
+
+class RingPublisher:
+    """Lado do udp_getter: publica cada lote de amostras no ring buffer compartilhado"""
+
+    def __init__(self, name=RING_NAME, capacity=DEFAULT_CAPACITY, base_rows=0):
+        size = HEADER_SIZE + capacity * SAMPLE_DTYPE.itemsize
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Sobra de um publicador que caiu sem limpar
+            stale = _attach(name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        self.capacity = capacity
+        self.header, self.slots = _views(self.shm, capacity)
+        self.header[:] = 0
+        self.header[_CAPACITY] = capacity
+        self.header[_ITEMSIZE] = SAMPLE_DTYPE.itemsize
+        self.header[_GENERATION] = time.time_ns()
+        self.header[_BASE_ROWS] = base_rows
+        self.header[_MAGIC] = RING_MAGIC
+        self.head = 0
+
+    def publish(self, samples):
+        n = len(samples)
+        if not n:
+            return
+        if n > self.capacity:
+            samples = samples[-self.capacity:]
+            self.head += n - self.capacity
+            n = self.capacity
+        start = self.head % self.capacity
+        first = min(n, self.capacity - start)
+        self.slots[start:start + first] = samples[:first]
+        if first < n:
+            self.slots[:n - first] = samples[first:]
+        self.head += n
+        self.header[_HEAD] = self.head
+
+    def close(self):
+        if self.shm is None:
+            return
+        self.header[_CLOSED] = 1
+        del self.header, self.slots
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+        self.shm = None
+
+
+# ======== Leitura ========
+
+class RingReader:
+    """Lado dos visualizadores: lê apenas as amostras mais novas que a última sequência vista"""
+
+    def __init__(self, name=RING_NAME):
+        self.name = name
+        self.shm = _attach(name)
+        self.header, self.slots = _views(self.shm)
+        if int(self.header[_MAGIC]) != RING_MAGIC or int(self.header[_ITEMSIZE]) != SAMPLE_DTYPE.itemsize:
+            self.close()
+            raise ValueError(f"Ring buffer '{name}' com formato incompatível")
+        self.capacity = int(self.header[_CAPACITY])
+        self.generation = int(self.header[_GENERATION])
+        self.base_rows = int(self.header[_BASE_ROWS])
+
+    @classmethod
+    def try_attach(cls, name=RING_NAME):
+        """Retorna o leitor ou None se nenhum publicador está ativo"""
+        try:
+            return cls(name)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    @property
+    def head(self):
+        return int(self.header[_HEAD])
+
+    @property
+    def closed(self):
+        return bool(self.header[_CLOSED])
+
+    def oldest(self):
+        """Menor sequência ainda disponível no ring"""
+        return max(0, self.head - self.capacity)
+
+    def read_since(self, seq):
+        """Amostras com sequência >= seq; retorna (amostras, próxima sequência, perdidas)"""
+        head = self.head
+        start = max(seq, head - self.capacity)
+        lost = start - seq
+        if start >= head:
+            return self.slots[:0].copy(), head, lost
+
+        idx = np.arange(start, head) % self.capacity
+        samples = self.slots[idx]  # indexação avançada: já é cópia
+
+        # O publicador pode ter dado a volta durante a cópia: descarta o que foi sobrescrito
+        overwritten = self.head - self.capacity - start
+        if overwritten > 0:
+            samples = samples[overwritten:]
+            lost += overwritten
+        return samples, head, lost
+
+    def close(self):
+        if self.shm is None:
+            return
+        del self.header, self.slots
+        self.shm.close()
+        self.shm = None
@@ -0,0 +1,103 @@
+# core/sinks.py
+import time
+
+
+class BufferedSink:
+    """Política de descarga comum: após N linhas ou T ms da linha mais antiga, o que vier primeiro.
+
+    Subclasses acumulam as linhas pendentes e implementam _write_pending().
+    """
+
+    def __init__(self, flush_rows=256, flush_ms=100):
+        self.flush_rows = max(1, int(flush_rows))
+        self.flush_interval = max(0.0, flush_ms / 1000.0)
+        self._pending = 0
+        self._oldest = None  # instante (monotônico) da linha pendente mais antiga
+
+        self.rows_written = 0
+        self.flushes = 0
+
+    def _note_pending(self, count):
+        if not count:
+            return
+        self._pending += count
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+        if self._pending >= self.flush_rows:
+            self.flush()
+
+    def time_to_flush(self):
+        """Segundos até a próxima descarga por tempo (None se não há nada pendente)"""
+        if self._oldest is None:
+            return None
+        return max(0.0, self._oldest + self.flush_interval - time.monotonic())
+
+    def maybe_flush(self):
+        """Descarrega se o prazo da linha mais antiga já venceu"""
+        remaining = self.time_to_flush()
+        if remaining is not None and remaining <= 0:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        self._write_pending()
+        self.rows_written += self._pending
+        self.flushes += 1
+        self._pending = 0
+        self._oldest = None
+
+    def _write_pending(self):
+        raise NotImplementedError
+
+    def mark_end(self):
+        """Sinal de fim de voo; só importa para destinos que segmentam voos"""
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SinkGroup:
+    """Repassa cada lote de amostras para vários destinos (store, CSV...)"""
+
+    def __init__(self, sinks):
+        self.sinks = [s for s in sinks if s is not None]
+        self.primary = self.sinks[0]
+
+    @property
+    def rows_written(self):
+        return self.primary.rows_written
+
+    @property
+    def flush_interval(self):
+        return min(s.flush_interval for s in self.sinks)
+
+    def write_samples(self, samples):
+        for sink in self.sinks:
+            sink.write_samples(samples)
+
+    def mark_end(self):
+        for sink in self.sinks:
+            sink.mark_end()
+
+    def time_to_flush(self):
+        pending = [t for t in (s.time_to_flush() for s in self.sinks) if t is not None]
+        return min(pending) if pending else None
+
+    def maybe_flush(self):
+        for sink in self.sinks:
+            sink.maybe_flush()
+
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush()
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
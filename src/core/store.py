@@ -0,0 +1,391 @@
+# core/store.py
+import gzip
+import io
+import os
+import struct
+import time
+
+import numpy as np
+
+from core.sinks import BufferedSink
+
+# ======== Formato ========
+# Diretório com um arquivo por coluna (<nome>.col, valores de 8 bytes contíguos,
+# somente append) e um cabeçalho pequeno:
+#   magic 'TLMS' | versão u16 | ncols u16 | created_ns i64 | anchor_ns i64 | rows u64 |
+#   ncols x (nome 14s | dtype 2s)
+# `rows` é o número de linhas confirmadas: é gravado por último, depois das
+# colunas, então o leitor nunca enxerga uma linha incompleta. `anchor_ns` é
+# relógio de parede menos relógio monotônico no momento da criação: somado a
+# t_rx_ns dá o horário de parede de cada amostra.
+#
+# Invariante de t_rx_ns: é o relógio de parede menos anchor_ns, e nunca decresce
+# ao longo do store, mesmo entre sessões de ingestão e reinícios da máquina (o
+# monotônico recomeça a cada boot). Cada sessão do escritor soma ao monotônico
+# local o seu session_offset_ns (âncora da sessão - anchor_ns) e limita o
+# resultado ao último carimbo gravado (TelemetryStoreWriter.rebase).
+#
+# Índice esparso de tempo (t_rx_ns.idx): o t_rx_ns da primeira linha de cada
+# bloco de INDEX_BLOCK_ROWS linhas, int64 contíguo e só append. Uma busca por
+# tempo faz bisect no índice (pequeno) e depois em um único bloco da coluna.
+STORE_MAGIC = b"TLMS"
+STORE_VERSION = 1
+HEADER = struct.Struct("<4sHHqqQ")
+ROWS_OFFSET = 24
+COLUMN_SPEC = struct.Struct("<14s2s")
+HEADER_FILE = "header.bin"
+TIME_INDEX_COLUMN = "t_rx_ns"
+TIME_INDEX_FILE = "t_rx_ns.idx"
+INDEX_BLOCK_ROWS = 4096
+
+STORE_COLUMNS = [
+    ("lat", "f8"), ("lon", "f8"), ("alt", "f8"), ("vel", "f8"),
+    ("vehicle", "i8"), ("seq", "i8"), ("t_tx_ns", "i8"), ("t_rx_ns", "i8"),
+]
+CSV_COLUMNS = ["lat", "lon", "alt", "vel"]
+
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data", "telemetria")
+
+
+def _pwrite(fd, data, offset):
+    if hasattr(os, "pwrite"):
+        os.pwrite(fd, data, offset)
+    else:  # Windows
+        os.lseek(fd, offset, os.SEEK_SET)
+        os.write(fd, data)
+
+
+def _pread(fd, size, offset):
+    if hasattr(os, "pread"):
+        return os.pread(fd, size, offset)
+    os.lseek(fd, offset, os.SEEK_SET)  # Windows
+    return os.read(fd, size)
+
+
+def _fill_value(dtype):
+    return np.nan if np.dtype(dtype).kind == "f" else -1
+
+
+def _column_path(path, name):
+    return os.path.join(path, f"{name}.col")
+
+
+def _read_header(path):
+    with open(os.path.join(path, HEADER_FILE), "rb") as f:
+        raw = f.read()
+    magic, version, ncols, created_ns, anchor_ns, rows = HEADER.unpack_from(raw)
+    if magic != STORE_MAGIC or version != STORE_VERSION:
+        raise ValueError(f"Cabeçalho de store inválido em {path}")
+    columns = []
+    for i in range(ncols):
+        name, dtype = COLUMN_SPEC.unpack_from(raw, HEADER.size + i * COLUMN_SPEC.size)
+        columns.append((name.rstrip(b"\0").decode(), dtype.decode()))
+    return columns, created_ns, anchor_ns, rows
+
+
+def _pack_header(columns, created_ns, anchor_ns, rows):
+    raw = HEADER.pack(STORE_MAGIC, STORE_VERSION, len(columns), created_ns, anchor_ns, rows)
+    for name, dtype in columns:
+        raw += COLUMN_SPEC.pack(name.encode(), dtype.encode())
+    return raw
+
+
+def store_exists(path=DEFAULT_STORE_DIR):
+    return os.path.exists(os.path.join(path, HEADER_FILE))
+
+
+def _index_blocks(rows):
+    return -(-rows // INDEX_BLOCK_ROWS)
+
+
+def _scan_block_index(path, rows):
+    """Índice esparso montado direto da coluna de tempo (uma leitura por bloco)"""
+    n = _index_blocks(rows)
+    if not n:
+        return np.empty(0, dtype=np.int64)
+    column = np.memmap(_column_path(path, TIME_INDEX_COLUMN), dtype="<i8", mode="r", shape=(rows,))
+    return np.array(column[::INDEX_BLOCK_ROWS][:n])
+
+
+# ======== Escrita ========
+
+class TelemetryStoreWriter(BufferedSink):
+    """Escritor append-only do store colunar, com a mesma política de descarga do CSV"""
+
+    def __init__(self, path=DEFAULT_STORE_DIR, columns=STORE_COLUMNS, truncate=False,
+                 flush_rows=256, flush_ms=100, fsync=False):
+        super().__init__(flush_rows, flush_ms)
+        self.path = path
+        self.fsync = fsync
+        os.makedirs(path, exist_ok=True)
+
+        # Âncora desta sessão: relógio de parede - monotônico de agora
+        session_anchor_ns = time.time_ns() - time.monotonic_ns()
+        if truncate or not store_exists(path):
+            self.columns = list(columns)
+            self.created_ns = time.time_ns()
+            self.anchor_ns = session_anchor_ns
+            self.rows = 0
+            # Arquivos novos trocados por os.replace: leitores que ainda mapeiam
+            # o store antigo continuam lendo os inodes antigos, sem SIGBUS
+            for name, _ in self.columns:
+                self._replace_file(_column_path(path, name), b"")
+            self._write_header()
+        else:
+            self.columns, self.created_ns, self.anchor_ns, self.rows = _read_header(path)
+            if self._recover(columns):
+                self._write_header()
+
+        self.header_fd = os.open(os.path.join(path, HEADER_FILE), os.O_WRONLY)
+        self.fds = {
+            name: os.open(_column_path(path, name), os.O_WRONLY | os.O_APPEND)
+            for name, _ in self.columns
+        }
+        self.index_fd = None
+        if TIME_INDEX_COLUMN in self.fds:
+            self._check_index()
+            self.index_fd = os.open(os.path.join(path, TIME_INDEX_FILE), os.O_WRONLY | os.O_APPEND)
+        self._pending_batches = []
+
+        # Base de tempo contínua entre sessões (ver o invariante no topo do módulo)
+        self.session_offset_ns = session_anchor_ns - self.anchor_ns
+        self.last_t_ns = self._last_stamp()
+
+    def _last_stamp(self):
+        """Último t_rx_ns confirmado (-1 sem linhas ou sem a coluna)"""
+        if not self.rows or TIME_INDEX_COLUMN not in self.fds:
+            return -1
+        with open(_column_path(self.path, TIME_INDEX_COLUMN), "rb") as f:
+            f.seek((self.rows - 1) * 8)
+            return int(np.frombuffer(f.read(8), dtype="<i8")[0])
+
+    def rebase(self, samples):
+        """Converte, no lugar, t_rx_ns do monotônico desta sessão para a base do store.
+
+        Chamado uma vez por lote recém-decodificado, antes de publicar ou gravar
+        (todos os consumidores veem a mesma base); carimbos ausentes (< 0) ficam
+        como estão e os demais nunca ficam abaixo do último já emitido.
+        """
+        if TIME_INDEX_COLUMN not in (samples.dtype.names or ()) or not len(samples):
+            return samples
+        t = samples[TIME_INDEX_COLUMN]
+        stamped = t >= 0
+        if not stamped.any():
+            return samples
+        rebased = np.maximum.accumulate(np.maximum(t[stamped] + self.session_offset_ns, self.last_t_ns))
+        t[stamped] = rebased
+        self.last_t_ns = int(rebased[-1])
+        return samples
+
+    def _recover(self, wanted):
+        """Descarta caudas não confirmadas (queda no meio de uma descarga) e cria
+        as colunas novas preenchidas para as linhas existentes; True se o esquema mudou"""
+        for name, dtype in self.columns:
+            col = _column_path(self.path, name)
+            if not os.path.exists(col):
+                open(col, "wb").close()
+            with open(col, "r+b") as f:
+                f.truncate(self.rows * 8)
+        known = {name for name, _ in self.columns}
+        for name, dtype in wanted:
+            if name in known:
+                continue
+            filler = np.full(self.rows, _fill_value(dtype), dtype=dtype)
+            self._replace_file(_column_path(self.path, name), filler.tobytes())
+            self.columns.append((name, dtype))
+        return len(self.columns) > len(known)
+
+    @staticmethod
+    def _replace_file(path, data):
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _write_header(self):
+        raw = _pack_header(self.columns, self.created_ns, self.anchor_ns, self.rows)
+        self._replace_file(os.path.join(self.path, HEADER_FILE), raw)
+
+    def _check_index(self):
+        """Remonta o índice esparso se ele não bate com as linhas confirmadas (store antigo ou queda)"""
+        index_path = os.path.join(self.path, TIME_INDEX_FILE)
+        size = os.path.getsize(index_path) if os.path.exists(index_path) else -1
+        if size != _index_blocks(self.rows) * 8:
+            self._replace_file(index_path, _scan_block_index(self.path, self.rows).astype("<i8").tobytes())
+
+    def _write_index(self, batch):
+        """Entradas do índice esparso para os blocos que começam neste lote"""
+        first = _index_blocks(self.rows) * INDEX_BLOCK_ROWS
+        starts = np.arange(first, self.rows + len(batch), INDEX_BLOCK_ROWS) - self.rows
+        if not len(starts):
+            return
+        if TIME_INDEX_COLUMN in batch.dtype.names:
+            values = np.ascontiguousarray(batch[TIME_INDEX_COLUMN][starts], dtype="<i8")
+        else:
+            values = np.full(len(starts), -1, dtype="<i8")
+        os.write(self.index_fd, values.tobytes())
+
+    # ======== Descarga ========
+
+    def write_samples(self, samples):
+        if len(samples):
+            self._pending_batches.append(samples)
+            self._note_pending(len(samples))
+
+    def _write_pending(self):
+        batch = np.concatenate(self._pending_batches) if len(self._pending_batches) > 1 else self._pending_batches[0]
+        self._pending_batches = []
+        names = batch.dtype.names
+        for name, dtype in self.columns:
+            if name in names:
+                data = np.ascontiguousarray(batch[name], dtype=dtype)
+            else:
+                data = np.full(len(batch), _fill_value(dtype), dtype=dtype)
+            view = memoryview(data).cast("B")
+            while view:
+                view = view[os.write(self.fds[name], view):]
+        if self.index_fd is not None:
+            self._write_index(batch)
+        if self.fsync:
+            for fd in self.fds.values():
+                os.fsync(fd)
+
+        # Confirma as linhas: um único pwrite de 8 bytes alinhados
+        self.rows += len(batch)
+        _pwrite(self.header_fd, struct.pack("<Q", self.rows), ROWS_OFFSET)
+        if self.fsync:
+            os.fsync(self.header_fd)
+
+    def close(self):
+        if self.header_fd is None:
+            return
+        try:
+            self.flush()
+        finally:
+            for fd in self.fds.values():
+                os.close(fd)
+            if self.index_fd is not None:
+                os.close(self.index_fd)
+            os.close(self.header_fd)
+            self.header_fd = None
+
+
+# ======== Leitura ========
+
+class TelemetryStore:
+    """Leitor do store: colunas via numpy.memmap, sem parse e sem cópia.
+
+    refresh() relê apenas a contagem de linhas confirmadas; column()/read()
+    devolvem views sobre o arquivo mapeado.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_DIR):
+        self.path = path
+        self.columns = []
+        self.created_ns = None
+        self.anchor_ns = 0
+        self.rows = 0
+        self._maps = {}
+        self._block_index = np.empty(0, dtype=np.int64)
+        self._header_fd = None
+        self.refresh()
+
+    def _reopen(self):
+        self.columns, self.created_ns, self.anchor_ns, self.rows = _read_header(self.path)
+        self._maps = {}
+        self._block_index = np.empty(0, dtype=np.int64)
+        if self._header_fd is not None:
+            os.close(self._header_fd)
+        self._header_fd = os.open(os.path.join(self.path, HEADER_FILE), os.O_RDONLY)
+
+    def refresh(self):
+        """Atualiza a contagem de linhas; retorna True se o store foi recriado"""
+        if self._header_fd is None:
+            self._reopen()
+            return True
+        # O writer troca o cabeçalho por os.replace ao recriar o store
+        if os.stat(os.path.join(self.path, HEADER_FILE)).st_ino != os.fstat(self._header_fd).st_ino:
+            self._reopen()
+            return True
+        self.rows = struct.unpack("<Q", _pread(self._header_fd, 8, ROWS_OFFSET))[0]
+        return False
+
+    @property
+    def names(self):
+        return [name for name, _ in self.columns]
+
+    def column(self, name, start=0, stop=None):
+        dtype = dict(self.columns)[name]
+        stop = self.rows if stop is None else min(stop, self.rows)
+        start = max(0, min(start, stop))
+        mapped = self._maps.get(name)
+        if mapped is None or len(mapped) < stop:
+            if stop == 0:
+                return np.empty(0, dtype=dtype)
+            # Mapeia o arquivo inteiro (pode ter cauda não confirmada) e recorta
+            size = os.path.getsize(_column_path(self.path, name)) // 8
+            mapped = np.memmap(_column_path(self.path, name), dtype=dtype, mode="r", shape=(size,))
+            self._maps[name] = mapped
+        return mapped[start:stop]
+
+    def read(self, start=0, stop=None, columns=None):
+        """Dicionário coluna -> view das linhas [start, stop)"""
+        names = columns or self.names
+        return {name: self.column(name, start, stop) for name in names}
+
+    def block_index(self):
+        """t_rx_ns da primeira linha de cada bloco de INDEX_BLOCK_ROWS linhas confirmadas"""
+        if TIME_INDEX_COLUMN not in self.names:
+            return self._block_index
+        n = _index_blocks(self.rows)
+        if len(self._block_index) < n:
+            index_path = os.path.join(self.path, TIME_INDEX_FILE)
+            index = np.fromfile(index_path, dtype="<i8") if os.path.exists(index_path) else self._block_index
+            if len(index) < n:
+                index = _scan_block_index(self.path, self.rows)  # store sem índice (anterior a ele)
+            self._block_index = index[:n].astype(np.int64)
+        return self._block_index[:n]
+
+    def close(self):
+        self._maps = {}
+        if self._header_fd is not None:
+            os.close(self._header_fd)
+            self._header_fd = None
+
+
+# ======== Exportação ========
+
+def export_csv(store, out, start=0, stop=None, columns=CSV_COLUMNS, chunk_rows=65536):
+    """Exporta linhas do store para CSV em blocos; `out` é um arquivo binário aberto"""
+    stop = store.rows if stop is None else min(stop, store.rows)
+    start = min(start, stop)  # início além do fim: nenhuma linha, nunca contagem negativa
+    out.write((",".join(columns) + "\n").encode())
+    for begin in range(start, stop, chunk_rows):
+        end = min(begin + chunk_rows, stop)
+        block = np.column_stack([store.column(c, begin, end) for c in columns])
+        buf = io.BytesIO()
+        np.savetxt(buf, block, fmt="%.15g", delimiter=",")
+        out.write(buf.getvalue())  # uma escrita por bloco (barato também para gzip)
+    return stop - start
+
+
+def export_csv_gz(store, out, start=0, stop=None, columns=CSV_COLUMNS, chunk_rows=65536):
+    """Como export_csv, comprimindo com gzip à medida que os blocos são gerados"""
+    with gzip.GzipFile(fileobj=out, mode="wb", compresslevel=6, mtime=0) as gz:
+        return export_csv(store, gz, start, stop, columns, chunk_rows)
+
+
+def export_npz(store, out, start=0, stop=None, columns=None):
+    """Exporta as colunas do store como .npz (um array por coluna, lido com np.load)
+
+    As colunas são views mapeadas: o np.savez as copia para o arquivo em blocos,
+    sem montar a tabela na memória.
+    """
+    stop = store.rows if stop is None else min(stop, store.rows)
+    start = min(start, stop)
+    np.savez(out, **store.read(start, stop, columns))
+    return stop - start
+
+
+EXPORT_FORMATS = {"csv": export_csv, "csv.gz": export_csv_gz, "npz": export_npz}
+
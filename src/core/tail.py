@@ -0,0 +1,67 @@
+# core/tail.py
+import hashlib
+import os
+
+CSV_HEADER = b"lat,lon,alt,vel"
+
+
+class CSVTailer:
+    """Acompanha um CSV que só cresce pelo offset de bytes já consumido.
+
+    Cada leitura faz seek direto no offset e devolve apenas linhas completas;
+    uma linha parcial no fim fica para a próxima chamada. Truncamento ou troca
+    do arquivo (inode diferente ou tamanho menor que o offset) recomeçam do zero.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.identity = None
+
+    def read_new(self, max_bytes=None):
+        """Retorna (bytes com as linhas completas novas, reiniciado); no máximo ~max_bytes por chamada"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return b"", False
+
+        identity = (stat.st_dev, stat.st_ino)
+        reset = False
+        if self.identity is not None and (identity != self.identity or stat.st_size < self.offset):
+            reset = True
+            self.offset = 0
+        self.identity = identity
+
+        if stat.st_size == self.offset:
+            return b"", reset
+
+        size = stat.st_size - self.offset
+        if max_bytes is not None:
+            size = min(size, max_bytes)
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read(size)
+
+        end = data.rfind(b"\n") + 1
+        if not end:
+            return b"", reset  # ainda não há linha completa
+
+        chunk = data[:end]
+        if self.offset == 0 and chunk.startswith(CSV_HEADER):
+            chunk = chunk[chunk.index(b"\n") + 1:]
+        self.offset += end
+        return chunk, reset
+
+
+def tail_fingerprint(path, offset, size=256):
+    """Hash dos primeiros e dos últimos `size` bytes antes de `offset`.
+
+    Confere, sem reler o arquivo, que o trecho já lido não foi reescrito (um
+    novo --teste regrava o começo; uma troca no meio do arquivo não é vista).
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        digest.update(f.read(min(size, offset)))
+        f.seek(max(0, offset - size))
+        digest.update(f.read(min(size, offset)))
+    return digest.hexdigest()
@@ -0,0 +1,102 @@
+# core/timebase.py
+import time
+
+import numpy as np
+
+# ======== Base de tempo ========
+# Cada amostra carrega t_rx_ns: relógio monotônico (ns) do receptor no instante
+# em que o datagrama foi lido do socket, levado à base do store (contínua entre
+# sessões, ver core/store.py). Relógio de parede = t_rx_ns + anchor_ns do store. Amostras sem carimbo (CSV legado, store antigo) valem -1 e recebem
+# uma grade nominal a partir do último carimbo conhecido.
+NOMINAL_PERIOD_NS = 100_000_000     # 0,1 s entre amostras do simulador
+DERIVATIVE_PERIOD_NS = NOMINAL_PERIOD_NS
+
+
+def fill_missing(t_ns, last_ns=None, period_ns=NOMINAL_PERIOD_NS):
+    """Completa carimbos ausentes (< 0) com a grade nominal após o carimbo anterior.
+
+    `last_ns` é o último carimbo do lote anterior; sem ele, as amostras iniciais
+    sem carimbo terminam um período antes do primeiro carimbo do lote (ou agora).
+    """
+    t = np.array(t_ns, dtype=np.int64)
+    missing = t < 0
+    if not missing.any():
+        return t
+    idx = np.arange(len(t))
+    if last_ns is None:
+        known = np.flatnonzero(~missing)
+        first = int(t[known[0]]) if len(known) else time.monotonic_ns() + period_ns
+        last_ns = first - ((known[0] if len(known) else len(t)) + 1) * period_ns
+    prev = np.maximum.accumulate(np.where(missing, -1, idx))
+    before = prev < 0
+    base = np.where(before, last_ns, t[np.maximum(prev, 0)])
+    steps = np.where(before, idx + 1, idx - prev)
+    t[missing] = (base + steps * period_ns)[missing]
+    return t
+
+
+# ======== Reamostragem ========
+
+def interp_at(t_ns, values, at_ns):
+    """Interpolação linear de `values` (amostrados em t_ns crescente) nos instantes `at_ns`.
+
+    Vetorizada (np.interp) sobre offsets relativos ao primeiro carimbo, exatos
+    em float64; `values` pode ser 1D ou (n, k). Instantes fora de
+    [t_ns[0], t_ns[-1]] viram NaN.
+    """
+    t = np.asarray(t_ns, dtype=np.int64)
+    at = np.asarray(at_ns, dtype=np.int64)
+    v = np.asarray(values, dtype=np.float64)
+    if not len(t):
+        return np.full(at.shape + v.shape[1:], np.nan)
+    x = (t - t[0]).astype(np.float64)
+    xi = (at - t[0]).astype(np.float64)
+    if v.ndim == 1:
+        return np.interp(xi, x, v, left=np.nan, right=np.nan)
+    return np.stack([np.interp(xi, x, col, left=np.nan, right=np.nan) for col in v.T], axis=-1)
+
+
+def uniform_grid(start_ns, stop_ns, period_ns=NOMINAL_PERIOD_NS):
+    """Instantes start, start + período, ... até stop (inclusive)"""
+    return np.arange(int(start_ns), int(stop_ns) + 1, int(period_ns), dtype=np.int64)
+
+
+def resample_uniform(t_ns, values, period_ns=NOMINAL_PERIOD_NS):
+    """(grade, valores) da série reamostrada numa grade uniforme do primeiro ao último carimbo"""
+    t = np.asarray(t_ns, dtype=np.int64)
+    if not len(t):
+        return np.empty(0, dtype=np.int64), np.empty((0,) + np.shape(values)[1:])
+    grid = uniform_grid(t[0], t[-1], period_ns)
+    return grid, interp_at(t, values, grid)
+
+
+def derivative_at(t_ns, values, positions, period_ns=DERIVATIVE_PERIOD_NS):
+    """Derivada (por segundo) nas amostras `positions`: diferença para a série interpolada um período antes.
+
+    Equivale a reamostrar numa grade uniforme ancorada em cada amostra, então
+    rajadas com carimbos quase iguais não explodem a derivada. NaN enquanto não
+    há um período inteiro de histórico.
+    """
+    t = np.asarray(t_ns, dtype=np.int64)
+    v = np.asarray(values, dtype=np.float64)
+    positions = np.asarray(positions, dtype=np.int64)
+    if len(positions):
+        # Só o trecho que as posições alcançam (trecho novo + um período de histórico)
+        first = max(int(np.searchsorted(t, t[positions.min()] - period_ns, side="right")) - 1, 0)
+        first = min(first, int(positions.min()))
+        last = int(positions.max()) + 1
+        t, v, positions = t[first:last], v[first:last], positions - first
+        # Relógio voltando (store antigo, reinício do receptor): cada trecho em ordem
+        # é derivado sozinho, sem histórico emprestado do outro lado do salto
+        breaks = np.flatnonzero(np.diff(t) < 0) + 1
+        if len(breaks):
+            out = np.empty(len(positions))
+            edges = np.concatenate([[0], breaks, [len(t)]])
+            segment = np.searchsorted(breaks, positions, side="right")
+            for k in np.unique(segment):
+                lo, hi = edges[k], edges[k + 1]
+                mine = segment == k
+                out[mine] = derivative_at(t[lo:hi], v[lo:hi], positions[mine] - lo, period_ns)
+            return out
+    back = interp_at(t, v, t[positions] - period_ns)
+    return (v[positions] - back) / (period_ns / 1e9)
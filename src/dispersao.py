@@ -0,0 +1,123 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from simulador import RocketParameters, MissionParameters, MonteCarloDispersion
+from core.analysis import json_safe
+from core.dispersion import ellipse_points, ELLIPSE_PROBABILITY
+
+# Caminho padrão do gráfico
+dir_path = os.path.dirname(os.path.abspath(__file__))
+plot_path = os.path.join(dir_path, "..", "data", "dispersao.png")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Dispersão Monte Carlo da queda (zona de segurança)")
+    parser.add_argument("--voos", type=int, default=10000, help="Número de voos simulados")
+    parser.add_argument("--semente", type=int, default=None, help="Semente do sorteio (resultado reprodutível)")
+    parser.add_argument("--probabilidade", type=float, default=ELLIPSE_PROBABILITY, help="Probabilidade da elipse de dispersão")
+    # Nominal: o mesmo lançamento do simulador
+    parser.add_argument("--empuxo", type=float, default=80, help="Empuxo nominal (N)")
+    parser.add_argument("--queima", type=float, default=1.5, help="Tempo de queima nominal (s)")
+    parser.add_argument("--angulo", type=float, default=45, help="Ângulo de lançamento nominal (graus)")
+    parser.add_argument("--massa", type=float, default=0.5, help="Massa nominal (kg)")
+    parser.add_argument("--direcao", type=float, default=90, help="Direção do lançamento (graus)")
+    parser.add_argument("--vento-x", type=float, default=2.0, help="Vento lateral nominal (m/s)")
+    parser.add_argument("--vento-y", type=float, default=0.0, help="Vento frontal nominal (m/s)")
+    parser.add_argument("--sigma", action="append", default=[], metavar="NOME=VALOR",
+                        help=f"Troca um desvio padrão ({', '.join(MonteCarloDispersion.DEFAULT_SIGMAS)})")
+    parser.add_argument("--grafico", nargs="?", const=plot_path, default=None,
+                        help="Salva quedas, elipse e histograma do apogeu num PNG (padrão: data/dispersao.png)")
+    parser.add_argument("--json", action="store_true", help="Resumo em JSON na saída padrão")
+    return parser.parse_args(argv)
+
+
+def parse_sigmas(items):
+    sigmas = {}
+    for item in items:
+        name, _, value = item.partition("=")
+        if name not in MonteCarloDispersion.DEFAULT_SIGMAS or not value:
+            raise SystemExit(f"Sigma inválido: {item} (use NOME=VALOR, NOME em {', '.join(MonteCarloDispersion.DEFAULT_SIGMAS)})")
+        sigmas[name] = float(value)
+    return sigmas
+
+
+def save_plot(result, path):
+    """Quedas no plano da base com a elipse, e o histograma do apogeu; backend sem janela"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    summary = result["summary"]
+    fig, (ax_map, ax_hist) = plt.subplots(1, 2, figsize=(14, 6))
+    ax_map.scatter(result["landing"]["x"], result["landing"]["y"], s=2, alpha=0.3, label="Quedas")
+    east, north = ellipse_points(summary["elipse"])
+    ax_map.plot(east, north, "r-", label=f"Elipse {summary['elipse']['probabilidade']:.0%}")
+    ax_map.plot([0], [0], "k^", markersize=10, label="Base")
+    ax_map.set_title(f"Pontos de queda ({summary['voos']} voos)")
+    ax_map.set_xlabel("Leste (m)")
+    ax_map.set_ylabel("Norte (m)")
+    ax_map.set_aspect("equal", adjustable="datalim")
+    ax_map.grid(True)
+    ax_map.legend()
+
+    ax_hist.hist(result["apogee"][np.isfinite(result["apogee"])], bins=60, color="g")
+    ax_hist.set_title("Distribuição do apogeu")
+    ax_hist.set_xlabel("Apogeu (m)")
+    ax_hist.set_ylabel("Voos")
+    ax_hist.grid(True)
+
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    rocket = RocketParameters()
+    rocket.set_thrust(args.empuxo)
+    rocket.set_burn_time(args.queima)
+    rocket.set_launch_angle(args.angulo)
+    rocket.MASS = args.massa
+    mission = MissionParameters()
+    mission.set_heading(args.direcao)
+    mission.set_wind(args.vento_x, args.vento_y)
+
+    started = time.perf_counter()
+    result = MonteCarloDispersion(rocket, mission, parse_sigmas(args.sigma)).run(
+        args.voos, args.semente, args.probabilidade)
+    elapsed = time.perf_counter() - started
+    summary = result["summary"]
+    if args.grafico:
+        os.makedirs(os.path.dirname(os.path.abspath(args.grafico)), exist_ok=True)
+        save_plot(result, args.grafico)
+
+    if args.json:
+        json.dump(json_safe(dict(summary, segundos=elapsed)), sys.stdout, ensure_ascii=False, indent=2)
+        print()
+        return 0
+
+    apogee, ellipse = summary["apogeu_m"], summary["elipse"]
+    print(f"[MC] {summary['voos']} voos em {elapsed:.2f} s ({summary['voos'] / max(elapsed, 1e-9):,.0f} voos/s)")
+    if summary["no_ar"]:
+        print(f"[MC] {summary['no_ar']} voos não caíram no tempo limite (fora da elipse)")
+    print("\n=== Dispersão ===")
+    print(f"Apogeu: média {apogee['media']:.1f} m | desvio {apogee['desvio']:.1f} m | "
+          f"p1-p99 {apogee['p01']:.1f}-{apogee['p99']:.1f} m")
+    print(f"Alcance: média {summary['alcance_m']['media']:.1f} m | p99 {summary['alcance_m']['p99']:.1f} m")
+    print(f"Elipse {ellipse['probabilidade']:.0%}: centro ({ellipse['centro_leste_m']:.1f} L, "
+          f"{ellipse['centro_norte_m']:.1f} N) m | semieixos {ellipse['semi_maior_m']:.1f} x "
+          f"{ellipse['semi_menor_m']:.1f} m | azimute {ellipse['azimute_graus']:.1f}° | "
+          f"contém {ellipse['dentro']:.1%} das quedas")
+    print(f"Raio da zona de segurança (base até a borda da elipse): {summary['raio_seguranca_m']:.1f} m")
+    if args.grafico:
+        print(f"\nGráfico salvo em {os.path.normpath(args.grafico)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+import argparse
+import os
+import sys
+
+from core.store import TelemetryStore, store_exists, EXPORT_FORMATS
+from core.query import TelemetryQuery, UnsortedTimeError
+
+# Caminhos padrão
+dir_path = os.path.dirname(os.path.abspath(__file__))
+store_path = os.path.join(dir_path, "..", "data", "telemetria")
+csv_path = os.path.join(dir_path, "..", "data", "dados.csv")
+
+parser = argparse.ArgumentParser(description="Exporta o store de telemetria para CSV (opcionalmente gzip) ou .npz")
+parser.add_argument("--saida", default=None, help="Arquivo de saída (padrão: data/dados.<formato>)")
+parser.add_argument("--formato", choices=sorted(EXPORT_FORMATS), default="csv", help="Formato de saída")
+parser.add_argument("--inicio", type=int, default=0, help="Primeira linha exportada")
+parser.add_argument("--fim", type=int, default=None, help="Linha final (exclusiva)")
+parser.add_argument("--desde", type=float, default=None, help="Início do intervalo (s desde a primeira amostra recebida)")
+parser.add_argument("--ate", type=float, default=None, help="Fim do intervalo (s desde a primeira amostra recebida)")
+parser.add_argument("--voo", type=int, default=None, help="Exporta só o voo K (0 = primeiro, -1 = último)")
+args = parser.parse_args()
+
+# Intervalo invertido daria um arquivo só com o cabeçalho, sem aviso nenhum
+if args.desde is not None and args.ate is not None and args.ate < args.desde:
+    print(f"[EXPORT] Intervalo invertido: --ate ({args.ate:g} s) antes de --desde ({args.desde:g} s)")
+    sys.exit(1)
+if args.fim is not None and args.fim < args.inicio:
+    print(f"[EXPORT] Intervalo invertido: --fim ({args.fim}) antes de --inicio ({args.inicio})")
+    sys.exit(1)
+
+if not store_exists(store_path):
+    print(f"[EXPORT] Store não encontrado: {store_path}")
+    sys.exit(1)
+
+store = TelemetryStore(store_path)
+start, stop = args.inicio, args.fim
+query = TelemetryQuery(store)
+if args.voo is not None:
+    flights = query.flights()
+    if not -len(flights) <= args.voo < len(flights):
+        print(f"[EXPORT] Voo {args.voo} não existe ({len(flights)} voos no store)")
+        sys.exit(1)
+    start, stop = flights[args.voo]
+elif (args.desde is not None or args.ate is not None) and store.rows:
+    try:
+        bounds = query.bounds()
+    except UnsortedTimeError as e:
+        print(f"[EXPORT] {e}")
+        sys.exit(1)
+    if bounds is None:
+        print("[EXPORT] Amostras sem carimbo de tempo: use --inicio/--fim")
+        sys.exit(1)
+    t0 = bounds[0]
+    start, stop = query.rows_between(
+        None if args.desde is None else t0 + int(args.desde * 1e9),
+        None if args.ate is None else t0 + int(args.ate * 1e9),
+    )
+
+saida = args.saida or os.path.join(os.path.dirname(csv_path), f"dados.{args.formato}")
+with open(saida, "wb") as out:
+    count = EXPORT_FORMATS[args.formato](store, out, start=start, stop=stop)
+print(f"[EXPORT] {count} linhas exportadas para {saida}")
@@ -3,6 +3,12 @@ import time
 import math
 import random
 
+import numpy as np
+
+from core.packets import encode_frame, encode_end_frame
+from core.geodesy import LocalTangentPlane
+from core.dispersion import dispersion_ellipse, distribution, safety_radius, ELLIPSE_PROBABILITY
+
 # =============================================
 # CONSTANTES FÍSICAS (NUNCA MUDAM)
 # =============================================
@@ -119,6 +125,148 @@ class PhysicsEngine:
         return self.state
 
 
+# =============================================
+# MOTOR FÍSICO EM LOTE (MONTE CARLO)
+# =============================================
+class BatchPhysicsEngine:
+    """As equações do PhysicsEngine para N foguetes de uma vez, em arrays NumPy.
+
+    Cada parâmetro é um escalar ou um array com um valor por membro. O passo
+    (0.1 s) e o tempo são os mesmos para todos, como no PhysicsEngine; cada
+    voo termina no primeiro passo com altitude negativa (como em
+    run_simulation) e sai dos arrays, então o custo acompanha os que ainda voam.
+    """
+
+    DT = 0.1
+
+    def __init__(self, thrust, burn_time, angle, mass, drag_coef, wind_x=0.0, wind_y=0.0,
+                 heading=0.0, cross_area=0.005):
+        thrust, burn_time, angle, mass, drag_coef, wind_x, wind_y, heading = np.broadcast_arrays(
+            *(np.asarray(v, dtype=np.float64) for v in
+              (thrust, burn_time, angle, mass, drag_coef, wind_x, wind_y, heading)))
+        self.size = len(np.atleast_1d(thrust))
+        const = PhysicalConstants()
+        angle_rad = np.atleast_1d(angle) * const.DEG_TO_RAD
+        heading_rad = np.atleast_1d(heading) * const.DEG_TO_RAD
+        mass = np.atleast_1d(mass)
+        # Acelerações constantes por membro, calculadas uma vez
+        self.params = {
+            'burn_time': np.atleast_1d(burn_time),
+            'powered': np.atleast_1d(thrust) > 0,
+            'ax_thrust': np.atleast_1d(thrust) * np.cos(angle_rad) * np.cos(heading_rad) / mass,
+            'ay_thrust': np.atleast_1d(thrust) * np.cos(angle_rad) * np.sin(heading_rad) / mass,
+            'az_thrust': np.atleast_1d(thrust) * np.sin(angle_rad) / mass - const.GRAVITY,
+            'drag_per_mass': 0.5 * const.AIR_DENSITY_SEA * np.atleast_1d(drag_coef) * cross_area / mass,
+            'wind_x': np.atleast_1d(wind_x),
+            'wind_y': np.atleast_1d(wind_y),
+        }
+
+    def run(self, max_time=600.0):
+        """Integra todos os voos até a queda; arrays por membro: x, y e tempo da queda, apogeu e seu tempo"""
+        n, dt, gravity = self.size, self.DT, PhysicalConstants.GRAVITY
+        result = {name: np.full(n, np.nan) for name in ('x', 'y', 'time', 'apogee', 'apogee_time')}
+        p = dict(self.params, id=np.arange(n))
+        s = {name: np.zeros(n) for name in ('x', 'y', 'altitude', 'vx', 'vy', 'vz', 'apogee', 'apogee_time')}
+        t = 0.0
+        while len(p['id']) and t < max_time:
+            burning = (t < p['burn_time']) & p['powered']
+            speed2 = s['vx'] ** 2 + s['vy'] ** 2 + s['vz'] ** 2
+            drag = p['drag_per_mass'] * np.exp(-s['altitude'] / 8000) * speed2
+            s['vx'] += (np.where(burning, p['ax_thrust'], 0.0) + p['wind_x']) * dt
+            s['vy'] += (np.where(burning, p['ay_thrust'], 0.0) + p['wind_y']) * dt
+            s['vz'] += np.where(burning, p['az_thrust'] - drag, -gravity) * dt
+            s['x'] += s['vx'] * dt
+            s['y'] += s['vy'] * dt
+            s['altitude'] += s['vz'] * dt
+            t += dt
+
+            higher = s['altitude'] > s['apogee']
+            s['apogee'] = np.where(higher, s['altitude'], s['apogee'])
+            s['apogee_time'] = np.where(higher, t, s['apogee_time'])
+            landed = s['altitude'] < 0
+            if landed.any():
+                self._record(result, p['id'][landed], s, landed, t)
+                keep = ~landed
+                p = {name: v[keep] for name, v in p.items()}
+                s = {name: v[keep] for name, v in s.items()}
+        # Ainda no ar em max_time: apogeu vale, queda fica NaN
+        result['apogee'][p['id']] = s['apogee']
+        result['apogee_time'][p['id']] = s['apogee_time']
+        return result
+
+    @staticmethod
+    def _record(result, ids, s, mask, t):
+        result['x'][ids] = s['x'][mask]
+        result['y'][ids] = s['y'][mask]
+        result['time'][ids] = t
+        result['apogee'][ids] = s['apogee'][mask]
+        result['apogee_time'][ids] = s['apogee_time'][mask]
+
+
+class MonteCarloDispersion:
+    """Dispersão da queda: N voos com parâmetros sorteados em torno do nominal.
+
+    Desvios padrão (1 sigma) relativos para empuxo, queima, massa e arrasto;
+    absolutos para o ângulo (graus) e o vento (m/s, por componente).
+    """
+
+    DEFAULT_SIGMAS = {
+        'thrust': 0.05,
+        'burn_time': 0.03,
+        'angle': 1.0,
+        'mass': 0.02,
+        'drag_coef': 0.10,
+        'wind': 1.0,
+    }
+
+    def __init__(self, rocket_params, mission_params, sigmas=None):
+        self.rocket = rocket_params
+        self.mission = mission_params
+        self.sigmas = dict(self.DEFAULT_SIGMAS, **(sigmas or {}))
+
+    def sample(self, n, seed=None):
+        """Parâmetros dos N membros (normais, cortados em valores físicos)"""
+        rng = np.random.default_rng(seed)
+        sig = self.sigmas
+
+        def relative(nominal, sigma):
+            return np.maximum(nominal * (1 + sigma * rng.standard_normal(n)), 0.0)
+
+        return {
+            'thrust': relative(self.rocket.thrust_force, sig['thrust']),
+            'burn_time': relative(self.rocket.burn_time, sig['burn_time']),
+            'angle': np.clip(self.rocket.launch_angle + sig['angle'] * rng.standard_normal(n), 0.0, 90.0),
+            'mass': np.maximum(self.rocket.MASS * (1 + sig['mass'] * rng.standard_normal(n)), 1e-3),
+            'drag_coef': relative(self.rocket.DRAG_COEF, sig['drag_coef']),
+            # Mesmo limite de MissionParameters.set_wind
+            'wind_x': np.clip(self.mission.wind_x + sig['wind'] * rng.standard_normal(n), -100, 100),
+            'wind_y': np.clip(self.mission.wind_y + sig['wind'] * rng.standard_normal(n), -100, 100),
+        }
+
+    def run(self, n=10000, seed=None, probability=ELLIPSE_PROBABILITY, max_time=600.0):
+        """Roda os N voos; retorna as quedas (x/y em m e lat/lon), os apogeus e a elipse de dispersão"""
+        params = self.sample(n, seed)
+        engine = BatchPhysicsEngine(heading=self.mission.heading, cross_area=self.rocket.CROSS_AREA, **params)
+        flights = engine.run(max_time)
+        site = self.mission.launch_site
+        lat, lon, _ = LocalTangentPlane(site['lat'], site['lon'], site['alt']).to_geodetic(flights['x'], flights['y'])
+        ellipse = dispersion_ellipse(flights['x'], flights['y'], probability)
+        return {
+            'params': params,
+            'landing': {'x': flights['x'], 'y': flights['y'], 'lat': lat, 'lon': lon, 'time': flights['time']},
+            'apogee': flights['apogee'],
+            'summary': {
+                'voos': n,
+                'no_ar': int(np.isnan(flights['time']).sum()),
+                'apogeu_m': distribution(flights['apogee']),
+                'tempo_voo_s': distribution(flights['time']),
+                'alcance_m': distribution(np.hypot(flights['x'], flights['y'])),
+                'elipse': ellipse,
+                'raio_seguranca_m': safety_radius(ellipse),
+            },
+        }
+
+
 # =============================================
 # SIMULADOR PRINCIPAL
 # =============================================
@@ -133,11 +281,16 @@ class RocketSimulator:
         wind_x=0.0,
         wind_y=0.0,
         udp_ip="127.0.0.1",
-        udp_port=5555
+        udp_port=5555,
+        frame_format="binary",
+        vehicle_id=1
     ):
         self.UDP_IP = udp_ip
         self.UDP_PORT = udp_port
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.frame_format = frame_format  # "binary" (quadro v1) ou "text" (CSV legado)
+        self.vehicle_id = vehicle_id
+        self.seq = 0
 
         self.rocket_params = RocketParameters()
         self.rocket_params.set_thrust(thrust)
@@ -150,25 +303,42 @@ class RocketSimulator:
         self.mission_params.set_wind(wind_x, wind_y)
 
         self.physics_engine = PhysicsEngine(self.rocket_params, self.mission_params)
+        self._frame = None
 
-    def get_gps_position(self, x, y, alt):
-        dlat = (y / PhysicalConstants.EARTH_RADIUS) * PhysicalConstants.RAD_TO_DEG
-        dlon = (x / (PhysicalConstants.EARTH_RADIUS *
-                     math.cos(self.mission_params.launch_site['lat'] * PhysicalConstants.DEG_TO_RAD))) * PhysicalConstants.RAD_TO_DEG
+    def local_frame(self):
+        """Plano local (x = leste, y = norte) com origem na base; refeito só se a base mudar"""
+        site = self.mission_params.launch_site
+        if self._frame is None or (self._frame.lat0, self._frame.lon0, self._frame.alt0) != (site['lat'], site['lon'], site['alt']):
+            self._frame = LocalTangentPlane(site['lat'], site['lon'], site['alt'])
+        return self._frame
 
+    def get_gps_position(self, x, y, alt):
+        lat, lon, _ = self.local_frame().to_geodetic(x, y, alt)
         return {
-            'lat': self.mission_params.launch_site['lat'] + dlat,
-            'lon': self.mission_params.launch_site['lon'] + dlon,
+            'lat': float(lat),
+            'lon': float(lon),
             'alt': alt
         }
 
     def get_telemetry_data(self):
         state = self.physics_engine.state
         gps = self.get_gps_position(state['x'], state['y'], state['altitude'])
-        return f"{gps['lat']:.6f},{gps['lon']:.6f},{gps['alt']:.2f},{state['acceleration']:.2f}"
+        if self.frame_format == "text":
+            return f"{gps['lat']:.6f},{gps['lon']:.6f},{gps['alt']:.2f},{state['acceleration']:.2f}"
+        frame = encode_frame(self.vehicle_id, self.seq, time.monotonic_ns(),
+                             gps['lat'], gps['lon'], gps['alt'], state['acceleration'])
+        self.seq += 1
+        return frame
+
+    def get_end_signal(self):
+        if self.frame_format == "text":
+            return "END"
+        return encode_end_frame(self.vehicle_id, self.seq, time.monotonic_ns())
 
     def send_data(self, data):
-        self.sock.sendto(data.encode(), (self.UDP_IP, self.UDP_PORT))
+        if isinstance(data, str):
+            data = data.encode()
+        self.sock.sendto(data, (self.UDP_IP, self.UDP_PORT))
 
     def run_simulation(self):
         print("[SIM] Iniciando simulação de foguete PET")
@@ -196,7 +366,7 @@ class RocketSimulator:
                 time.sleep(0.1)
 
             print("[SIM] Foguete caiu. Fim da simulação.")
-            self.send_data("END")
+            self.send_data(self.get_end_signal())
 
         except KeyboardInterrupt:
             print("\n[SIM] Simulação interrompida")
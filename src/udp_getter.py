@@ -1,67 +1,160 @@
 import socket
-import csv
 import os
-import sys
-from pathlib import Path
+import signal
+import argparse
+import asyncio
 import time
 
-# Verifica o modo de operação
-MODO_TESTE = False
-if len(sys.argv) > 1 and sys.argv[1] == "--teste":
-    MODO_TESTE = True
+from core.csv_writer import BufferedCSVWriter
+from core.store import TelemetryStoreWriter
+from core.flights import FlightIndexWriter
+from core.sinks import SinkGroup
+from core.ring_buffer import RingPublisher
+from core.counters import RateCounter, udp_kernel_drops
+from core.packets import decode_batch, csv_rows
+from core.async_ingest import AsyncIngestEngine, set_receive_buffer
+
+# Verifica o modo de operação e a política de escrita
+parser = argparse.ArgumentParser(description="Receptor UDP de telemetria")
+parser.add_argument("--teste", action="store_true", help="Sobrescreve os dados e encerra ao receber END")
+parser.add_argument("--csv", action="store_true", help="Também espelha as amostras em data/dados.csv")
+parser.add_argument("--no-ring", action="store_true", help="Não publica as amostras no ring buffer de memória compartilhada")
+parser.add_argument("--flush-rows", type=int, default=256, help="Descarrega após N linhas")
+parser.add_argument("--flush-ms", type=float, default=100, help="Descarrega após T ms da linha mais antiga")
+parser.add_argument("--fsync", action="store_true", help="fsync a cada descarga (durabilidade)")
+parser.add_argument("--quiet", action="store_true", help="Troca o print por pacote por contadores periódicos")
+parser.add_argument("--report-interval", type=float, default=5.0, help="Intervalo (s) dos contadores no modo silencioso")
+parser.add_argument("--engine", choices=["sync", "asyncio"], default="sync", help="Motor de ingestão")
+parser.add_argument("--rcvbuf", type=int, default=0, help="SO_RCVBUF em bytes (0 = padrão do sistema)")
+parser.add_argument("--queue-size", type=int, default=64, help="Lotes na fila entre leitura e escrita (motor asyncio)")
+args = parser.parse_args()
+
+MODO_TESTE = args.teste
 
 UDP_PORT = 5555
 sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+rcvbuf = set_receive_buffer(sock, args.rcvbuf)
 sock.bind(("", UDP_PORT))
 
-# Caminho para o arquivo CSV
+# Caminhos do store colunar (destino principal) e do CSV (espelho opcional)
 dir_path = os.path.dirname(os.path.abspath(__file__))
 data_dir = os.path.join(dir_path, "..", "data")
+store_path = os.path.join(data_dir, "telemetria")
 csv_path = os.path.join(data_dir, "dados.csv")
 
 # Garante que o diretório existe
 os.makedirs(data_dir, exist_ok=True)
 
-# Modo teste: sobrescreve o arquivo
-# Modo definitivo: adiciona ao arquivo existente
-if MODO_TESTE:
-    file_mode = "w"
-else:
-    file_mode = "a"
+# Modo teste: sobrescreve os dados
+# Modo definitivo: adiciona aos dados existentes
+store_writer = TelemetryStoreWriter(
+    store_path,
+    truncate=MODO_TESTE,
+    flush_rows=args.flush_rows,
+    flush_ms=args.flush_ms,
+    fsync=args.fsync
+)
+csv_writer = BufferedCSVWriter(
+    csv_path,
+    header=["lat", "lon", "alt", "vel"],
+    truncate=MODO_TESTE,
+    flush_rows=args.flush_rows,
+    flush_ms=args.flush_ms,
+    fsync=args.fsync
+) if args.csv else None
+# Índice de voos: segmenta na ingestão (antes do CSV, para registrar os offsets em bytes)
+flight_index = FlightIndexWriter(
+    store_path,
+    rows=store_writer.rows,
+    truncate=MODO_TESTE,
+    csv_writer=csv_writer,
+    flush_ms=args.flush_ms
+)
+writer = SinkGroup([store_writer, flight_index, csv_writer])
 
-# Cria o arquivo se não existir ou se for modo teste
-if MODO_TESTE or not os.path.exists(csv_path):
-    with open(csv_path, file_mode, newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(["lat", "lon", "alt", "vel"])
+# Caminho ao vivo: ring buffer em memória compartilhada para o dashboard e o visualizador
+publisher = None if args.no_ring else RingPublisher(base_rows=store_writer.rows)
+counter = RateCounter(prefix="[UDP]", interval=args.report_interval)
 
-print(f"[UDP] Aguardando dados na porta {UDP_PORT}...")
-print(f"[UDP] Modo: {'TESTE (sobrescreve)' if MODO_TESTE else 'DEFINITIVO (acumula)'}")
-print(f"[UDP] Salvando em: {csv_path}")
 
-try:
+def _encerrar(signum, frame):
+    # run.py encerra com terminate(): garante a descarga final do buffer
+    raise KeyboardInterrupt
+
+
+def run_sync():
+    """Laço bloqueante: um datagrama por vez"""
+    signal.signal(signal.SIGTERM, _encerrar)
+
+    # Acorda periodicamente para descarregar o buffer mesmo sem pacotes chegando
+    sock.settimeout(max(writer.flush_interval, 0.01))
+
     while True:
-        data, _ = sock.recvfrom(1024)
-        msg = data.decode().strip()
-        
-        # Se receber "END", encerra o getter no modo teste
-        if msg == "END":
+        try:
+            data, _ = sock.recvfrom(1024)
+            rx_ns = time.monotonic_ns()  # carimbo de recepção, antes de qualquer processamento
+        except socket.timeout:
+            writer.maybe_flush()
+            if args.quiet:
+                counter.maybe_report(f" | Gravadas: {writer.rows_written}")
+            continue
+
+        samples, ends, _ = decode_batch([data], rx_ns)
+        store_writer.rebase(samples)  # base de tempo do store, antes de publicar e gravar
+
+        # "END" fecha o voo no índice; no modo teste também encerra o getter
+        if ends:
+            writer.mark_end()
             if MODO_TESTE:
                 print("[UDP] Recebido sinal de fim. Encerrando no modo teste.")
                 break
             else:
+                print(f"[UDP] Fim de voo recebido. Voos no índice: {flight_index.count}")
                 continue
-            
-        # Escreve no CSV
-        with open(csv_path, "a", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow(msg.split(','))
-            print(f"[UDP] Dados salvos: {msg}")
-            
+
+        # Escreve no store (bufferizado) e publica no ring (imediato)
+        writer.write_samples(samples)
+        if publisher:
+            publisher.publish(samples)
+        writer.maybe_flush()
+        counter.add(len(samples))
+        if args.quiet:
+            counter.maybe_report(f" | Gravadas: {writer.rows_written}")
+        else:
+            for row in csv_rows(samples):
+                print(f"[UDP] Dados recebidos: {','.join(map(str, row))}")
+
+
+print(f"[UDP] Aguardando dados na porta {UDP_PORT}...")
+print(f"[UDP] Modo: {'TESTE (sobrescreve)' if MODO_TESTE else 'DEFINITIVO (acumula)'}")
+print(f"[UDP] Salvando em: {store_path}{f' (+ {csv_path})' if args.csv else ''}")
+print(f"[UDP] Descarga: {args.flush_rows} linhas ou {args.flush_ms:g} ms{' + fsync' if args.fsync else ''}")
+print(f"[UDP] Motor: {args.engine} | SO_RCVBUF: {rcvbuf} bytes")
+
+try:
+    if args.engine == "asyncio":
+        engine = AsyncIngestEngine(
+            sock, writer,
+            stop_on_end=MODO_TESTE,
+            queue_size=args.queue_size,
+            quiet=args.quiet,
+            counter=counter,
+            publisher=publisher,
+            rebase=store_writer.rebase
+        )
+        asyncio.run(engine.run())
+    else:
+        run_sync()
+
 except KeyboardInterrupt:
     print("\n[UDP] Interrompido pelo usuário.")
 except Exception as e:
     print(f"[ERRO UDP] {str(e)}")
 finally:
+    writer.close()
+    if publisher:
+        publisher.close()
+    drops = udp_kernel_drops(sock)
     sock.close()
-    print("[UDP] Socket fechado.")
\ No newline at end of file
+    print(f"[UDP] {writer.rows_written} linhas gravadas em {flight_index.count + (flight_index.current is not None)} voo(s). Descartes no kernel: {drops if drops is not None else 'n/d'}")
+    print("[UDP] Socket fechado.")
@@ -1,14 +1,28 @@
 import sys
-import csv
 import os
+import numpy as np
 from PyQt6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget
 from PyQt6.QtCore import QTimer
 import pyqtgraph as pg
 
+from core.store import TelemetryStore, store_exists
+from core.column_buffer import ColumnBuffer
+from core.ring_buffer import RingReader
+from core.tail import CSVTailer
+from core.fast_parser import parse_csv_chunk, ParseStats
+from core.downsample import MinMaxLOD
+from core.timebase import fill_missing, NOMINAL_PERIOD_NS
+
 class RealTimePlot(QMainWindow):
-    def __init__(self, csv_path):
+    def __init__(self, csv_path, store_path=None):
         super().__init__()
         self.csv_path = csv_path
+        self.tailer = CSVTailer(csv_path)
+        self.parse_stats = ParseStats()
+        self.store_path = store_path
+        self.store = None
+        self.ring = None
+        self.rows = 0
         self.setWindowTitle("Telemetria Foguete PET - Tempo Real")
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
@@ -29,9 +43,11 @@ class RealTimePlot(QMainWindow):
         self.curve_vel = self.plot_vel.plot(pen='b')
 
         # Dados
-        self.timestamps = []
-        self.alts = []
-        self.vels = []
+        # Colunas pré-alocadas: cada atualização copia só as amostras novas
+        self.data = ColumnBuffer([('alt', np.float64), ('vel', np.float64), ('t_ns', np.int64)])
+        # Nível de detalhe de cada curva, estendido só com as amostras novas
+        self.lod_alt = MinMaxLOD()
+        self.lod_vel = MinMaxLOD()
 
         # Configura o timer para atualizar o gráfico
         self.timer = QTimer()
@@ -39,44 +55,120 @@ class RealTimePlot(QMainWindow):
         self.timer.start(500)  # Atualiza a cada 500ms
 
     def update_plot(self):
+        if self.store_path and store_exists(self.store_path):
+            self.update_from_store()
+            return
+
         if not os.path.exists(self.csv_path):
             return
 
         try:
-            with open(self.csv_path, 'r') as f:
-                reader = csv.reader(f)
-                next(reader)  # Pula cabeçalho
-                alts = []
-                vels = []
-                for i, row in enumerate(reader):
-                    if len(row) < 4:
-                        continue
-                    try:
-                        alts.append(float(row[2]))
-                        vels.append(float(row[3]))
-                    except ValueError:
-                        continue
-                
-                # Atualiza apenas se houver novos dados
-                if len(alts) > len(self.alts):
-                    self.alts = alts
-                    self.vels = vels
-                    self.timestamps = list(range(len(self.alts)))
-                    
-                    # Atualiza os gráficos
-                    self.curve_alt.setData(self.timestamps, self.alts)
-                    self.curve_vel.setData(self.timestamps, self.vels)
+            # Só os bytes novos desde a última leitura
+            chunk, reset = self.tailer.read_new()
+            if reset:
+                self.data.clear()
+                self.reset_lod()
+
+            rows = parse_csv_chunk(chunk, stats=self.parse_stats)
+
+            # Atualiza apenas se houver novos dados
+            if len(rows) or reset:
+                # CSV legado não tem carimbo: eixo na grade nominal
+                t_ns = (len(self.data) + np.arange(len(rows), dtype=np.int64)) * NOMINAL_PERIOD_NS
+                self.data.append({'alt': rows[:, 2], 'vel': rows[:, 3], 't_ns': t_ns})
+
+                # Atualiza os gráficos
+                self.redraw()
 
         except Exception as e:
             print(f"Erro ao ler CSV: {e}")
 
+    def update_from_store(self):
+        try:
+            if self.store is None:
+                self.store = TelemetryStore(self.store_path)
+                self.rows = 0
+            elif self.store.refresh():
+                self.rows = 0  # store recriado (modo teste)
+
+            new_alts = []
+            new_vels = []
+            new_times = []
+
+            # Histórico: colunas mapeadas direto do arquivo, sem parse
+            if self.rows < self.store.rows:
+                new_alts.append(self.store.column('alt', self.rows))
+                new_vels.append(self.store.column('vel', self.rows))
+                if 't_rx_ns' in self.store.names:
+                    new_times.append(self.store.column('t_rx_ns', self.rows))
+                else:
+                    new_times.append(np.full(self.store.rows - self.rows, -1, dtype=np.int64))
+                self.rows = self.store.rows
+
+            # Ao vivo: amostras à frente do store, direto da memória compartilhada
+            ring = self.live_ring()
+            if ring is not None:
+                seq = self.rows - ring.base_rows
+                if ring.oldest() <= seq <= ring.head:
+                    samples, _, lost = ring.read_since(seq)
+                    if not lost and len(samples):
+                        new_alts.append(samples['alt'])
+                        new_vels.append(samples['vel'])
+                        new_times.append(samples['t_rx_ns'])
+                        self.rows += len(samples)
+
+            if not new_alts and len(self.data) == self.rows:
+                return
+
+            keep = self.rows - sum(len(a) for a in new_alts)
+            if keep < len(self.data):
+                # Store recriado (self.rows voltou a zero): recomeça do início
+                self.data.clear()
+                self.reset_lod()
+            if new_alts:
+                # Carimbos ausentes: só a cauda nova é completada, a partir do último guardado
+                last_ns = int(self.data.view('t_ns')[-1]) if len(self.data) else None
+                self.data.append({'alt': np.concatenate(new_alts), 'vel': np.concatenate(new_vels),
+                                  't_ns': fill_missing(np.concatenate(new_times), last_ns)})
+
+            self.redraw()
+
+        except Exception as e:
+            print(f"Erro ao ler store: {e}")
+
+    def reset_lod(self):
+        self.lod_alt = MinMaxLOD()
+        self.lod_vel = MinMaxLOD()
+
+    def redraw(self):
+        """Desenha só os pontos do nível de detalhe (mín/máx por balde), não a série inteira"""
+        alts, vels, t_ns = self.data.view('alt'), self.data.view('vel'), self.data.view('t_ns')
+        self.lod_alt.extend(alts[self.lod_alt.n:])
+        self.lod_vel.extend(vels[self.lod_vel.n:])
+        idx_alt = self.lod_alt.indices()
+        idx_vel = self.lod_vel.indices()
+        # Eixo x: segundos desde a primeira amostra, calculado só nos pontos desenhados
+        self.curve_alt.setData((t_ns[idx_alt] - t_ns[0]) / 1e9 if len(t_ns) else idx_alt, alts[idx_alt])
+        self.curve_vel.setData((t_ns[idx_vel] - t_ns[0]) / 1e9 if len(t_ns) else idx_vel, vels[idx_vel])
+
+    def live_ring(self):
+        if self.ring is not None and self.ring.closed:
+            self.ring.close()
+            self.ring = None
+        if self.ring is None:
+            self.ring = RingReader.try_attach()
+            # Com o ring disponível a latência passa a ser a do timer
+            self.timer.setInterval(50 if self.ring else 500)
+        return self.ring
+
 if __name__ == "__main__":
     # Caminho para o arquivo CSV
     dir_path = os.path.dirname(os.path.abspath(__file__))
     csv_path = os.path.join(dir_path, "..", "data", "dados.csv")
+    store_path = os.path.join(dir_path, "..", "data", "telemetria")
 
     app = QApplication(sys.argv)
-    window = RealTimePlot(csv_path)
+    window = RealTimePlot(csv_path, store_path)
     window.resize(800, 600)
     window.show()
     sys.exit(app.exec())
\ No newline at end of file